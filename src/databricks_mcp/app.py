@@ -1,9 +1,47 @@
 # src/databricks_mcp/app.py
+from typing import Any
+
+import pydantic_core
 import structlog
 from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.server import _convert_to_content
+from mcp.types import TextContent
+
+try:
+    import orjson
+except ImportError: # Optional speed-up (extra "fast-json"); FastMCP's stdlib json path is used without it
+    orjson = None
 
 log = structlog.get_logger("app")
 
+
+class DatabricksMCP(FastMCP):
+    """
+    FastMCP server that serializes dict tool results with orjson when it is installed.
+
+    Large SQL results are returned as dicts of many rows; FastMCP would convert them to
+    jsonable Python and then run stdlib json.dumps over the copy. orjson encodes the
+    dict in a single native pass, using pydantic's conversion only for types it
+    doesn't know. Any other result type goes through FastMCP's usual conversion.
+    """
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]):
+        if orjson is None:
+            return await super().call_tool(name, arguments)
+
+        context = self.get_context()
+        result = await self._tool_manager.call_tool(name, arguments, context=context)
+        if isinstance(result, dict):
+            try:
+                text = orjson.dumps(
+                    result, default=pydantic_core.to_jsonable_python, option=orjson.OPT_NON_STR_KEYS
+                ).decode()
+                return [TextContent(type="text", text=text)]
+            except (TypeError, ValueError) as e: # orjson.JSONEncodeError subclasses TypeError
+                log.debug("orjson could not encode tool result, using default conversion", tool=name, error=str(e))
+        return _convert_to_content(result)
+
+
 # Central definition of the MCP application instance
-mcp = FastMCP(server_name="databricks")
-log.debug("FastMCP instance created in app.py") 
\ No newline at end of file
+mcp = DatabricksMCP(server_name="databricks")
+log.debug("FastMCP instance created in app.py")
@@ -1,5 +1,6 @@
 import logging
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from pydantic_settings import SettingsConfigDict
 
@@ -15,10 +16,47 @@ class Settings(BaseSettings):
     # DATABRICKS_TOKEN or other auth methods are also picked up by databricks-sdk
     # We mainly need settings specific to the MCP server itself.
     databricks_host: str | None = None # Explicitly define if needed, otherwise SDK handles it
+    # HTTP tuning for the shared WorkspaceClient; None keeps the SDK defaults
+    databricks_http_timeout_seconds: int | None = None
+    databricks_http_pool_size: int | None = None # Connections kept alive per host pool
+    databricks_http_retry_timeout_seconds: int | None = None # Budget for the SDK's 429/5xx retries
 
     # Server Configuration
     log_level: str = "INFO"
     enable_get_secret: bool = False # Security-sensitive: default to False
+    # Items a list resource returns; longer listings stop paging there and report "truncated"
+    resource_list_max_results: int = 500
+    # query_model_serving_endpoint prediction cache; off by default, since a model may not be deterministic
+    serving_prediction_cache_size: int = 0
+    serving_prediction_cache_ttl_seconds: float = 60.0
+    # query_vector_index response cache; off by default, since only this server's own upserts invalidate it
+    vector_query_cache_size: int = 0
+    vector_query_cache_ttl_seconds: float = 120.0
+    # Cosine similarity at which a cached vector query answers a new one (1.0 = exact match only)
+    vector_query_cache_min_similarity: float = 1.0
+    # Per-index overrides of the similarity floor, as JSON: {"catalog.schema.index": 0.97}
+    vector_query_cache_index_similarity: dict[str, float] = {}
+    # Estimated memory budget for cached responses and vectors; 0 = bounded by entry count only
+    vector_query_cache_max_bytes: int = 64 * 1024 * 1024
+    # Fraction of approximate cache hits re-run against the index to tune the per-index threshold
+    vector_query_cache_verify_rate: float = 0.05
+    # Replay mode for eval runs: the two caches above answer, misses raise instead of calling Databricks
+    ml_cache_replay: bool = False
+
+    @model_validator(mode="after")
+    def _check_replay_caches(self) -> "Settings":
+        """Rejects replay mode with a disabled cache, where every call would be a miss."""
+        if self.ml_cache_replay:
+            disabled = [
+                name for name, size in (
+                    ("SERVING_PREDICTION_CACHE_SIZE", self.serving_prediction_cache_size),
+                    ("VECTOR_QUERY_CACHE_SIZE", self.vector_query_cache_size),
+                )
+                if size <= 0
+            ]
+            if disabled:
+                raise ValueError(f"ML_CACHE_REPLAY=true requires {' and '.join(disabled)} > 0.")
+        return self
 
     @property
     def numeric_log_level(self) -> int:
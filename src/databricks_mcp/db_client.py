@@ -1,9 +1,33 @@
+import threading
+
 import structlog
 from databricks.sdk import WorkspaceClient
+from databricks.sdk.config import Config
+
+from .config import settings
 
 log = structlog.get_logger(__name__)
 
 _db_client = None
+_db_client_lock = threading.Lock()
+
+def _build_sdk_config() -> Config:
+    """
+    Builds the SDK Config, applying the server's HTTP tuning settings when set.
+
+    The SDK keeps one requests.Session (with a pooled HTTPAdapter) per client,
+    so sizing the pool here covers every tool and resource call. Retries of
+    429/5xx responses are done by the SDK itself, bounded by the retry timeout.
+    """
+    overrides = {}
+    if settings.databricks_http_timeout_seconds is not None:
+        overrides["http_timeout_seconds"] = settings.databricks_http_timeout_seconds
+    if settings.databricks_http_pool_size is not None:
+        overrides["max_connection_pools"] = settings.databricks_http_pool_size
+        overrides["max_connections_per_pool"] = settings.databricks_http_pool_size
+    if settings.databricks_http_retry_timeout_seconds is not None:
+        overrides["retry_timeout_seconds"] = settings.databricks_http_retry_timeout_seconds
+    return Config(**overrides)
 
 def get_db_client() -> WorkspaceClient:
     """
@@ -12,23 +36,41 @@ def get_db_client() -> WorkspaceClient:
     Relies on the databricks-sdk's default authentication mechanisms
     (environment variables, config files, etc.).
     See: https://databricks-sdk-py.readthedocs.io/en/latest/authentication.html
+
+    The client (and its keep-alive HTTP connection pool) is created once and
+    shared by all callers, including worker threads.
     """
     global _db_client
-    if _db_client is None:
-        try:
-            log.debug("Initializing Databricks WorkspaceClient...")
-            # WorkspaceClient automatically picks up DATABRICKS_HOST, DATABRICKS_TOKEN
-            # or other configured authentication methods.
-            _db_client = WorkspaceClient()
-            # Perform a simple check to ensure the client is functional
-            _db_client.current_user.me()
-            log.info("Databricks WorkspaceClient initialized successfully.")
-        except Exception as e:
-            log.error("Failed to initialize Databricks WorkspaceClient", error=str(e), exc_info=True)
-            # Re-raise the exception to prevent the server from starting incorrectly
-            raise RuntimeError("Could not initialize Databricks client. Check credentials and host.") from e
+    if _db_client is not None:
+        return _db_client
+    with _db_client_lock:
+        if _db_client is None:
+            try:
+                log.debug("Initializing Databricks WorkspaceClient...")
+                # WorkspaceClient automatically picks up DATABRICKS_HOST, DATABRICKS_TOKEN
+                # or other configured authentication methods.
+                client = WorkspaceClient(config=_build_sdk_config())
+                # Perform a simple check to ensure the client is functional
+                client.current_user.me()
+                _db_client = client
+                log.info("Databricks WorkspaceClient initialized successfully.")
+            except Exception as e:
+                log.error("Failed to initialize Databricks WorkspaceClient", error=str(e), exc_info=True)
+                # Re-raise the exception to prevent the server from starting incorrectly
+                raise RuntimeError("Could not initialize Databricks client. Check credentials and host.") from e
     return _db_client
 
+def reset_db_client() -> None:
+    """
+    Drops the cached WorkspaceClient so the next get_db_client() call builds a new one.
+
+    Use after credentials or HTTP settings change (e.g. a rotated token).
+    """
+    global _db_client
+    with _db_client_lock:
+        _db_client = None
+    log.info("Databricks WorkspaceClient reset; it will be re-created on next use.")
+
 # Example usage (optional, for testing):
 # if __name__ == "__main__":
 #     # Ensure environment variables (DATABRICKS_HOST, DATABRICKS_TOKEN) are set
@@ -1,16 +1,51 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 
 import structlog
 
 from .config import settings
 
+try:
+    import orjson
+except ImportError: # Optional (extra "fast-json"); stdlib json renders log lines without it
+    orjson = None
+
+# Background writer for log records; started once by setup_logging()
+_queue_listener: logging.handlers.QueueListener | None = None
+
+
+def is_debug_enabled(name: str) -> bool:
+    """
+    Returns True if DEBUG records for the named logger would be emitted.
+
+    Use it to skip building expensive diagnostic log fields on hot paths.
+    """
+    return logging.getLogger(name).isEnabledFor(logging.DEBUG)
+
+
+def _stop_queue_listener():
+    """Flushes and stops the background log writer, if it is running."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+def _orjson_dumps(obj, default=None, **_kwargs) -> str:
+    """JSONRenderer serializer backed by orjson; returns str as stdlib logging expects."""
+    return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode()
+
 
 def setup_logging():
     """Configure structured logging using structlog."""
 
     # Define processors for structlog
     shared_processors = [
+        # Drop events below the configured level before any other processor does work
+        structlog.stdlib.filter_by_level,
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
@@ -20,18 +55,28 @@ def setup_logging():
         structlog.processors.UnicodeDecoder(),
     ]
 
-    # Configure standard logging to work with structlog
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stderr,
-        level=settings.numeric_log_level,
-    )
+    # Configure standard logging to work with structlog. Tool handlers only enqueue
+    # records; a background listener thread does the stderr writes.
+    global _queue_listener
+    if _queue_listener is None:
+        stderr_handler = logging.StreamHandler(sys.stderr)
+        stderr_handler.setFormatter(logging.Formatter("%(message)s"))
+        log_queue = queue.SimpleQueue()
+        _queue_listener = logging.handlers.QueueListener(log_queue, stderr_handler)
+        _queue_listener.start()
+        # Drain queued records on interpreter exit (including sys.exit paths)
+        atexit.register(_stop_queue_listener)
+        logging.basicConfig(
+            format="%(message)s",
+            handlers=[logging.handlers.QueueHandler(log_queue)],
+            level=settings.numeric_log_level,
+        )
 
     # Configure structlog
     structlog.configure(
         processors=shared_processors + [
             # Use JSONRenderer for structured output
-            structlog.processors.JSONRenderer(),
+            structlog.processors.JSONRenderer(serializer=_orjson_dumps) if orjson else structlog.processors.JSONRenderer(),
         ],
         logger_factory=structlog.stdlib.LoggerFactory(),
         wrapper_class=structlog.stdlib.BoundLogger,
@@ -0,0 +1,98 @@
+import asyncio
+import random
+
+import structlog
+from databricks.sdk.service import jobs as jobs_service
+
+log = structlog.get_logger(__name__)
+
+# Default wait for run_notebook/execute_code/run_job_now (the SDK's Wait.result() default is 20 minutes).
+# run_notebook and execute_code cancel work still running past it; run_job_now leaves the job run going
+# and reports its run_id, so the caller can keep checking it with get_run_status
+WAIT_TIMEOUT_SECONDS = 20 * 60
+# Poll delays grow by RUN_POLL_BACKOFF_FACTOR from the initial to the max delay, each jittered by
+# +/-RUN_POLL_JITTER so concurrent runs don't poll in lockstep; caller-chosen delays are floored
+RUN_POLL_INITIAL_DELAY_SECONDS = 2.0
+RUN_POLL_MAX_DELAY_SECONDS = 30.0
+RUN_POLL_BACKOFF_FACTOR = 1.7
+RUN_POLL_JITTER = 0.2
+MIN_POLL_INTERVAL_SECONDS = 1.0
+
+_TERMINAL_LIFE_CYCLE_STATES = frozenset({
+    jobs_service.RunLifeCycleState.TERMINATED,
+    jobs_service.RunLifeCycleState.SKIPPED,
+    jobs_service.RunLifeCycleState.INTERNAL_ERROR,
+})
+
+# Shared get_run pollers keyed by run_id, and how many tool calls are waiting on each
+_run_pollers: dict[int, asyncio.Task] = {}
+_run_waiters: dict[int, int] = {}
+
+
+def poll_intervals(initial: float | None, maximum: float | None) -> tuple[float, float]:
+    """Resolves optional caller-chosen poll delays to (initial, max), floored at MIN_POLL_INTERVAL_SECONDS."""
+    initial = RUN_POLL_INITIAL_DELAY_SECONDS if initial is None else max(MIN_POLL_INTERVAL_SECONDS, initial)
+    maximum = RUN_POLL_MAX_DELAY_SECONDS if maximum is None else max(MIN_POLL_INTERVAL_SECONDS, maximum)
+    return initial, max(initial, maximum)
+
+
+def wait_timeout(timeout_seconds: int | None) -> float:
+    """Resolves an optional caller-chosen timeout_seconds, rejecting values below 1."""
+    if timeout_seconds is None:
+        return WAIT_TIMEOUT_SECONDS
+    if timeout_seconds < 1:
+        raise ValueError("'timeout_seconds' must be at least 1.")
+    return timeout_seconds
+
+
+async def cancel_after_timeout(cancel, **ids) -> None:
+    """Best-effort cancel of timed-out work; a failure is logged rather than masking the timeout."""
+    try:
+        await asyncio.to_thread(cancel, **ids)
+    except Exception as e:
+        log.warning("Failed to cancel timed-out work", error=str(e), **ids)
+
+
+def poll_schedule(initial: float, cap: float):
+    """Yields jittered delays growing by RUN_POLL_BACKOFF_FACTOR from initial up to cap."""
+    delay = initial
+    while True:
+        # Jitter only spreads polls out; it is non-cryptographic, so the stdlib PRNG is fine
+        yield min(delay, cap) * random.uniform(1 - RUN_POLL_JITTER, 1 + RUN_POLL_JITTER) # noqa: S311
+        delay *= RUN_POLL_BACKOFF_FACTOR
+
+
+async def _poll_run(db, run_id: int, initial: float, cap: float) -> jobs_service.Run:
+    """Polls get_run with backoff until the run reaches a terminal life cycle state."""
+    for delay in poll_schedule(initial, cap):
+        run_details = await asyncio.to_thread(db.jobs.get_run, run_id=run_id)
+        if run_details.state and run_details.state.life_cycle_state in _TERMINAL_LIFE_CYCLE_STATES:
+            return run_details
+        await asyncio.sleep(delay)
+
+
+async def wait_for_run(db, run_id: int, timeout: float, initial: float, cap: float) -> jobs_service.Run:
+    """
+    Waits for a job run to finish without blocking the event loop.
+
+    Concurrent waiters on the same run share one poller task, so each tick costs a
+    single get_run call however many tool calls are waiting. The poller is
+    cancelled once its last waiter leaves (finished, timed out or cancelled). The
+    first waiter's poll intervals are used for the shared poller. Raises
+    asyncio.TimeoutError past timeout.
+    """
+    poller = _run_pollers.get(run_id)
+    if poller is None:
+        poller = asyncio.create_task(_poll_run(db, run_id, initial, cap))
+        _run_pollers[run_id] = poller
+    _run_waiters[run_id] = _run_waiters.get(run_id, 0) + 1
+    try:
+        # shield() keeps one waiter's timeout/cancellation from cancelling the shared poller
+        return await asyncio.wait_for(asyncio.shield(poller), timeout)
+    finally:
+        _run_waiters[run_id] -= 1
+        if _run_waiters[run_id] == 0:
+            del _run_waiters[run_id]
+            del _run_pollers[run_id]
+            if not poller.done():
+                poller.cancel()
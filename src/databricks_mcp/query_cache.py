@@ -0,0 +1,232 @@
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from collections import defaultdict
+from dataclasses import dataclass
+
+import structlog
+
+log = structlog.get_logger(__name__)
+
+# Per-index similarity threshold adjustment on verified approximate hits
+THRESHOLD_STEP_UP = 0.01 # after a hit whose results disagreed with a fresh query
+THRESHOLD_STEP_DOWN = 0.001 # after a hit that agreed, relaxing back toward the configured floor
+
+
+@dataclass
+class _CacheEntry:
+    expires_at: float
+    response: dict
+    size_bytes: int
+    version: int
+    vector: tuple[float, ...] | None = None
+    norm: float = 0.0
+
+
+def _norm(vector) -> float:
+    return math.sqrt(sum(x * x for x in vector))
+
+
+def _estimate_size(response: dict, vector: tuple | None) -> int:
+    """Approximates an entry's memory footprint by its JSON length plus 8 bytes per vector element."""
+    size = len(json.dumps(response, default=str))
+    if vector is not None:
+        size += 8 * len(vector)
+    return size
+
+
+class QueryCache:
+    """
+    In-process LRU + TTL cache of Vector Search query responses.
+
+    Entries are grouped by a scope tuple (index_name, columns, filters_json,
+    num_results, query_type); the first element of the scope must be the
+    index name so invalidate() can retire every entry of an index.
+    Text queries match exactly. Vector queries match exactly, or, when the
+    index's similarity threshold is below 1.0, by cosine similarity against
+    the cached vectors of the same scope (best match at or above it wins).
+
+    Thresholds are kept per index, since the same cosine value means different
+    things for different embedding models. They start at the index override (or
+    min_similarity) and move with record_verification() outcomes, never below
+    that starting floor. Memory is bounded by entry count and, if max_bytes > 0,
+    by the estimated size of all cached entries.
+
+    Invalidation is O(1): each index has a version counter stamped into its
+    entries, invalidate() bumps it, and lookups treat entries with an older
+    version as misses (dropping them as they are found). Entries of other
+    indexes stay warm.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        min_similarity: float = 1.0,
+        max_bytes: int = 0,
+        index_similarity: dict[str, float] | None = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+        self.max_bytes = max_bytes
+        self.index_similarity = dict(index_similarity or {})
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._thresholds: dict[str, float] = {}
+        self._versions: defaultdict[str, int] = defaultdict(int)
+        self._entries: OrderedDict[tuple, _CacheEntry] = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def threshold(self, index_name: str) -> float:
+        """Returns the current cosine-similarity threshold for index_name."""
+        return self._thresholds.get(index_name, self._floor(index_name))
+
+    def version(self, index_name: str) -> int:
+        """Returns index_name's invalidation counter; pass it to put() for responses fetched after reading it."""
+        return self._versions[index_name]
+
+    def get(self, scope: tuple, query_text: str | None = None, query_vector=None) -> dict | None:
+        """Returns the cached response for the query, or None on a miss."""
+        return self.lookup(scope, query_text=query_text, query_vector=query_vector)[0]
+
+    def lookup(self, scope: tuple, query_text: str | None = None, query_vector=None) -> tuple[dict | None, float]:
+        """
+        Returns (response, similarity) for the query, or (None, 0.0) on a miss.
+
+        similarity is 1.0 for exact matches and the cosine similarity of the
+        matched vector for approximate ones.
+        """
+        if not self.enabled:
+            return None, 0.0
+        key = self._key(scope, query_text, query_vector)
+        now = time.monotonic()
+        with self._lock:
+            similarity = 1.0
+            entry = self._entries.get(key)
+            if entry is not None and not self._is_live(scope[0], entry, now):
+                self._remove(key)
+                entry = None
+            if entry is None and query_vector is not None and self.threshold(scope[0]) < 1.0:
+                key, entry, similarity = self._nearest(scope, query_vector, now)
+            if entry is None:
+                self.misses += 1
+                return None, 0.0
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.response, similarity
+
+    def put(
+        self,
+        scope: tuple,
+        response: dict,
+        query_text: str | None = None,
+        query_vector=None,
+        version: int | None = None,
+    ) -> None:
+        """
+        Caches response for the query, evicting least recently used entries past the size limits.
+
+        version is the index's version() read before the response was fetched; a response
+        that raced with an invalidate() is then not cached. Defaults to the current version.
+        """
+        if not self.enabled:
+            return
+        key = self._key(scope, query_text, query_vector)
+        vector = key[2] if query_vector is not None else None
+        entry = _CacheEntry(
+            expires_at=time.monotonic() + self.ttl_seconds,
+            response=response,
+            # Sizing serializes the whole response, so skip it when there is no byte budget
+            size_bytes=_estimate_size(response, vector) if self.max_bytes > 0 else 0,
+            version=0,
+        )
+        if vector is not None:
+            entry.vector = vector
+            entry.norm = _norm(vector)
+        with self._lock:
+            current = self._versions[scope[0]]
+            if version is not None and version != current:
+                return
+            entry.version = current
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.total_bytes += entry.size_bytes
+            while self._entries and (
+                len(self._entries) > self.max_size
+                or (self.max_bytes > 0 and self.total_bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def record_verification(self, index_name: str, agreed: bool) -> float:
+        """
+        Adjusts index_name's threshold after an approximate hit was checked against a fresh query.
+
+        Disagreement tightens the threshold quickly; agreement relaxes it slowly
+        toward the configured floor. Returns the new threshold.
+        """
+        with self._lock:
+            current = self.threshold(index_name)
+            if agreed:
+                updated = max(self._floor(index_name), current - THRESHOLD_STEP_DOWN)
+            else:
+                updated = min(1.0, current + THRESHOLD_STEP_UP)
+            self._thresholds[index_name] = updated
+        if updated != current:
+            log.info("Vector query cache threshold adjusted", index_name=index_name, agreed=agreed, threshold=updated)
+        return updated
+
+    def invalidate(self, index_name: str) -> int:
+        """Retires all cached responses for index_name without walking the cache; returns the new version."""
+        with self._lock:
+            self._versions[index_name] += 1
+            return self._versions[index_name]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._thresholds.clear()
+            self._versions.clear()
+            self.total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _floor(self, index_name: str) -> float:
+        return self.index_similarity.get(index_name, self.min_similarity)
+
+    def _is_live(self, index_name: str, entry: _CacheEntry, now: float) -> bool:
+        return entry.expires_at > now and entry.version == self._versions[index_name]
+
+    def _remove(self, key: tuple) -> None:
+        """Deletes an entry and its size from the byte total (caller holds the lock)."""
+        self.total_bytes -= self._entries.pop(key).size_bytes
+
+    @staticmethod
+    def _key(scope: tuple, query_text: str | None, query_vector) -> tuple:
+        if query_vector is not None:
+            return (scope, "vector", tuple(float(x) for x in query_vector))
+        return (scope, "text", query_text)
+
+    def _nearest(self, scope: tuple, query_vector, now: float) -> tuple[tuple | None, _CacheEntry | None, float]:
+        """Finds the most similar live vector entry in scope (caller holds the lock)."""
+        q_norm = _norm(query_vector)
+        if q_norm == 0.0:
+            return None, None, 0.0
+        best_key, best_entry, best_sim = None, None, self.threshold(scope[0])
+        for key, entry in self._entries.items():
+            if key[0] != scope or entry.vector is None or not self._is_live(scope[0], entry, now):
+                continue
+            if len(entry.vector) != len(query_vector) or entry.norm == 0.0:
+                continue
+            sim = sum(a * b for a, b in zip(query_vector, entry.vector)) / (q_norm * entry.norm)
+            if sim >= best_sim:
+                best_key, best_entry, best_sim = key, entry, sim
+        return best_key, best_entry, best_sim
@@ -1,23 +1,31 @@
+import operator
+
 import structlog
 # Import the mcp instance from app.py
 from ..app import mcp
 from databricks.sdk.service import compute as compute_service
 
+from ..config import settings
 from ..db_client import get_db_client
 from ..error_mapping import map_databricks_errors
+from ..sdk_utils import take_limited
 
 log = structlog.get_logger(__name__)
 
+# Fields read from each listed cluster, fetched in one C-level call per item
+_CLUSTER_SUMMARY_FIELDS = operator.attrgetter("cluster_id", "cluster_name", "state", "driver_node_type_id", "node_type_id")
+
 @map_databricks_errors
 # Use @mcp.resource decorator with URI as first arg
 @mcp.resource(
     "databricks:compute:list_clusters",
     description="Lists all available Databricks clusters in the workspace.",
 )
-def list_clusters() -> list[dict]:
+def list_clusters() -> dict:
     """
     Lists available clusters and their states.
     REQ-COMP-RES-01
+    Returns {"items": [...], "truncated": bool}; at most RESOURCE_LIST_MAX_RESULTS clusters are listed.
     """
     db = get_db_client()
     log.info("Listing Databricks clusters")
@@ -25,19 +33,19 @@ def list_clusters() -> list[dict]:
 
     # Format the output as specified roughly in the PRD
     # Iterate over the .clusters attribute if it exists
-    clusters_list = clusters_response.clusters if hasattr(clusters_response, 'clusters') else clusters_response
-    result = [
+    clusters_list = getattr(clusters_response, 'clusters', clusters_response)
+    result = take_limited((
         {
-            "cluster_id": c.cluster_id,
-            "name": c.cluster_name,
-            "state": str(c.state.value) if c.state else "UNKNOWN", # Convert enum to string
-            "driver_node_type": c.driver_node_type_id,
-            "worker_node_type": c.node_type_id, # Note: node_type_id is for workers when not autoscaling
-            # Add more fields if desired, matching ClusterInfo attributes
+            "cluster_id": cluster_id,
+            "name": name,
+            "state": str(state.value) if state else "UNKNOWN", # Convert enum to string
+            "driver_node_type": driver_node_type,
+            "worker_node_type": node_type, # Note: node_type_id is for workers when not autoscaling
+            # Add more fields if desired (and to _CLUSTER_SUMMARY_FIELDS), matching ClusterInfo attributes
         }
-        for c in clusters_list # Iterate over the extracted list
-    ]
-    log.info("Successfully listed clusters", count=len(result))
+        for cluster_id, name, state, driver_node_type, node_type in map(_CLUSTER_SUMMARY_FIELDS, clusters_list)
+    ), settings.resource_list_max_results)
+    log.info("Successfully listed clusters", count=len(result["items"]), truncated=result["truncated"])
     return result
 
 @map_databricks_errors
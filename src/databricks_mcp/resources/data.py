@@ -1,15 +1,41 @@
-import structlog
 import json
+import operator
+import time
+
+import structlog
 # Import the mcp instance from app.py
 from ..app import mcp
+from databricks.sdk.errors import DatabricksError
 from databricks.sdk.service import catalog as catalog_service, sql as sql_service
 # Remove mcp errors import
 
+from ..config import settings
 from ..db_client import get_db_client
 from ..error_mapping import map_databricks_errors, CODE_SERVER_ERROR # Import error code
+from ..sdk_utils import shape_rows
+from ..sdk_utils import take_limited
 
 log = structlog.get_logger(__name__)
 
+# Fields read from each listed item, fetched in one C-level call per item
+_CATALOG_FIELDS = operator.attrgetter("name", "comment", "owner")
+_SCHEMA_FIELDS = operator.attrgetter("name", "catalog_name", "comment", "owner")
+_TABLE_FIELDS = operator.attrgetter("name", "catalog_name", "schema_name", "table_type", "comment", "owner")
+_WAREHOUSE_FIELDS = operator.attrgetter("id", "name", "state", "cluster_size", "num_clusters", "creator_name")
+
+# Seconds a warehouse picked by preview_table is reused without listing warehouses again
+WAREHOUSE_CACHE_TTL_SECONDS = 60.0
+# (warehouse_id, time.monotonic() when it was found running), or None
+_warehouse_cache: tuple[str, float] | None = None
+# Preview states on the cached warehouse that mean it was not ready (e.g. still starting up when
+# wait_timeout ran out); the preview is then retried on a freshly found running warehouse
+_NOT_READY_STATEMENT_STATES = frozenset({
+    sql_service.StatementState.PENDING,
+    sql_service.StatementState.RUNNING,
+    sql_service.StatementState.CANCELED,
+    sql_service.StatementState.CLOSED,
+})
+
 # --- Unity Catalog Resources ---
 
 @map_databricks_errors
@@ -17,24 +43,27 @@ log = structlog.get_logger(__name__)
     "databricks:uc:list_catalogs",
     description="Lists available Unity Catalogs accessible by the current user.",
 )
-def list_catalogs() -> list[dict]:
+def list_catalogs() -> dict:
     """
     Lists available Unity Catalogs.
     REQ-DATA-RES-01
+    Returns {"items": [...], "truncated": bool}; at most RESOURCE_LIST_MAX_RESULTS catalogs are listed.
     """
     db = get_db_client()
     log.info("Listing Unity Catalogs")
-    catalogs = db.catalogs.list()
-    result = [
+    limit = settings.resource_list_max_results
+    # A page size stops Unity Catalog from returning every item in one response
+    catalogs = db.catalogs.list(max_results=limit + 1)
+    result = take_limited((
         {
-            "name": cat.name,
-            "comment": cat.comment,
-            "owner": cat.owner,
+            "name": name,
+            "comment": comment,
+            "owner": owner,
             # Add other fields like created_at, metastore_id if useful
         }
-        for cat in catalogs if cat.name
-    ]
-    log.info("Successfully listed catalogs", count=len(result))
+        for name, comment, owner in map(_CATALOG_FIELDS, catalogs) if name
+    ), limit)
+    log.info("Successfully listed catalogs", count=len(result["items"]), truncated=result["truncated"])
     return result
 
 @map_databricks_errors
@@ -42,27 +71,29 @@ def list_catalogs() -> list[dict]:
     "databricks:uc:list_schemas/{catalog_name}",
     description="Lists schemas (databases) within a specified Unity Catalog.",
 )
-def list_schemas(catalog_name: str) -> list[dict]:
+def list_schemas(catalog_name: str) -> dict:
     """
     Lists schemas within a specified catalog.
     REQ-DATA-RES-02
+    Returns {"items": [...], "truncated": bool}; at most RESOURCE_LIST_MAX_RESULTS schemas are listed.
 
     Args:
         catalog_name: The name of the catalog.
     """
     db = get_db_client()
     log.info("Listing schemas in catalog", catalog_name=catalog_name)
-    schemas = db.schemas.list(catalog_name=catalog_name)
-    result = [
+    limit = settings.resource_list_max_results
+    schemas = db.schemas.list(catalog_name=catalog_name, max_results=limit + 1)
+    result = take_limited((
         {
-            "name": sch.name,
-            "catalog_name": sch.catalog_name,
-            "comment": sch.comment,
-            "owner": sch.owner,
+            "name": name,
+            "catalog_name": schema_catalog,
+            "comment": comment,
+            "owner": owner,
         }
-        for sch in schemas if sch.name
-    ]
-    log.info("Successfully listed schemas", catalog_name=catalog_name, count=len(result))
+        for name, schema_catalog, comment, owner in map(_SCHEMA_FIELDS, schemas) if name
+    ), limit)
+    log.info("Successfully listed schemas", catalog_name=catalog_name, count=len(result["items"]), truncated=result["truncated"])
     return result
 
 @map_databricks_errors
@@ -70,10 +101,11 @@ def list_schemas(catalog_name: str) -> list[dict]:
     "databricks:uc:list_tables/{catalog_name}/{schema_name}",
     description="Lists tables and views within a specified schema in a Unity Catalog.",
 )
-def list_tables(catalog_name: str, schema_name: str) -> list[dict]:
+def list_tables(catalog_name: str, schema_name: str) -> dict:
     """
     Lists tables/views within a specified schema.
     REQ-DATA-RES-03
+    Returns {"items": [...], "truncated": bool}; at most RESOURCE_LIST_MAX_RESULTS tables are listed.
 
     Args:
         catalog_name: The name of the catalog.
@@ -81,19 +113,33 @@ def list_tables(catalog_name: str, schema_name: str) -> list[dict]:
     """
     db = get_db_client()
     log.info("Listing tables in schema", catalog_name=catalog_name, schema_name=schema_name)
-    tables = db.tables.list(catalog_name=catalog_name, schema_name=schema_name)
-    result = [
+    limit = settings.resource_list_max_results
+    # Columns and properties aren't part of the summary, so don't have the API send them
+    tables = db.tables.list(
+        catalog_name=catalog_name,
+        schema_name=schema_name,
+        max_results=limit + 1,
+        omit_columns=True,
+        omit_properties=True,
+    )
+    result = take_limited((
         {
-            "name": tbl.name,
-            "catalog_name": tbl.catalog_name,
-            "schema_name": tbl.schema_name,
-            "type": str(tbl.table_type.value) if tbl.table_type else "UNKNOWN", # e.g., MANAGED, EXTERNAL, VIEW
-            "comment": tbl.comment,
-            "owner": tbl.owner,
+            "name": name,
+            "catalog_name": table_catalog,
+            "schema_name": table_schema,
+            "type": str(table_type.value) if table_type else "UNKNOWN", # e.g., MANAGED, EXTERNAL, VIEW
+            "comment": comment,
+            "owner": owner,
         }
-        for tbl in tables if tbl.name
-    ]
-    log.info("Successfully listed tables", catalog_name=catalog_name, schema_name=schema_name, count=len(result))
+        for name, table_catalog, table_schema, table_type, comment, owner in map(_TABLE_FIELDS, tables) if name
+    ), limit)
+    log.info(
+        "Successfully listed tables",
+        catalog_name=catalog_name,
+        schema_name=schema_name,
+        count=len(result["items"]),
+        truncated=result["truncated"],
+    )
     return result
 
 @map_databricks_errors
@@ -153,6 +199,8 @@ def preview_table(catalog_name: str, schema_name: str, table_name: str, row_limi
     It might be better implemented as a Tool if warehouse selection is needed,
     but is kept as a Resource here for simplicity, assuming a default/available warehouse.
     Consider adding warehouse_id parameter if needed.
+    The running warehouse found is reused for WAREHOUSE_CACHE_TTL_SECONDS while it is still
+    running, skipping the list call.
 
     Args:
         catalog_name: The name of the catalog.
@@ -165,6 +213,74 @@ def preview_table(catalog_name: str, schema_name: str, table_name: str, row_limi
     sql_query = f"SELECT * FROM {full_name} LIMIT {row_limit}"
     log.info("Previewing table", table_full_name=full_name, limit=row_limit, query=sql_query)
 
+    # Reuse the recently found warehouse; if it stopped or did not run the preview, look up a running one again
+    warehouse_id = _cached_warehouse_id(db)
+    statement = None
+    if warehouse_id is not None:
+        try:
+            statement = _execute_preview(db, sql_query, warehouse_id)
+        except DatabricksError as e:
+            log.info("Cached warehouse rejected preview, refreshing", warehouse_id=warehouse_id, error=str(e))
+        else:
+            if statement.status.state in _NOT_READY_STATEMENT_STATES:
+                log.info("Cached warehouse did not run preview, refreshing", warehouse_id=warehouse_id, state=statement.status.state)
+                _cancel_preview(db, statement)
+                statement = None
+        if statement is None:
+            _invalidate_warehouse_cache()
+    if statement is None:
+        warehouse_id = _find_running_warehouse(db)
+        statement = _execute_preview(db, sql_query, warehouse_id)
+
+    if statement.status.state != sql_service.StatementState.SUCCEEDED:
+         err_msg = statement.status.error.message if statement.status.error else 'Unknown error'
+         log.error("Preview query failed", table_full_name=full_name, state=statement.status.state, error_msg=err_msg)
+         # Raise a standard Exception, decorator will map if possible, otherwise MCP handles generic Exception
+         raise Exception(f"[MCP Error Code {CODE_SERVER_ERROR}] Failed to preview table. State: {statement.status.state}. Error: {err_msg}")
+
+    result_data = []
+    if statement.result and statement.result.data_array:
+        # The manifest is a field of StatementResponse, not of its ResultData
+        columns = tuple(col.name for col in statement.manifest.schema.columns) if statement.manifest and statement.manifest.schema else ()
+        if columns:
+            result_data = shape_rows(columns, statement.result.data_array)
+        else:
+             result_data = statement.result.data_array
+             log.warning("Could not get column names for preview, returning data as arrays.", table_full_name=full_name)
+
+    log.info("Successfully previewed table", table_full_name=full_name, rows_retrieved=len(result_data))
+    return result_data
+
+
+def _cached_warehouse_id(db) -> str | None:
+    """
+    Returns the warehouse preview_table last found running, if found within
+    WAREHOUSE_CACHE_TTL_SECONDS and still running. A stopped warehouse is
+    dropped: a statement sent to it would start it and wait for it instead.
+    """
+    cached = _warehouse_cache
+    if cached is None or time.monotonic() - cached[1] >= WAREHOUSE_CACHE_TTL_SECONDS:
+        return None
+    warehouse_id = cached[0]
+    try:
+        state = db.warehouses.get(id=warehouse_id).state
+    except DatabricksError as e:
+        log.info("Cached warehouse lookup failed, refreshing", warehouse_id=warehouse_id, error=str(e))
+        state = None
+    if state != sql_service.State.RUNNING:
+        _invalidate_warehouse_cache()
+        return None
+    return warehouse_id
+
+
+def _invalidate_warehouse_cache() -> None:
+    global _warehouse_cache
+    _warehouse_cache = None
+
+
+def _find_running_warehouse(db) -> str:
+    """Lists warehouses, caches and returns the first running one."""
+    global _warehouse_cache
     # Find an available warehouse (simple approach: find first running one)
     warehouse_id = None
     try:
@@ -179,30 +295,27 @@ def preview_table(catalog_name: str, schema_name: str, table_name: str, row_limi
     except Exception as e:
          log.error("Failed to find suitable SQL warehouse", error=e)
          raise RuntimeError("Could not find a running SQL Warehouse for preview.") from e
+    _warehouse_cache = (warehouse_id, time.monotonic())
+    return warehouse_id
 
-    statement = db.statement_execution.execute_statement(
-        statement=sql_query,
-        warehouse_id=warehouse_id,
-        wait_timeout='50s' # Short timeout for preview
-    ).result() # Block until finished or timeout
 
-    if statement.status.state != sql_service.StatementState.SUCCEEDED:
-         err_msg = statement.status.error.message if statement.status.error else 'Unknown error'
-         log.error("Preview query failed", table_full_name=full_name, state=statement.status.state, error_msg=err_msg)
-         # Raise a standard Exception, decorator will map if possible, otherwise MCP handles generic Exception
-         raise Exception(f"[MCP Error Code {CODE_SERVER_ERROR}] Failed to preview table. State: {statement.status.state}. Error: {err_msg}")
+def _cancel_preview(db, statement: sql_service.StatementResponse) -> None:
+    """Best-effort cancel of a preview still queued or running on a warehouse that is being abandoned."""
+    if statement.status.state not in (sql_service.StatementState.PENDING, sql_service.StatementState.RUNNING):
+        return
+    try:
+        db.statement_execution.cancel_execution(statement_id=statement.statement_id)
+    except DatabricksError as e:
+        log.warning("Failed to cancel preview statement", statement_id=statement.statement_id, error=str(e))
 
-    result_data = []
-    if statement.result and statement.result.data_array:
-        columns = [col.name for col in statement.result.manifest.schema.columns] if statement.result.manifest and statement.result.manifest.schema else []
-        if columns:
-            result_data = [dict(zip(columns, row)) for row in statement.result.data_array]
-        else:
-             result_data = statement.result.data_array
-             log.warning("Could not get column names for preview, returning data as arrays.", table_full_name=full_name)
 
-    log.info("Successfully previewed table", table_full_name=full_name, rows_retrieved=len(result_data))
-    return result_data
+def _execute_preview(db, sql_query: str, warehouse_id: str) -> sql_service.StatementResponse:
+    # execute_statement returns the StatementResponse itself, after waiting up to wait_timeout
+    return db.statement_execution.execute_statement(
+        statement=sql_query,
+        warehouse_id=warehouse_id,
+        wait_timeout='50s' # Short timeout for preview
+    )
 
 
 # --- SQL Warehouse Resources ---
@@ -212,25 +325,27 @@ def preview_table(catalog_name: str, schema_name: str, table_name: str, row_limi
     "databricks:sql:list_warehouses",
     description="Lists available Databricks SQL Warehouses.",
 )
-def list_sql_warehouses() -> list[dict]:
+def list_sql_warehouses() -> dict:
     """
     Lists available SQL Warehouses.
     REQ-DATA-RES-06
+    Returns {"items": [...], "truncated": bool}; at most RESOURCE_LIST_MAX_RESULTS warehouses are listed.
     """
     db = get_db_client()
     log.info("Listing SQL Warehouses")
     warehouses = db.warehouses.list()
-    result = [
+    result = take_limited((
         {
-            "id": wh.id,
-            "name": wh.name,
-            "state": str(wh.state.value) if wh.state else "UNKNOWN", # e.g., RUNNING, STOPPED
-            "cluster_size": wh.cluster_size,
-            "num_clusters": wh.num_clusters,
-            "creator_name": wh.creator_name,
+            "id": warehouse_id,
+            "name": name,
+            "state": str(state.value) if state else "UNKNOWN", # e.g., RUNNING, STOPPED
+            "cluster_size": cluster_size,
+            "num_clusters": num_clusters,
+            "creator_name": creator_name,
             # Add other fields like channel, jdbc_url etc. if needed
         }
-        for wh in warehouses if wh.id
-    ]
-    log.info("Successfully listed SQL Warehouses", count=len(result))
+        for warehouse_id, name, state, cluster_size, num_clusters, creator_name in map(_WAREHOUSE_FIELDS, warehouses)
+        if warehouse_id
+    ), settings.resource_list_max_results)
+    log.info("Successfully listed SQL Warehouses", count=len(result["items"]), truncated=result["truncated"])
     return result
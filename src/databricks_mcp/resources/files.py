@@ -1,24 +1,42 @@
+import operator
+
 import structlog
 # Import the mcp instance from app.py
 from ..app import mcp
 # Remove incorrect dbfs import
 # from databricks.sdk.service import dbfs as dbfs_service
 
+from ..config import settings
 from ..db_client import get_db_client
 from ..error_mapping import map_databricks_errors
+from ..sdk_utils import take_limited
 
 log = structlog.get_logger(__name__)
 
+# Fields read from each listed item, fetched in one C-level call per item:
+# DBFS FileInfo and Files API DirectoryEntry name the same data differently
+_FILE_INFO_FIELDS = operator.attrgetter("path", "is_dir", "file_size")
+_DIRECTORY_ENTRY_FIELDS = operator.attrgetter("path", "is_directory", "file_size")
+
+
+def _summarize_files(listed_items, fields=_FILE_INFO_FIELDS) -> dict:
+    """Projects listed files to path/is_dir/size dictionaries, up to RESOURCE_LIST_MAX_RESULTS."""
+    return take_limited((
+        {"path": item_path, "is_dir": is_dir, "size": size}
+        for item_path, is_dir, size in map(fields, listed_items) if item_path is not None
+    ), settings.resource_list_max_results)
+
 @map_databricks_errors
 @mcp.resource(
     "databricks:files:list/{path}",
     description="Lists files and directories in a specified DBFS or Unity Catalog Volume path.",
 )
-def list_files(path: str) -> list[dict]:
+def list_files(path: str) -> dict:
     """
     Lists files and directories in DBFS or a Unity Catalog Volume path.
     REQ-FILE-RES-01
-    Attempts to use the correct API (DBFS or Files) based on the path prefix.
+    Volume paths are listed with the Files API, other paths with the DBFS API.
+    Returns {"items": [...], "truncated": bool}.
 
     Args:
         path: The absolute path to list (e.g., '/mnt/mydata', '/Volumes/main/default/myvol/').
@@ -26,32 +44,14 @@ def list_files(path: str) -> list[dict]:
     db = get_db_client()
     log.info("Listing files/directories", path=path)
 
-    items = []
-    # Access dbfs API via the client instance db.dbfs
     if path.startswith("/Volumes/"):
-        log.warning("Attempting to list Volume path using DBFS API; specific Files API might be needed.", path=path)
-        listed_items = db.dbfs.list(path=path)
-        items = [
-            {
-                "path": f.path,
-                "is_dir": f.is_dir,
-                "size": f.file_size,
-            }
-            for f in listed_items if f.path is not None
-        ]
+        # The Files API pages server-side; the DBFS compatibility layer does not for volumes
+        items = _summarize_files(db.files.list_directory_contents(directory_path=path), _DIRECTORY_ENTRY_FIELDS)
     else:
         # Assume DBFS for /dbfs, /mnt, or others
         if not (path.startswith("/dbfs/") or path.startswith("/mnt/")):
              log.warning("Path does not start with known prefix. Assuming DBFS path.", path=path)
-        listed_items = db.dbfs.list(path=path)
-        items = [
-            {
-                "path": f.path,
-                "is_dir": f.is_dir,
-                "size": f.file_size,
-            }
-            for f in listed_items if f.path is not None
-        ]
-
-    log.info("Successfully listed files/directories", path=path, count=len(items))
+        items = _summarize_files(db.dbfs.list(path=path))
+
+    log.info("Successfully listed files/directories", path=path, count=len(items["items"]), truncated=items["truncated"])
     return items
@@ -0,0 +1,47 @@
+import itertools
+
+
+def enum_value(obj, *path: str, default: str = "UNKNOWN") -> str:
+    """
+    Returns the string value of an SDK enum reached by following attribute path from obj.
+
+    Any missing or None attribute along the way yields default, e.g.
+    enum_value(run, 'state', 'life_cycle_state') -> "TERMINATED" or "UNKNOWN".
+    """
+    for name in path:
+        obj = getattr(obj, name, None)
+        if obj is None:
+            return default
+    return str(obj.value)
+
+
+def summarize_run(run_id: int, run_details) -> dict:
+    """Builds the run status dictionary returned by the jobs and notebook run tools."""
+    return {
+        "run_id": run_id,
+        "status": enum_value(run_details, 'state', 'life_cycle_state'), # e.g., TERMINATED, SKIPPED, INTERNAL_ERROR
+        "result_state": enum_value(run_details, 'state', 'result_state'), # e.g., SUCCESS, FAILED, TIMEDOUT, CANCELED
+        "run_page_url": run_details.run_page_url,
+    }
+
+
+def take_limited(items, limit: int) -> dict:
+    """
+    Consumes at most limit items (plus one, to detect more) from a lazily paginated SDK iterator.
+
+    Returns {"items": [...], "truncated": bool}; later pages are never fetched.
+    """
+    taken = list(itertools.islice(items, limit + 1))
+    return {"items": taken[:limit], "truncated": len(taken) > limit}
+
+
+def shape_rows(column_names: tuple[str, ...], rows: list[list], result_format: str = "records"):
+    """
+    Keys raw statement row arrays by column name, or wraps them as columns + rows for "columnar".
+
+    Shared by the SQL statement tools and the table preview resource.
+    """
+    if result_format == "columnar":
+        return {"columns": list(column_names), "rows": rows}
+    # zip() truncates a row shorter than the schema instead of failing
+    return [dict(zip(column_names, row)) for row in rows]
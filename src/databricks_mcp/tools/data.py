@@ -1,15 +1,44 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 import structlog
-import time
-import json
 # Import the mcp instance from app.py
 from ..app import mcp
-from databricks.sdk.service import sql as sql_service
+from databricks.sdk.service.sql import Disposition
+from databricks.sdk.service.sql import Format
+from databricks.sdk.service.sql import StatementState
 
 from ..db_client import get_db_client
 from ..error_mapping import map_databricks_errors
+from ..logging_config import is_debug_enabled
+from ..sdk_utils import enum_value
+from ..sdk_utils import shape_rows
 
 log = structlog.get_logger(__name__)
 
+# SDK enum members/values resolved once instead of on every call
+_DISPOSITION_INLINE = Disposition.INLINE
+_FORMAT_JSON_ARRAY = Format.JSON_ARRAY
+_STATES_IN_PROGRESS = frozenset({StatementState.PENDING, StatementState.RUNNING})
+_STATE_SUCCEEDED = StatementState.SUCCEEDED.value
+_STATE_FAILED = StatementState.FAILED.value
+
+# Upper bound on concurrent get_statement_result_chunk_n requests per statement
+MAX_CHUNK_FETCH_WORKERS = 8
+
+# Backoff bounds used when get_statement_result waits for a running statement
+POLL_INITIAL_DELAY_SECONDS = 0.5
+POLL_MAX_DELAY_SECONDS = 5.0
+# Longest wait_timeout_seconds honoured; larger values are clamped (matches the SQL API's own 50s wait cap)
+MAX_WAIT_TIMEOUT_SECONDS = 50
+# Row shapes accepted by get_statement_result's result_format argument
+RESULT_FORMATS = ("records", "columnar")
+
+# In-flight get_statement_result fetch tasks keyed by every payload-affecting argument (single-flight),
+# and how many tool calls are waiting on each
+_inflight_results: dict[tuple[str, int, bool, bool, str], asyncio.Future] = {}
+_inflight_waiters: dict[tuple[str, int, bool, bool, str], int] = {}
+
 @map_databricks_errors
 @mcp.tool(
     name="databricks-sql-execute_statement",
@@ -47,12 +76,12 @@ def execute_sql(sql_query: str, warehouse_id: str, catalog: str | None = None, s
         catalog=catalog,
         schema=schema,
         wait_timeout="0s", # Ensures the call returns immediately
-        disposition=sql_service.Disposition.INLINE, # Try INLINE for direct results
-        format=sql_service.Format.JSON_ARRAY, # JSON_ARRAY is most compatible
+        disposition=_DISPOSITION_INLINE, # Try INLINE for direct results
+        format=_FORMAT_JSON_ARRAY, # JSON_ARRAY is most compatible
     )
 
     statement_id = resp.statement_id
-    status = str(resp.status.state.value) if resp.status and resp.status.state else "UNKNOWN"
+    status = enum_value(resp, 'status', 'state')
 
     log.info("SQL query submitted", statement_id=statement_id, initial_status=status)
     return {"statement_id": statement_id, "status": status}
@@ -66,47 +95,170 @@ def execute_sql(sql_query: str, warehouse_id: str, catalog: str | None = None, s
         "Use this to check on queries submitted via 'execute_statement'."
     ),
 )
-def get_statement_result(statement_id: str) -> dict:
+async def get_statement_result(
+    statement_id: str,
+    wait_timeout_seconds: int = 0,
+    fetch_chunk_if_missing: bool = False,
+    fetch_all_chunks: bool = False,
+    result_format: str = "records",
+) -> dict:
     """
     Retrieves results for a previously executed SQL statement.
     REQ-DATA-TOOL-02
+    Concurrent calls with identical arguments share a single fetch; a caller that is
+    cancelled leaves it running for the others.
 
     Args:
         statement_id: The ID of the SQL statement previously submitted.
+        wait_timeout_seconds: Keep polling (with backoff) for up to this many seconds while
+            the statement is PENDING/RUNNING (default 0, return the current state immediately;
+            clamped to MAX_WAIT_TIMEOUT_SECONDS).
+        fetch_chunk_if_missing: Fetch result chunk 0 if the statement response carries no
+            inline data (default False).
+        fetch_all_chunks: For multi-chunk inline results, also fetch the remaining chunks
+            (concurrently) and append their rows (default False, first chunk only).
+        result_format: "records" (default) returns one dict per row; "columnar" returns
+            {"columns": [...], "rows": [[...], ...]} without building per-row dicts.
     """
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"Unsupported result_format '{result_format}'. Expected one of: {', '.join(RESULT_FORMATS)}.")
+    wait_timeout_seconds = max(0, min(wait_timeout_seconds, MAX_WAIT_TIMEOUT_SECONDS))
+
+    # Calls only share a fetch when they'd produce the same payload
+    inflight_key = (statement_id, wait_timeout_seconds, fetch_chunk_if_missing, fetch_all_chunks, result_format)
+    fetch = _inflight_results.get(inflight_key)
+    if fetch is None:
+        # The fetch runs as its own task, so it belongs to no single caller
+        fetch = asyncio.create_task(_fetch_statement_result(
+            statement_id, wait_timeout_seconds, fetch_chunk_if_missing, fetch_all_chunks, result_format
+        ))
+        _inflight_results[inflight_key] = fetch
+    else:
+        log.info("Joining in-flight statement result fetch", statement_id=statement_id)
+    _inflight_waiters[inflight_key] = _inflight_waiters.get(inflight_key, 0) + 1
+    try:
+        # shield() keeps one caller's cancellation (e.g. a client disconnecting) from cancelling the shared fetch
+        return await asyncio.shield(fetch)
+    finally:
+        # The fetch is cancelled once its last waiter leaves
+        _inflight_waiters[inflight_key] -= 1
+        if _inflight_waiters[inflight_key] == 0:
+            del _inflight_waiters[inflight_key]
+            del _inflight_results[inflight_key]
+            if not fetch.done():
+                fetch.cancel()
+
+
+def _fetch_remaining_chunks(db, statement_id: str, total_chunk_count: int) -> list[list]:
+    """Fetches result chunks 1..total_chunk_count-1 concurrently and returns their rows in order."""
+    chunk_indexes = range(1, total_chunk_count)
+    rows = []
+    with ThreadPoolExecutor(max_workers=min(MAX_CHUNK_FETCH_WORKERS, len(chunk_indexes))) as pool:
+        # map() yields in submission order, so rows stay in chunk order
+        for chunk in pool.map(
+            lambda i: db.statement_execution.get_statement_result_chunk_n(
+                statement_id=statement_id, chunk_index=i
+            ),
+            chunk_indexes,
+        ):
+            rows.extend(chunk.data_array or [])
+    return rows
+
+
+async def _fetch_statement_result(
+    statement_id: str,
+    wait_timeout_seconds: int,
+    fetch_chunk_if_missing: bool,
+    fetch_all_chunks: bool,
+    result_format: str = "records",
+) -> dict:
+    """Fetches and shapes the status/result of a SQL statement (see get_statement_result)."""
     db = get_db_client()
-    log.info("Getting SQL statement status/result", statement_id=statement_id)
+    log.info("Getting SQL statement status/result", statement_id=statement_id, wait_timeout_seconds=wait_timeout_seconds)
+
+    statement = await asyncio.to_thread(db.statement_execution.get_statement, statement_id=statement_id)
+
+    # Poll with exponential backoff while the statement is still in progress, yielding the event loop between polls
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait_timeout_seconds
+    delay = POLL_INITIAL_DELAY_SECONDS
+    while _statement_state(statement) in _STATES_IN_PROGRESS:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, POLL_MAX_DELAY_SECONDS)
+        statement = await asyncio.to_thread(db.statement_execution.get_statement, statement_id=statement_id)
+
+    # Result shaping and chunk fetches are blocking, so they run off the event loop too
+    return await asyncio.to_thread(
+        _shape_statement_result, db, statement_id, statement, fetch_chunk_if_missing, fetch_all_chunks, result_format
+    )
+
+
+def _statement_state(statement):
+    return statement.status.state if statement.status else None
 
-    statement = db.statement_execution.get_statement(statement_id=statement_id)
-    status = str(statement.status.state.value) if statement.status and statement.status.state else "UNKNOWN"
+
+def _shape_statement_result(
+    db,
+    statement_id: str,
+    statement,
+    fetch_chunk_if_missing: bool,
+    fetch_all_chunks: bool,
+    result_format: str,
+) -> dict:
+    """Builds the get_statement_result payload from a get_statement response."""
+    verbose = is_debug_enabled(__name__) # Gate diagnostic-only logging below
+    state = _statement_state(statement)
+    status = state.value if state is not None else "UNKNOWN"
+
+    if state in _STATES_IN_PROGRESS:
+        # Nothing to extract yet; skip the result/manifest handling and chunk fallback
+        log.info("Statement still in progress", statement_id=statement_id, status=status)
+        return {
+            "statement_id": statement_id,
+            "status": status,
+            "schema": None,
+            "result_data": None,
+            "error_message": None,
+        }
 
     result_data = None
     result_schema = None
     error_message = None
 
-    if status == sql_service.StatementState.SUCCEEDED.value:
+    if status == _STATE_SUCCEEDED:
         log.debug("Statement succeeded, handling results appropriately", statement_id=statement_id)
         
+        # Bind the nested response attributes once instead of re-walking them per check
+        result = getattr(statement, 'result', None)
+        manifest = getattr(statement, 'manifest', None)
+        external_links = getattr(result, 'external_links', None) if result else None
+        data_array = getattr(result, 'data_array', None) if result else None
+        schema_obj = getattr(manifest, 'schema', None) if manifest else None
+        columns = getattr(schema_obj, 'columns', None) if schema_obj else None
         # Let's first check what we've received
-        log.info(
-            "Statement response object structure",
-            statement_id=statement_id, 
-            has_result=hasattr(statement, 'result'),
-            has_manifest=hasattr(statement, 'manifest')
-        )
-        
+        if verbose:
+            log.debug(
+                "Statement response object structure",
+                statement_id=statement_id,
+                has_result=result is not None,
+                has_manifest=manifest is not None
+            )
+
         try:
             # First check for inline results
-            if hasattr(statement, 'result') and statement.result is not None:
-                log.info("Statement has result property", statement_id=statement_id)
+            if result is not None:
+                if verbose:
+                    log.debug("Statement has result property", statement_id=statement_id)
 
                 # Check for external links (EXTERNAL_LINKS disposition)
-                # Be more specific checking the attribute exists and is non-empty list
-                external_links = getattr(statement.result, 'external_links', None)
-                if external_links is not None and isinstance(external_links, list) and external_links:
-                    log.info("External links found - data is stored externally",
-                             statement_id=statement_id,
-                             link_count=len(external_links))
+                if external_links:
+                    if verbose:
+                        log.debug("External links found - data is stored externally",
+                                  statement_id=statement_id,
+                                  link_count=len(external_links))
                     result_data = [
                         {
                             "chunk_index": link.chunk_index,
@@ -117,22 +269,26 @@ def get_statement_result(statement_id: str) -> dict:
                     ]
 
                 # Check for inline data array (INLINE disposition)
-                # Check attribute exists and is non-empty list
-                data_array = getattr(statement.result, 'data_array', None)
-                if data_array is not None and isinstance(data_array, list) and data_array:
-                    log.info("Inline data_array found",
-                             statement_id=statement_id,
-                             row_count=len(data_array))
+                if data_array:
+                    if verbose:
+                        log.debug("Inline data_array found",
+                                  statement_id=statement_id,
+                                  row_count=len(data_array))
                     result_data = data_array
+
+                    total_chunk_count = getattr(manifest, 'total_chunk_count', None) or 1
+                    if fetch_all_chunks and total_chunk_count > 1:
+                        log.info("Fetching remaining result chunks",
+                                 statement_id=statement_id,
+                                 chunk_count=total_chunk_count)
+                        result_data = data_array + _fetch_remaining_chunks(db, statement_id, total_chunk_count)
             
             # Get schema information from manifest
-            manifest = getattr(statement, 'manifest', None)
             if manifest:
-                log.info("Statement has manifest with schema", statement_id=statement_id)
+                if verbose:
+                    log.debug("Statement has manifest with schema", statement_id=statement_id)
                 
-                schema = getattr(manifest, 'schema', None)
-                if schema and hasattr(schema, 'columns'):
-                    columns = schema.columns
+                if columns:
                     result_schema = [
                         {
                             "name": col.name,
@@ -143,32 +299,32 @@ def get_statement_result(statement_id: str) -> dict:
                     ]
                     
                     # If we have schema and raw data_array, create dict result
-                    if result_data and isinstance(result_data, list) and isinstance(result_data[0], list):
-                        column_names = []
-                        if columns:
+                    if data_array:
+                        if verbose:
                             log.debug("Iterating over schema columns", columns_repr=repr(columns))
-                            for i, col in enumerate(columns):
-                                log.debug(f"Processing column index {i}", col_repr=repr(col), has_name=hasattr(col, 'name'))
-                                # Directly access .name assuming it's set
-                                col_name = col.name if hasattr(col, 'name') else None
-                                # col_name = getattr(col, 'name', None) # OLD
-                                log.debug(f"Extracted col_name for index {i}", name=col_name)
-                                if col_name and isinstance(col_name, str): # Ensure it's a string
-                                    column_names.append(col_name)
-                                else:
-                                    log.warning("Column in schema missing name attribute or not a string", column_index=i, column_object=repr(col))
-                        else:
-                            log.warning("Schema columns attribute was empty or None")
+                        names = []
+                        for i, col in enumerate(columns):
+                            col_name = getattr(col, 'name', None)
+                            if verbose:
+                                log.debug("Extracted column name", column_index=i, col_repr=repr(col), name=col_name)
+                            if col_name and isinstance(col_name, str): # Ensure it's a string
+                                names.append(col_name)
+                            else:
+                                log.warning("Column in schema missing name attribute or not a string", column_index=i, column_object=repr(col))
+                        # Built once and shared by every row
+                        column_names = tuple(names)
 
-                        log.debug("Final extracted column names", names=column_names)
+                        if verbose:
+                            log.debug("Final extracted column names", names=column_names)
                         # Only transform if we successfully got column names
                         if column_names and len(column_names) == len(result_data[0]):
                             try:
-                                result_data = [dict(zip(column_names, row)) for row in result_data]
-                                log.info("Transformed raw data into dictionary format with schema",
+                                row_count = len(result_data)
+                                result_data = shape_rows(column_names, result_data, result_format)
+                                log.info("Applied schema column names to result rows",
                                          statement_id=statement_id,
-                                         row_count=len(result_data),
-                                         first_row_example=result_data[0] if result_data else None)
+                                         row_count=row_count,
+                                         result_format=result_format)
                             except Exception as transform_error:
                                 log.error("Error during data transformation", error=transform_error, exc_info=True)
                                 # Keep raw data if transformation fails
@@ -178,24 +334,25 @@ def get_statement_result(statement_id: str) -> dict:
                                         first_row_len=len(result_data[0]) if result_data else 0)
                             # Keep raw list data if transformation impossible
             
-            # If still no result_data after checking inline/external, try fetching chunk
-            if result_data is None:
+            # If still no result_data after checking inline/external, optionally try fetching chunk
+            if result_data is None and fetch_chunk_if_missing:
                 log.debug("No result data in statement response, trying to fetch chunk", statement_id=statement_id)
                 try:
                     chunk = db.statement_execution.get_statement_result_chunk_n(
                         statement_id=statement_id, chunk_index=0
                     )
                     
-                    if hasattr(chunk, 'data_array') and chunk.data_array:
+                    chunk_rows = getattr(chunk, 'data_array', None)
+                    if chunk_rows:
                         log.info("Retrieved data from chunk", 
                                  statement_id=statement_id,
-                                 row_count=len(chunk.data_array))
-                        result_data = chunk.data_array
-                        
+                                 row_count=len(chunk_rows))
+                        result_data = chunk_rows
+
                         # If we have schema already, apply it to the chunk data
-                        if result_schema and isinstance(result_data[0], list):
-                            column_names = [col["name"] for col in result_schema]
-                            result_data = [dict(zip(column_names, row)) for row in result_data]
+                        if result_schema:
+                            column_names = tuple(col["name"] for col in result_schema)
+                            result_data = shape_rows(column_names, result_data, result_format)
                 except Exception as e:
                     log.warning(
                         "Failed to fetch chunk data - this is normal for EXTERNAL_LINKS disposition",
@@ -213,7 +370,7 @@ def get_statement_result(statement_id: str) -> dict:
             # Provide a helpful error message in the result
             result_data = [{"error": f"Error processing results: {str(e)}"}]
 
-    elif status == sql_service.StatementState.FAILED.value:
+    elif status == _STATE_FAILED:
          error_message = statement.status.error.message if statement.status and statement.status.error else "Unknown error"
          log.warning("Statement failed", statement_id=statement_id, error=error_message)
 
@@ -222,7 +379,7 @@ def get_statement_result(statement_id: str) -> dict:
         "statement_id": statement_id,
         "status": status,
         "schema": result_schema, # List of column dicts or None
-        "result_data": result_data, # List of dicts, raw list, or None
+        "result_data": result_data, # List of dicts, {"columns", "rows"} if columnar, raw list, or None
         "error_message": error_message # Error message if failed, else None
     }
 
@@ -230,20 +387,31 @@ def get_statement_result(statement_id: str) -> dict:
 @map_databricks_errors
 @mcp.tool(
     name="databricks-sql-start_warehouse",
-    description="Starts a stopped Databricks SQL Warehouse.",
+    description=(
+        "Starts a stopped Databricks SQL Warehouse. By default waits for the warehouse to start; "
+        "set wait=false to return immediately while the warehouse is starting."
+    ),
 )
-def start_sql_warehouse(warehouse_id: str) -> dict:
+async def start_sql_warehouse(warehouse_id: str, wait: bool = True) -> dict:
     """
     Starts a stopped SQL Warehouse.
     REQ-DATA-TOOL-03
-    This is synchronous and waits for the warehouse to start.
+    When waiting, the SDK waiter runs in a worker thread so the event loop
+    stays free to serve other tool calls while the warehouse starts.
 
     Args:
         warehouse_id: The unique identifier of the SQL Warehouse to start.
+        wait: Wait for the warehouse to reach RUNNING (default True).
     """
     db = get_db_client()
-    log.info("Starting SQL Warehouse", warehouse_id=warehouse_id)
-    db.warehouses.start(id=warehouse_id).result() # Use .result() to wait
+    log.info("Starting SQL Warehouse", warehouse_id=warehouse_id, wait=wait)
+    waiter = db.warehouses.start(id=warehouse_id)
+    if not wait:
+        status = "STARTING"
+        log.info("Requested SQL Warehouse start", warehouse_id=warehouse_id, status=status)
+        return {"warehouse_id": warehouse_id, "status": status}
+
+    await asyncio.to_thread(waiter.result) # Wait off the event loop
     status = "STARTED" # Assume success if no exception
     log.info("Successfully started SQL Warehouse", warehouse_id=warehouse_id, status=status)
     return {"warehouse_id": warehouse_id, "status": status}
@@ -252,20 +420,31 @@ def start_sql_warehouse(warehouse_id: str) -> dict:
 @map_databricks_errors
 @mcp.tool(
     name="databricks-sql-stop_warehouse",
-    description="Stops a running Databricks SQL Warehouse.",
+    description=(
+        "Stops a running Databricks SQL Warehouse. By default waits for the warehouse to stop; "
+        "set wait=false to return immediately while the warehouse is stopping."
+    ),
 )
-def stop_sql_warehouse(warehouse_id: str) -> dict:
+async def stop_sql_warehouse(warehouse_id: str, wait: bool = True) -> dict:
     """
     Stops a running SQL Warehouse.
     REQ-DATA-TOOL-04
-    This is synchronous and waits for the warehouse to stop.
+    When waiting, the SDK waiter runs in a worker thread so the event loop
+    stays free to serve other tool calls while the warehouse stops.
 
     Args:
         warehouse_id: The unique identifier of the SQL Warehouse to stop.
+        wait: Wait for the warehouse to reach STOPPED (default True).
     """
     db = get_db_client()
-    log.info("Stopping SQL Warehouse", warehouse_id=warehouse_id)
-    db.warehouses.stop(id=warehouse_id).result() # Use .result() to wait
+    log.info("Stopping SQL Warehouse", warehouse_id=warehouse_id, wait=wait)
+    waiter = db.warehouses.stop(id=warehouse_id)
+    if not wait:
+        status = "STOPPING"
+        log.info("Requested SQL Warehouse stop", warehouse_id=warehouse_id, status=status)
+        return {"warehouse_id": warehouse_id, "status": status}
+
+    await asyncio.to_thread(waiter.result) # Wait off the event loop
     status = "STOPPED" # Assume success if no exception
     log.info("Successfully stopped SQL Warehouse", warehouse_id=warehouse_id, status=status)
     return {"warehouse_id": warehouse_id, "status": status}
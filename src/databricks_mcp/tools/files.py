@@ -1,20 +1,88 @@
+import asyncio
 import base64
+import binascii
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
 import structlog
 # Import the mcp instance from app.py
 from ..app import mcp
-# Remove incorrect dbfs import
-# from databricks.sdk.service import dbfs as dbfs_service
 
 from ..db_client import get_db_client
 from ..error_mapping import map_databricks_errors
+from ..logging_config import is_debug_enabled
 
 log = structlog.get_logger(__name__)
 
+# DBFS read API limit per call, and bounds for multi-range read_file calls
+DBFS_MAX_READ_BYTES = 1024 * 1024
+MAX_READ_CHUNKS = 64
+READ_FILE_WORKERS = 8
+
+# Limits for batch_file_ops
+MAX_BATCH_FILE_OPS = 256
+BATCH_FILE_OPS_WORKERS = 16
+
+# Largest base64 slice that decodes to <= 1 MB (the DBFS add_block limit).
+# A multiple of 4 chars, so every slice decodes independently.
+WRITE_BLOCK_BASE64_CHARS = (1024 * 1024 // 3) * 4
+
 # Note: These tools currently primarily use the DBFS API.
 # Support for UC Volumes via the Files API might require specific SDK methods
 # (e.g., db.files.read, db.files.upload) if available and different from DBFS.
 # We assume db.dbfs works for basic cases or add warnings.
 
+def _read_ranges(db, path: str, offset: int, length: int) -> tuple[str, int]:
+    """
+    Reads [offset, offset + length) as concurrent 1MB DBFS reads.
+    Returns the base64 encoded content and the number of bytes read.
+    """
+    length = min(length, MAX_READ_CHUNKS * DBFS_MAX_READ_BYTES)
+    # Clamp to the file size so no range starts past EOF
+    file_size = db.dbfs.get_status(path=path).file_size or 0
+    length = max(0, min(length, file_size - offset))
+    ranges = [
+        (offset + start, min(DBFS_MAX_READ_BYTES, length - start))
+        for start in range(0, length, DBFS_MAX_READ_BYTES)
+    ]
+    if not ranges:
+        return "", 0
+
+    log.debug("Reading file in ranges", path=path, range_count=len(ranges))
+    with ThreadPoolExecutor(max_workers=min(READ_FILE_WORKERS, len(ranges))) as pool:
+        # map() yields in submission order, so the ranges are stitched back in file order
+        responses = pool.map(
+            lambda r: db.dbfs.read(path=path, offset=r[0], length=r[1]),
+            ranges,
+        )
+        # Each range is decoded separately: per-range base64 cannot simply be concatenated
+        content = b"".join(base64.b64decode(resp.data) for resp in responses if resp.data)
+    return base64.b64encode(content).decode('ascii'), len(content)
+
+
+def _validate_base64(content_base64: str) -> None:
+    """
+    Raises ValueError unless content_base64 is well-formed base64.
+
+    Checked block by block (as write_file will send it) before anything is created,
+    so bad input never leaves a truncated file behind. Padding may only end the input.
+    """
+    if len(content_base64) % 4 or content_base64.find("=", 0, len(content_base64) - 2) != -1:
+        raise ValueError("content_base64 is not valid base64: length must be a multiple of 4 with padding only at the end.")
+    for start in range(0, len(content_base64), WRITE_BLOCK_BASE64_CHARS):
+        try:
+            # validate=True rejects characters outside the base64 alphabet instead of skipping them
+            base64.b64decode(content_base64[start:start + WRITE_BLOCK_BASE64_CHARS], validate=True)
+        except binascii.Error as e:
+            raise ValueError(f"content_base64 is not valid base64: {e}") from None
+
+
+def _decoded_length(content_base64: str) -> int:
+    """Returns the decoded byte length of a base64 string without decoding it."""
+    padding = 2 if content_base64.endswith("==") else 1 if content_base64.endswith("=") else 0
+    return (len(content_base64) * 3) // 4 - padding
+
+
 @map_databricks_errors
 @mcp.tool(
     name="databricks-files-read",
@@ -29,28 +97,33 @@ def read_file(path: str, offset: int = 0, length: int = 0) -> dict:
     Args:
         path: Absolute path of the file to read.
         offset: Byte offset to start reading from (default 0).
-        length: Maximum number of bytes to read (default 0, reads up to 1MB).
+        length: Maximum number of bytes to read (default 0, reads up to 1MB). Lengths above
+            1MB are read as concurrent 1MB ranges, up to 64MB per call.
     """
     db = get_db_client()
     log.info("Reading file", path=path, offset=offset, length=length)
 
-    # Access dbfs API via the client instance db.dbfs
-    read_length = length if length > 0 else 1024*1024
-    response = db.dbfs.read(path=path, offset=offset, length=read_length)
+    if length > DBFS_MAX_READ_BYTES:
+        content_b64, bytes_read = _read_ranges(db, path, offset, length)
+    else:
+        # Access dbfs API via the client instance db.dbfs
+        read_length = length if length > 0 else DBFS_MAX_READ_BYTES
+        response = db.dbfs.read(path=path, offset=offset, length=read_length)
 
-    content_b64 = response.data or ""
-    bytes_read = response.bytes_read or 0
+        content_b64 = response.data or ""
+        bytes_read = response.bytes_read or 0
 
-    # Try to decode for logging preview, but return base64
-    preview = "Unable to decode for preview"
-    if content_b64:
-        try:
-            preview_bytes = base64.b64decode(content_b64)
-            preview = preview_bytes[:80].decode('utf-8', errors='replace') + ('...' if len(preview_bytes) > 80 else '')
-        except Exception:
-            pass # Keep default preview message
-
-    log.info("Successfully read file", path=path, bytes_read=bytes_read, preview=preview)
+    log.info("Successfully read file", path=path, bytes_read=bytes_read)
+    if is_debug_enabled(__name__):
+        # Try to decode for logging preview, but return base64
+        preview = "Unable to decode for preview"
+        # Malformed base64 keeps the default preview message; decoding itself replaces bad UTF-8
+        if content_b64:
+            with contextlib.suppress(binascii.Error):
+                # 108 base64 chars decode to the 81 bytes needed; avoid decoding the whole payload
+                preview_bytes = base64.b64decode(content_b64[:108])
+                preview = preview_bytes[:80].decode('utf-8', errors='replace') + ('...' if len(preview_bytes) > 80 else '')
+        log.debug("Read file preview", path=path, preview=preview)
     return {"path": path, "content_base64": content_b64, "bytes_read": bytes_read}
 
 
@@ -63,20 +136,24 @@ def write_file(path: str, content_base64: str, overwrite: bool = False) -> dict:
     """
     Writes base64 encoded content to a file in DBFS or a Volume.
     REQ-FILE-TOOL-02
+    Invalid base64 is rejected before the file is created.
 
     Args:
         path: Absolute path of the file to write.
         content_base64: Base64 encoded content to write.
         overwrite: Overwrite the file if it already exists (default False).
     """
+    _validate_base64(content_base64)
     db = get_db_client()
-    bytes_written = len(base64.b64decode(content_base64))
+    bytes_written = _decoded_length(content_base64)
     log.info("Writing file", path=path, overwrite=overwrite, input_bytes=bytes_written)
 
     # Access dbfs API via the client instance db.dbfs
     try:
         handle = db.dbfs.create(path=path, overwrite=overwrite).handle
-        db.dbfs.add_block(handle=handle, data=content_base64)
+        # DBFS caps add_block at 1 MB decoded; blocks must be appended in order
+        for start in range(0, len(content_base64), WRITE_BLOCK_BASE64_CHARS):
+            db.dbfs.add_block(handle=handle, data=content_base64[start:start + WRITE_BLOCK_BASE64_CHARS])
         db.dbfs.close(handle=handle)
         status = "SUCCESS"
         log.info("Successfully wrote file", path=path, bytes_written=bytes_written)
@@ -131,3 +208,65 @@ def create_directory(path: str) -> dict:
     status = "SUCCESS"
     log.info("Successfully created directory", path=path)
     return {"path": path, "status": status}
+
+
+# Dispatch table for batch_file_ops; each op's remaining keys are passed as keyword arguments
+_BATCH_FILE_OPS = {
+    "read": read_file,
+    "write": write_file,
+    "delete": delete_file,
+    "mkdirs": create_directory,
+}
+
+
+def _run_file_op(op: dict) -> dict:
+    """Runs a single batch_file_ops entry through the matching file tool."""
+    params = dict(op)
+    op_name = params.pop("op", None)
+    func = _BATCH_FILE_OPS.get(op_name)
+    if func is None:
+        raise ValueError(f"Unsupported file operation '{op_name}'. Expected one of: {', '.join(_BATCH_FILE_OPS)}.")
+    return func(**params)
+
+
+@map_databricks_errors
+@mcp.tool(
+    name="databricks-files-batch",
+    description=(
+        "Runs several independent file operations (read, write, delete, mkdirs) on DBFS or Volume paths "
+        "concurrently. Each operation is a dict with an 'op' key plus the arguments of the matching tool, "
+        "e.g. {'op': 'delete', 'path': '/tmp/a', 'recursive': true}."
+    ),
+)
+async def batch_file_ops(ops: list[dict]) -> dict:
+    """
+    Runs independent file operations concurrently.
+    REQ-FILE-TOOL-05
+    Operations must not depend on each other; ordering between them is not guaranteed.
+    Each runs in a worker thread, at most BATCH_FILE_OPS_WORKERS at a time, so the
+    event loop keeps serving other tool calls meanwhile.
+
+    Args:
+        ops: List of operations, each {'op': 'read'|'write'|'delete'|'mkdirs', 'path': ..., ...}.
+    """
+    if len(ops) > MAX_BATCH_FILE_OPS:
+        raise ValueError(f"At most {MAX_BATCH_FILE_OPS} operations are allowed per batch, got {len(ops)}.")
+
+    log.info("Running batch file operations", op_count=len(ops))
+    slots = asyncio.Semaphore(BATCH_FILE_OPS_WORKERS)
+
+    async def run_one(op: dict):
+        async with slots:
+            return await asyncio.to_thread(_run_file_op, op)
+
+    outcomes = await asyncio.gather(*(run_one(op) for op in ops), return_exceptions=True)
+    results = [None] * len(ops)
+    errors = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, Exception):
+            errors.append({"index": index, "op": ops[index].get("op"), "path": ops[index].get("path"), "error": str(outcome)})
+        else:
+            results[index] = outcome
+
+    log.info("Finished batch file operations", op_count=len(ops), error_count=len(errors))
+    return {"results": results, "errors": errors}
@@ -1,23 +1,31 @@
+import asyncio
+
 import structlog
 # Import the mcp instance from app.py
 from ..app import mcp
 
 from ..db_client import get_db_client
 from ..error_mapping import map_databricks_errors
-from databricks.sdk.service import jobs as jobs_service
+# Shared backoff poller, so concurrent waits on one run cost a single get_run per tick
+from ..polling import WAIT_TIMEOUT_SECONDS
+from ..polling import poll_intervals
+from ..polling import wait_for_run
+from ..sdk_utils import summarize_run
 
 log = structlog.get_logger(__name__)
 
+
 @map_databricks_errors
 @mcp.tool(
     name="databricks-jobs-run_now",
     description=(
         "Triggers a specific Databricks Job to run immediately and waits for its completion. "
         "Optional parameters can be provided to override job settings for this run. "
-        "NOTE: This tool currently blocks until the job run finishes, fails, or times out."
+        "NOTE: This tool waits until the job run finishes, fails, or times out (20 minutes). "
+        "Use 'submit_now' and 'get_run_status' for long-running jobs."
     ),
 )
-def run_job_now(
+async def run_job_now(
     job_id: int,
     notebook_params: dict | None = None,
     python_params: list[str] | None = None,
@@ -27,6 +35,8 @@ def run_job_now(
     """
     Triggers a specific job to run immediately and waits for completion.
     REQ-JOB-TOOL-01
+    The run is polled with backoff from the event loop rather than through the
+    SDK's blocking Wait.result(), so other tool calls are served meanwhile.
 
     Args:
         job_id: The unique identifier of the job to run.
@@ -39,31 +49,104 @@ def run_job_now(
     log.info("Running Databricks Job now", job_id=job_id, notebook_params=notebook_params, python_params=python_params)
 
     # Call run_now with optional override parameters
-    run = db.jobs.run_now(
+    waiter = await asyncio.to_thread(
+        db.jobs.run_now,
         job_id=job_id,
         notebook_params=notebook_params,
         python_params=python_params,
         jar_params=jar_params,
         spark_submit_params=spark_submit_params,
         # Add other param types here if supported by the tool signature
-    ).result() # Use .result() to block and wait for completion
+    ) # Do not call .result(); the waiter already carries the new run_id
+    run_id = waiter.run_id
 
-    # Fetch final run details after waiting
-    run_details = db.jobs.get_run(run_id=run.run_id)
-    final_state = str(run_details.state.life_cycle_state.value) if run_details.state and run_details.state.life_cycle_state else "UNKNOWN"
-    result_state = str(run_details.state.result_state.value) if run_details.state and run_details.state.result_state else "UNKNOWN"
+    # The final get_run poll is the complete Run (state and run_page_url), so no re-fetch is needed
+    try:
+        run_details = await wait_for_run(db, run_id, WAIT_TIMEOUT_SECONDS, *poll_intervals(None, None))
+    except asyncio.TimeoutError:
+        raise TimeoutError(
+            f"Run {run_id} did not finish within {WAIT_TIMEOUT_SECONDS} seconds; "
+            "check it later with databricks-jobs-get_run_status."
+        ) from None
+    result = summarize_run(run_id, run_details)
 
     log.info(
         "Job run finished",
         job_id=job_id,
-        run_id=run.run_id,
-        life_cycle_state=final_state,
-        result_state=result_state,
+        run_id=run_id,
+        life_cycle_state=result["status"],
+        result_state=result["result_state"],
     )
+    return result
+
 
-    return {
-        "run_id": run.run_id,
-        "status": final_state, # e.g., TERMINATED, SKIPPED, INTERNAL_ERROR
-        "result_state": result_state, # e.g., SUCCESS, FAILED, TIMEDOUT, CANCELED
-        "run_page_url": run_details.run_page_url,
-    }
+@map_databricks_errors
+@mcp.tool(
+    name="databricks-jobs-submit_now",
+    description=(
+        "Triggers a specific Databricks Job to run immediately and returns its run_id without waiting. "
+        "Use 'get_run_status' to check on the run."
+    ),
+)
+def submit_job_now(
+    job_id: int,
+    notebook_params: dict | None = None,
+    python_params: list[str] | None = None,
+    jar_params: list[str] | None = None,
+    spark_submit_params: list[str] | None = None,
+) -> dict:
+    """
+    Triggers a specific job to run immediately without waiting for completion.
+    REQ-JOB-TOOL-02
+
+    Args:
+        job_id: The unique identifier of the job to run.
+        notebook_params: Optional dictionary of notebook parameters to override.
+        python_params: Optional list of string arguments for a Python script task.
+        jar_params: Optional list of string arguments for a JAR task.
+        spark_submit_params: Optional list of string arguments for a Spark submit task.
+    """
+    db = get_db_client()
+    log.info("Submitting Databricks Job run", job_id=job_id, notebook_params=notebook_params, python_params=python_params)
+
+    waiter = db.jobs.run_now(
+        job_id=job_id,
+        notebook_params=notebook_params,
+        python_params=python_params,
+        jar_params=jar_params,
+        spark_submit_params=spark_submit_params,
+    ) # Do not call .result(); the waiter already carries the new run_id
+    run_id = waiter.run_id
+    status = "PENDING"
+
+    log.info("Job run submitted", job_id=job_id, run_id=run_id, status=status)
+    return {"run_id": run_id, "status": status}
+
+
+@map_databricks_errors
+@mcp.tool(
+    name="databricks-jobs-get_run_status",
+    description=(
+        "Retrieves the current state of a Databricks Job run. "
+        "Use this to check on runs started via 'submit_now'."
+    ),
+)
+def get_job_run_status(run_id: int) -> dict:
+    """
+    Retrieves the current state of a job run.
+    REQ-JOB-TOOL-03
+
+    Args:
+        run_id: The unique identifier of the job run.
+    """
+    db = get_db_client()
+    log.info("Getting Databricks Job run status", run_id=run_id)
+    run_details = db.jobs.get_run(run_id=run_id)
+    result = summarize_run(run_id, run_details)
+    log.info(
+        "Retrieved job run status",
+        run_id=run_id,
+        life_cycle_state=result["status"],
+        result_state=result["result_state"],
+    )
+    return result
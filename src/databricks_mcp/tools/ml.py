@@ -1,44 +1,334 @@
+import asyncio
+import hashlib
+import itertools
 import json
+import random
+import re
+import threading
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from functools import lru_cache
 
 import structlog
 
 # Import the mcp instance from app.py
 from ..app import mcp
+from databricks.sdk.errors import DatabricksError
 from databricks.sdk.service import serving as serving_endpoints, vectorsearch as vector_search
 
+from ..config import settings
 from ..db_client import get_db_client
 from ..error_mapping import map_databricks_errors
+from ..query_cache import QueryCache
+from ..sdk_utils import enum_value
+
+try:
+    import orjson
+except ImportError: # Optional (extra "fast-json"); stdlib json is used without it
+    orjson = None
 
 log = structlog.get_logger(__name__)
 
+# add_to_vector_index sends documents in chunks of this size, up to UPSERT_WORKERS at a time
+UPSERT_CHUNK_DOCS = 1000
+UPSERT_WORKERS = 4
+# Rejected chunks are halved and retried down to this size; later chunks shrink and regrow to UPSERT_CHUNK_DOCS
+UPSERT_MIN_CHUNK_DOCS = 16
+# HTTP 413 reason phrases; the SDK keeps no status code, and uses the upper-cased reason as error_code or message
+_PAYLOAD_TOO_LARGE_CODES = frozenset({"REQUEST_ENTITY_TOO_LARGE", "PAYLOAD_TOO_LARGE", "CONTENT_TOO_LARGE"})
+# Quota rejections that only count as size rejections when their message is about size
+_QUOTA_ERROR_CODES = frozenset({"RESOURCE_EXHAUSTED", "REQUEST_LIMIT_EXCEEDED"})
+_SIZE_MESSAGE_RE = re.compile(r"too large|size|bytes", re.IGNORECASE)
+
+# Serving request fields that carry one record per input, for query_model_serving_endpoint_batch
+BATCH_INPUT_FORMATS = ("dataframe_records", "instances", "inputs")
+# ServingEndpointsAPI.query fields a dict input_data may set; any other dict is sent as one dataframe record
+SERVING_QUERY_FIELDS = (
+    "dataframe_records", "dataframe_split", "instances", "inputs",
+    "messages", "prompt", "input", "max_tokens", "temperature", "n", "stop", "extra_params",
+)
+MAX_SERVING_BATCH = 1024
+
+# Recent query_model_serving_endpoint results, scoped by (endpoint_name,) and keyed by a payload digest
+_prediction_cache = QueryCache(
+    max_size=settings.serving_prediction_cache_size,
+    ttl_seconds=settings.serving_prediction_cache_ttl_seconds,
+)
+
+# Recent query_vector_index responses; invalidated per index by add_to_vector_index
+_query_cache = QueryCache(
+    max_size=settings.vector_query_cache_size,
+    ttl_seconds=settings.vector_query_cache_ttl_seconds,
+    min_similarity=settings.vector_query_cache_min_similarity,
+    max_bytes=settings.vector_query_cache_max_bytes,
+    index_similarity=settings.vector_query_cache_index_similarity,
+)
+# Result manifests (as_dict) per (index_name, columns); the column metadata only changes with the index schema
+MANIFEST_CACHE_SIZE = 256
+MANIFEST_CACHE_TTL_SECONDS = 300.0
+_manifest_cache = QueryCache(max_size=MANIFEST_CACHE_SIZE, ttl_seconds=MANIFEST_CACHE_TTL_SECONDS)
+# Distinct filters_json strings kept in canonical form; agents tend to reuse a handful of filters
+FILTERS_CACHE_SIZE = 256
+# Share of top-result keys a fresh query must have in common with a verified approximate hit
+VERIFY_MIN_OVERLAP = 0.9
+
+# In-flight query_vector_index calls keyed by (scope, query_text, query_vector) (single-flight)
+_inflight_queries: dict[tuple, Future] = {}
+_inflight_lock = threading.Lock()
+
+def _payload_digest(input_data) -> str:
+    """SHA-256 of input_data's canonical JSON (sorted keys, no whitespace), so equal payloads share a key."""
+    if orjson is not None:
+        canonical = orjson.dumps(input_data, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        canonical = json.dumps(input_data, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(canonical).hexdigest()
+
+
 @map_databricks_errors
 @mcp.tool(
     name="databricks-ml-query_model_serving_endpoint",
     description="Queries a Databricks Model Serving endpoint with the provided input data.",
 )
-def query_model_serving_endpoint(endpoint_name: str, input_data: dict | list) -> dict:
+async def query_model_serving_endpoint(endpoint_name: str, input_data: dict | list) -> dict:
     """
     Sends data to a Databricks Model Serving endpoint and gets predictions.
     REQ-ML-TOOL-01
+    With SERVING_PREDICTION_CACHE_SIZE > 0, repeated (endpoint_name, input_data) pairs are
+    answered from an in-process cache for SERVING_PREDICTION_CACHE_TTL_SECONDS.
+    With ML_CACHE_REPLAY=true, a cache miss raises instead of querying the endpoint.
 
     Args:
         endpoint_name: The name of the deployed Model Serving endpoint.
-        input_data: Input data payload (dict or list). Format depends on the model.
+        input_data: Input data payload. A list, or a dict holding a single record, is sent as
+            'dataframe_records'; a dict with request fields such as 'dataframe_split', 'instances',
+            'inputs' or 'messages' is sent as that request body.
     """
+    # Validated up front, so replay misses and live calls reject the same bad payloads
+    request_body = _serving_request_body(input_data)
+    # Requests are only hashed when the cache is on; hashing the request body rather than input_data
+    # lets equivalent payloads (a list, or the same list under 'dataframe_records') share a recording
+    digest = _payload_digest(request_body) if _prediction_cache.enabled else None
+    if digest is not None:
+        cached = _prediction_cache.get((endpoint_name,), query_text=digest)
+        if cached is not None:
+            log.info("Serving prediction cache hit", endpoint_name=endpoint_name, cache_hits=_prediction_cache.hits)
+            return cached
+    if settings.ml_cache_replay:
+        raise ValueError(
+            f"Cache miss in replay mode for endpoint '{endpoint_name}' (payload digest {digest}); "
+            "ML_CACHE_REPLAY is set, so only recorded requests are answered."
+        )
+
     db = get_db_client()
     log.info("Querying Model Serving endpoint", endpoint_name=endpoint_name)
 
-    response = db.serving_endpoints.query(name=endpoint_name, request=input_data)
+    # The HTTP round-trip runs off the event loop so concurrent tool calls are not serialized
+    response = await asyncio.to_thread(db.serving_endpoints.query, name=endpoint_name, **_serving_query_kwargs(request_body))
 
-    predictions = response.predictions if hasattr(response, 'predictions') else response.as_dict()
+    # QueryEndpointResponse always has the attribute; it is None for non-prediction (e.g. chat) endpoints
+    predictions = response.predictions if response.predictions is not None else response.as_dict()
 
     log.info("Successfully queried endpoint", endpoint_name=endpoint_name)
-    return {"predictions": predictions}
+    result = {"predictions": predictions}
+    if digest is not None:
+        _prediction_cache.put((endpoint_name,), result, query_text=digest)
+    return result
+
+
+def _serving_request_body(input_data: dict | list) -> dict:
+    """
+    Maps input_data onto a serving request body of SERVING_QUERY_FIELDS.
+
+    A list is sent as dataframe_records, and so is a dict naming none of
+    SERVING_QUERY_FIELDS (as a single record). A dict naming any of them is a
+    request body, and every key must then be one of those fields.
+    """
+    if isinstance(input_data, list):
+        return {"dataframe_records": input_data}
+    if not input_data.keys() & set(SERVING_QUERY_FIELDS):
+        return {"dataframe_records": [input_data]}
+    unknown = sorted(input_data.keys() - set(SERVING_QUERY_FIELDS))
+    if unknown:
+        raise ValueError(
+            f"Unsupported input_data fields: {', '.join(unknown)}. Expected only: {', '.join(SERVING_QUERY_FIELDS)}."
+        )
+    return input_data
+
+
+def _serving_query_kwargs(request_body: dict) -> dict:
+    """Converts a serving request body into ServingEndpointsAPI.query keyword arguments."""
+    kwargs = dict(request_body)
+    # The SDK serializes these fields from its own dataclasses
+    if "dataframe_split" in kwargs:
+        kwargs["dataframe_split"] = serving_endpoints.DataframeSplitInput.from_dict(kwargs["dataframe_split"])
+    if "messages" in kwargs:
+        kwargs["messages"] = [serving_endpoints.ChatMessage.from_dict(m) for m in kwargs["messages"]]
+    return kwargs
+
+
+@map_databricks_errors
+@mcp.tool(
+    name="databricks-ml-query_model_serving_endpoint_batch",
+    description=(
+        "Scores a list of inputs against a Databricks Model Serving endpoint in a single request. "
+        "Inputs are sent as 'dataframe_records' (default), 'instances' or 'inputs'; "
+        "predictions are returned in input order."
+    ),
+)
+async def query_model_serving_endpoint_batch(
+    endpoint_name: str, inputs: list, input_format: str = "dataframe_records"
+) -> dict:
+    """
+    Sends a batch of inputs to a Model Serving endpoint in one request.
+    REQ-ML-TOOL-04
+    One HTTP round-trip serves the whole batch instead of one call per input.
+
+    Args:
+        endpoint_name: The name of the deployed Model Serving endpoint.
+        inputs: List of input records (e.g. dicts of feature values), one per prediction.
+        input_format: Request field used to send the records: 'dataframe_records' (default),
+            'instances' or 'inputs'.
+    """
+    if input_format not in BATCH_INPUT_FORMATS:
+        raise ValueError(f"Unsupported input_format '{input_format}'. Expected one of: {', '.join(BATCH_INPUT_FORMATS)}.")
+    if not inputs:
+        raise ValueError("'inputs' must contain at least one record.")
+    if len(inputs) > MAX_SERVING_BATCH:
+        raise ValueError(f"At most {MAX_SERVING_BATCH} inputs are allowed per batch, got {len(inputs)}.")
+
+    db = get_db_client()
+    log.info("Querying Model Serving endpoint with batch", endpoint_name=endpoint_name, batch_size=len(inputs), input_format=input_format)
+
+    response = await asyncio.to_thread(db.serving_endpoints.query, name=endpoint_name, **{input_format: inputs})
+
+    predictions = response.predictions if response.predictions is not None else response.as_dict()
+
+    log.info("Successfully queried endpoint with batch", endpoint_name=endpoint_name, batch_size=len(inputs))
+    return {"predictions": predictions, "count": len(inputs)}
 
 
 # --- Vector Search Tools ---
 # Note: These assume the Vector Search Index exists and is accessible.
 
+def _encode_json(obj) -> str:
+    """Encodes obj as a JSON string, with orjson (numpy arrays allowed) when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj)
+
+
+def _upsert_chunk(db, index_name: str, documents: list[dict]) -> dict | None:
+    """Upserts one chunk of documents and returns its summary (None if the response has no result)."""
+    response = db.vector_search_indexes.upsert_data_vector_index(
+        index_name=index_name,
+        inputs_json=_encode_json(documents) # API expects a JSON string
+    )
+    # UpsertDataVectorIndexResponse always defines these fields (None when absent), so read them directly
+    result = response.result
+    if not result:
+        return None
+    summary = {"status": enum_value(response, 'status'), "success_row_count": result.success_row_count or 0}
+    failed = result.failed_primary_keys
+    if failed:
+        summary["failed_primary_keys"] = failed
+    return summary
+
+
+def _is_size_rejection(error: DatabricksError) -> bool:
+    """
+    True for upsert errors a smaller request may avoid.
+
+    That is an HTTP 413 (recognised by its reason phrase), or a RESOURCE_EXHAUSTED /
+    REQUEST_LIMIT_EXCEEDED error whose message is about request size. Other quota errors
+    and plain 429s are left to the SDK's own retries.
+    """
+    message = str(error)
+    if error.error_code is None:
+        # A 413 with an empty body carries only the reason phrase as its message
+        return message.strip().upper().replace(" ", "_") in _PAYLOAD_TOO_LARGE_CODES
+    error_code = error.error_code.upper()
+    if error_code in _PAYLOAD_TOO_LARGE_CODES:
+        return True
+    return error_code in _QUOTA_ERROR_CODES and _SIZE_MESSAGE_RE.search(message) is not None
+
+
+def _upsert_chunk_splitting(db, index_name: str, documents: list[dict]) -> list[dict | None]:
+    """Upserts one chunk, halving it and retrying each half while the service rejects it as too large."""
+    try:
+        return [_upsert_chunk(db, index_name, documents)]
+    except DatabricksError as e:
+        if len(documents) < 2 * UPSERT_MIN_CHUNK_DOCS or not _is_size_rejection(e):
+            raise
+        log.warning("Upsert chunk rejected; retrying as two halves", index_name=index_name, chunk_docs=len(documents), error=str(e))
+        mid = len(documents) // 2
+        return _upsert_chunk_splitting(db, index_name, documents[:mid]) + _upsert_chunk_splitting(db, index_name, documents[mid:])
+
+
+def _upsert_in_chunks(db, index_name: str, documents: Iterable[dict]) -> list[dict | None]:
+    """
+    Upserts documents in chunks of up to UPSERT_CHUNK_DOCS on UPSERT_WORKERS threads.
+
+    Chunks are cut from the iterable lazily and at most UPSERT_WORKERS are in flight,
+    so only those chunks (and their encoded JSON) are held in memory at once. The chunk
+    size adapts: it halves after a chunk had to be split and doubles back after clean ones.
+    """
+    docs = iter(documents)
+    summaries = []
+    pending = set()
+    sent = 0
+    chunk_docs = UPSERT_CHUNK_DOCS
+    with ThreadPoolExecutor(max_workers=UPSERT_WORKERS) as pool:
+        while True:
+            while len(pending) < UPSERT_WORKERS:
+                chunk = list(itertools.islice(docs, chunk_docs))
+                if not chunk:
+                    break
+                pending.add(pool.submit(_upsert_chunk_splitting, db, index_name, chunk))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk_summaries = future.result()
+                summaries.extend(chunk_summaries)
+                if len(chunk_summaries) > 1:
+                    chunk_docs = max(UPSERT_MIN_CHUNK_DOCS, chunk_docs // 2)
+                else:
+                    chunk_docs = min(UPSERT_CHUNK_DOCS, chunk_docs * 2)
+                sent += 1
+                log.info("Upserted document chunk", index_name=index_name, chunks_done=sent, next_chunk_docs=chunk_docs)
+    return summaries
+
+
+def _last_per_primary_key(documents: list[dict], primary_key: str) -> list[dict]:
+    """Drops all but the last document per primary key value; documents without the key are kept as-is."""
+    latest = {}
+    for position, doc in enumerate(documents):
+        # Documents lacking the key get a unique slot so they are never merged with each other
+        key = ("pk", doc[primary_key]) if primary_key in doc else ("position", position)
+        latest[key] = doc
+    return list(latest.values())
+
+
+def _merge_upsert_summaries(summaries: list[dict | None]) -> dict | None:
+    """Combines per-chunk upsert summaries into one."""
+    present = [s for s in summaries if s is not None]
+    if not present:
+        return None
+    statuses = {s["status"] for s in present}
+    merged = {
+        "status": statuses.pop() if len(statuses) == 1 else "PARTIAL_SUCCESS",
+        "success_row_count": sum(s["success_row_count"] for s in present),
+    }
+    failed = [key for s in present for key in s.get("failed_primary_keys", [])]
+    if failed:
+        merged["failed_primary_keys"] = failed
+    return merged
+
+
 @map_databricks_errors
 @mcp.tool(
     name="databricks-vs-add_to_index",
@@ -48,6 +338,9 @@ def add_to_vector_index(index_name: str, primary_key: str, documents: list[dict]
     """
     Add/update documents in a Databricks Vector Search index.
     REQ-ML-TOOL-02
+    Batches larger than UPSERT_CHUNK_DOCS are sent as concurrent chunked upserts that may
+    land in any order, so only the last document per primary key value is sent. Chunks
+    the service rejects as too large are split in half and retried.
 
     Args:
         index_name: Full name of the Vector Search index (e.g., 'catalog.schema.my_index').
@@ -58,23 +351,14 @@ def add_to_vector_index(index_name: str, primary_key: str, documents: list[dict]
     log.info("Adding/updating documents in Vector Search index", index_name=index_name, doc_count=len(documents))
 
     try:
-        response = db.vector_search_indexes.upsert_data_vector_index(
-            index_name=index_name,
-            inputs_json=json.dumps(documents) # API likely expects JSON string
-        )
-        # Check response structure based on SDK
-        status = "UNKNOWN"
-        num_added = 0
-        summary = None
-        if hasattr(response, 'result') and response.result:
-            if hasattr(response, 'status'):
-                status = str(response.status.value) if response.status else "UNKNOWN"
-            if hasattr(response.result, 'success_row_count'):
-                num_added = response.result.success_row_count or 0
-            # Reconstruct a summary similar to previous expectation if needed for return value
-            summary = { "status": status, "success_row_count": num_added }
-            if hasattr(response.result, 'failed_primary_keys') and response.result.failed_primary_keys:
-                summary["failed_primary_keys"] = response.result.failed_primary_keys
+        if len(documents) <= UPSERT_CHUNK_DOCS:
+            summary = _merge_upsert_summaries(_upsert_chunk_splitting(db, index_name, documents))
+        else:
+            # Encoding one chunk overlaps with other chunks' requests in flight
+            documents = _last_per_primary_key(documents, primary_key)
+            summary = _merge_upsert_summaries(_upsert_in_chunks(db, index_name, documents))
+        status = summary["status"] if summary else "UNKNOWN"
+        num_added = summary["success_row_count"] if summary else 0
 
         log.info("Upsert data result", index_name=index_name, status=status, num_added=num_added)
         return {"status": status, "num_added": num_added, "response_summary": summary}
@@ -85,14 +369,20 @@ def add_to_vector_index(index_name: str, primary_key: str, documents: list[dict]
     except ImportError:
          log.error("Vector Search requires additional dependencies. Try `pip install databricks-vectorsearch`")
          raise NotImplementedError("Vector Search requires additional dependencies.")
+    finally:
+        # Cached query results for this index may be stale even when some chunks failed
+        _query_cache.invalidate(index_name)
 
 
 @map_databricks_errors
 @mcp.tool(
     name="databricks-vs-query_index",
-    description="Queries a Databricks Vector Search index to find similar documents.",
+    description=(
+        "Queries a Databricks Vector Search index to find similar documents. When the server's "
+        "query cache is enabled, repeated queries may return results up to its TTL old."
+    ),
 )
-def query_vector_index(
+async def query_vector_index(
     index_name: str,
     columns: list[str],
     query_vector: list[float] | None = None,
@@ -105,22 +395,130 @@ def query_vector_index(
     Query a Databricks Vector Search index.
     REQ-ML-TOOL-03
     Requires either query_vector or query_text.
+    Responses are cached briefly per (index, columns, filters, num_results, query_type)
+    and query; upserts through add_to_vector_index invalidate the index's entries.
+    Concurrent identical queries share a single Vector Search request.
+    With ML_CACHE_REPLAY=true, a cache miss raises instead of querying the index.
 
     Args:
         index_name: Full name of the Vector Search index.
         columns: List of column names to include in the results.
-        query_vector: Optional query vector (list of floats).
+        query_vector: Optional query vector (list of floats). Direct Python callers may pass a
+            1-D numpy array; it is converted once with tolist() instead of element by element.
         query_text: Optional query text (will be embedded by Databricks).
         num_results: Number of results to return (default 10).
         filters_json: Optional JSON string for filtering results.
         query_type: Type of query, 'ANN' or 'HYBRID' (default 'ANN').
     """
+    query_vector = _as_float_list(query_vector)
     if not query_vector and not query_text:
         raise ValueError("Either 'query_vector' or 'query_text' must be provided.")
     if query_vector and query_text:
         raise ValueError("Provide only one of 'query_vector' or 'query_text'.")
 
+    # Equivalent filters share one canonical string, and so one cache scope and in-flight query
+    filters_json = _canonical_filters(filters_json) if filters_json else None
+    scope = (index_name, tuple(columns), filters_json, num_results, query_type)
+    if query_vector and _query_cache.enabled:
+        # An approximate match scans every cached vector under the cache lock, so it runs off the event loop
+        cached, similarity = await asyncio.to_thread(_query_cache.lookup, scope, query_vector=query_vector)
+    else:
+        cached, similarity = _query_cache.lookup(scope, query_text=query_text, query_vector=query_vector)
+    if cached is not None:
+        log.info("Vector Search query cache hit", index_name=index_name, similarity=similarity, hits=_query_cache.hits, misses=_query_cache.misses)
+        # Verifying re-queries the index, which replay mode must not do.
+        # Sampling which hits to verify is not security-relevant, so the stdlib PRNG is fine.
+        if similarity < 1.0 and not settings.ml_cache_replay and random.random() < settings.vector_query_cache_verify_rate: # noqa: S311
+            return await asyncio.to_thread(_verify_approximate_hit, scope, columns, query_vector, cached)
+        return cached
+    if settings.ml_cache_replay:
+        query = repr(query_text) if query_text else f"{len(query_vector)}-dim vector"
+        raise ValueError(
+            f"Cache miss in replay mode for index '{index_name}' (scope {scope!r}, query {query}); "
+            "ML_CACHE_REPLAY is set, so only recorded queries are answered."
+        )
+
+    inflight_key = (scope, query_text, tuple(query_vector) if query_vector else None)
+    with _inflight_lock:
+        future = _inflight_queries.get(inflight_key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight_queries[inflight_key] = future
+
+    if not is_leader:
+        log.info("Joining in-flight Vector Search query", index_name=index_name)
+        return await asyncio.wrap_future(future)
+
+    try:
+        result = await asyncio.to_thread(_run_vector_query, scope, columns, query_vector, query_text)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight_queries.pop(inflight_key, None)
+
+
+def _verify_approximate_hit(scope: tuple, columns: list[str], query_vector: list[float], cached: dict) -> dict:
+    """Re-runs a query answered by a similar cached vector and feeds the agreement back into the index's threshold."""
+    fresh = _run_vector_query(scope, columns, query_vector, None)
+    _query_cache.record_verification(scope[0], _results_agree(cached["results"], fresh["results"]))
+    return fresh
+
+
+def _results_agree(cached_rows: list, fresh_rows: list) -> bool:
+    """Compares result sets by their first column (the index's primary key when it is requested first)."""
+    if not fresh_rows:
+        return not cached_rows
+    cached_keys = {repr(row[0]) for row in cached_rows if row}
+    fresh_keys = {repr(row[0]) for row in fresh_rows if row}
+    return len(cached_keys & fresh_keys) >= VERIFY_MIN_OVERLAP * len(fresh_keys)
+
+
+@lru_cache(maxsize=FILTERS_CACHE_SIZE)
+def _canonical_filters(filters_json: str) -> str:
+    """Parses filters_json once and returns it compact with sorted keys; raises ValueError if it isn't JSON."""
+    try:
+        filters = orjson.loads(filters_json) if orjson is not None else json.loads(filters_json)
+    except ValueError as e: # orjson.JSONDecodeError and json.JSONDecodeError are both ValueErrors
+        raise ValueError(f"'filters_json' is not valid JSON: {e}") from e
+    if orjson is not None:
+        return orjson.dumps(filters, option=orjson.OPT_SORT_KEYS).decode()
+    return json.dumps(filters, sort_keys=True, separators=(",", ":"))
+
+
+def _as_float_list(query_vector):
+    """Converts array-like query vectors (e.g. numpy) to a list in one C-level tolist() call."""
+    if query_vector is None or isinstance(query_vector, list):
+        return query_vector
+    if hasattr(query_vector, "tolist"):
+        if getattr(query_vector, "ndim", 1) != 1:
+            raise ValueError("'query_vector' must be one-dimensional.")
+        return query_vector.tolist()
+    return list(query_vector)
+
+
+def _manifest_dict(manifest_scope: tuple, manifest) -> dict | None:
+    """Returns manifest.as_dict(), reusing the dict cached for (index_name, columns) while it is fresh."""
+    if manifest is None:
+        return None
+    cached = _manifest_cache.get(manifest_scope)
+    if cached is None:
+        cached = manifest.as_dict()
+        _manifest_cache.put(manifest_scope, cached)
+    return cached
+
+
+def _run_vector_query(scope: tuple, columns: list[str], query_vector: list[float] | None, query_text: str | None) -> dict:
+    """Issues one query_index request for query_vector_index and caches its response."""
+    index_name, _, filters_json, num_results, query_type = scope
     db = get_db_client()
+    # Read before querying so a response that races with an upsert is not cached
+    cache_version = _query_cache.version(index_name)
     log.info("Querying Vector Search index", index_name=index_name, num_results=num_results, has_vector=bool(query_vector), has_text=bool(query_text))
 
     try:
@@ -134,14 +532,15 @@ def query_vector_index(
             query_type=query_type
         )
 
-        result_data = []
-        if response.result and response.result.data_array:
-            result_data = response.result.data_array # Data is typically list of lists/dicts
+        # data_array is the decoded JSON list as-is (the SDK doesn't rebuild rows), so hand it straight through
+        result_data = (response.result.data_array if response.result else None) or []
+        # The manifest is a top-level field of QueryVectorIndexResponse, not part of result
+        manifest = _manifest_dict(scope[:2], response.manifest)
 
-        log.info("Vector Search query successful", index_name=index_name, results_count=len(result_data))
-        return {
+        log.info("Vector Search query successful", index_name=index_name, results_count=len(result_data), cache_misses=_query_cache.misses)
+        result = {
             "results": result_data,
-            "manifest": response.result.manifest.as_dict() if response.result and response.result.manifest else None
+            "manifest": manifest
         }
     except AttributeError:
          log.error("Vector Search client/method (db.vector_search_indexes.query_index) not found in SDK. Check SDK version/API.")
@@ -149,3 +548,6 @@ def query_vector_index(
     except ImportError:
          log.error("Vector Search requires additional dependencies. Try `pip install databricks-vectorsearch`")
          raise NotImplementedError("Vector Search requires additional dependencies.")
+    else:
+        _query_cache.put(scope, result, query_text=query_text, query_vector=query_vector, version=cache_version)
+        return result
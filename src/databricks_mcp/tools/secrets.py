@@ -1,4 +1,6 @@
+import asyncio
 import base64
+import binascii
 
 import structlog
 # Import the mcp instance from app.py
@@ -11,6 +13,10 @@ from ..error_mapping import map_databricks_errors
 
 log = structlog.get_logger(__name__)
 
+# Limits for the bulk secret tools
+MAX_BULK_SECRETS = 256
+BULK_SECRETS_WORKERS = 16
+
 @map_databricks_errors
 @mcp.tool(
     name="databricks-secrets-get_secret",
@@ -19,7 +25,7 @@ log = structlog.get_logger(__name__)
         "Use with extreme caution and ensure the server is appropriately secured."
     ),
 )
-def get_secret(scope_name: str, key: str) -> dict:
+async def get_secret(scope_name: str, key: str) -> dict:
     """
     Retrieves the value of a secret.
     REQ-SEC-TOOL-01
@@ -36,18 +42,33 @@ def get_secret(scope_name: str, key: str) -> dict:
         raise PermissionError("Getting secret values is disabled by server configuration.")
 
     db = get_db_client()
-    log.warning("Retrieving secret value (SECURITY SENSITIVE)", scope=scope_name, key=key) # Log sensitive operation clearly
-    # The SDK's get_secret method returns the raw bytes value
-    secret_value_bytes = db.secrets.get_secret(scope=scope_name, key=key).value
-    # Attempt to decode as UTF-8, but return raw bytes if that fails
+    secret_log = log.bind(scope=scope_name, key=key)
+    # Logged before the call so failed and denied attempts are audited too; WARNING level so the
+    # sensitive operation is always visible. The outcome is only logged at DEBUG, keeping this the one
+    # record per call at the default level
+    secret_log.warning("Retrieving secret value (SECURITY SENSITIVE)")
+    # The Secrets API returns the value base64-encoded; keep that text for binary secrets
+    # instead of decoding and re-encoding it
+    secret_value = (await asyncio.to_thread(db.secrets.get_secret, scope=scope_name, key=key)).value
+    if isinstance(secret_value, str):
+        secret_value_b64 = secret_value
+        secret_value_bytes = base64.b64decode(secret_value)
+    else:
+        secret_value_b64 = None
+        secret_value_bytes = secret_value
+    # Attempt to decode as text (ASCII checked first at C speed), but return base64 if that fails
     try:
-        secret_value_str = secret_value_bytes.decode('utf-8')
-        log.info("Successfully retrieved secret (decoded as UTF-8)", scope=scope_name, key=key)
+        if secret_value_bytes.isascii():
+            secret_value_str = secret_value_bytes.decode('ascii')
+        else:
+            secret_value_str = secret_value_bytes.decode('utf-8')
+        secret_log.debug("Retrieved secret value", result="utf-8")
         return {"scope": scope_name, "key": key, "value_string": secret_value_str, "value_bytes": None}
     except UnicodeDecodeError:
-        log.warning("Secret value is not valid UTF-8, returning raw bytes", scope=scope_name, key=key)
-        # Return raw bytes as base64 for JSON compatibility?
-        secret_value_b64 = base64.b64encode(secret_value_bytes).decode('ascii')
+        secret_log.debug("Retrieved secret value", result="base64")
+        # Return raw bytes as base64 for JSON compatibility
+        if secret_value_b64 is None:
+            secret_value_b64 = binascii.b2a_base64(secret_value_bytes, newline=False).decode('ascii')
         return {"scope": scope_name, "key": key, "value_string": None, "value_base64": secret_value_b64}
 
 
@@ -67,10 +88,9 @@ def put_secret(scope_name: str, key: str, secret_value: str) -> dict:
         secret_value: The string value to store in the secret.
     """
     db = get_db_client()
-    log.info("Putting secret", scope=scope_name, key=key)
     db.secrets.put_secret(scope=scope_name, key=key, string_value=secret_value)
     status = "SUCCESS"
-    log.info("Successfully put secret", scope=scope_name, key=key)
+    log.info("Put secret", scope=scope_name, key=key, status=status)
     return {"scope": scope_name, "key": key, "status": status}
 
 
@@ -92,8 +112,82 @@ def delete_secret(scope_name: str, key: str) -> dict:
         key: The key name of the secret to delete.
     """
     db = get_db_client()
-    log.info("Deleting secret", scope=scope_name, key=key)
     db.secrets.delete_secret(scope=scope_name, key=key)
     status = "SUCCESS"
-    log.info("Successfully deleted secret", scope=scope_name, key=key)
+    log.info("Deleted secret", scope=scope_name, key=key, status=status)
     return {"scope": scope_name, "key": key, "status": status}
+
+
+async def _run_bulk(operation: str, scope_name: str, keys: list[str], func) -> dict:
+    """
+    Runs the blocking func(key) for every key in worker threads, at most BULK_SECRETS_WORKERS
+    at a time, and collects per-key statuses and errors without blocking the event loop.
+    """
+    if len(keys) > MAX_BULK_SECRETS:
+        raise ValueError(f"At most {MAX_BULK_SECRETS} secrets are allowed per call, got {len(keys)}.")
+
+    log.info("Running bulk secret operation", operation=operation, scope=scope_name, count=len(keys))
+    slots = asyncio.Semaphore(BULK_SECRETS_WORKERS)
+
+    async def run_one(key: str) -> None:
+        async with slots:
+            await asyncio.to_thread(func, key)
+
+    outcomes = await asyncio.gather(*(run_one(key) for key in keys), return_exceptions=True)
+    statuses = {}
+    errors = {}
+    for key, outcome in zip(keys, outcomes):
+        if isinstance(outcome, Exception):
+            statuses[key] = "FAILED"
+            errors[key] = str(outcome)
+        else:
+            statuses[key] = "SUCCESS"
+
+    log.info("Finished bulk secret operation", operation=operation, scope=scope_name, count=len(keys), error_count=len(errors))
+    return {"scope": scope_name, "statuses": statuses, "errors": errors}
+
+
+@map_databricks_errors
+@mcp.tool(
+    name="databricks-secrets-put_secrets_bulk",
+    description=(
+        "Creates or updates several secrets in one scope concurrently. "
+        "Takes a mapping of key -> string value; reports a status per key."
+    ),
+)
+async def put_secrets_bulk(scope_name: str, secrets: dict[str, str]) -> dict:
+    """
+    Creates or updates several secrets with string values concurrently.
+    REQ-SEC-TOOL-04
+
+    Args:
+        scope_name: The name of the secret scope.
+        secrets: Mapping of secret key name to the string value to store.
+    """
+    db = get_db_client()
+    return await _run_bulk(
+        "put", scope_name, list(secrets),
+        lambda key: db.secrets.put_secret(scope=scope_name, key=key, string_value=secrets[key]),
+    )
+
+
+@map_databricks_errors
+@mcp.tool(
+    name="databricks-secrets-delete_secrets_bulk",
+    description="Deletes several secrets from one scope concurrently; reports a status per key.",
+)
+async def delete_secrets_bulk(scope_name: str, keys: list[str]) -> dict:
+    """
+    Deletes several secrets concurrently.
+    REQ-SEC-TOOL-05
+    Repeated keys are deleted once, so a duplicate does not report a spurious failure.
+
+    Args:
+        scope_name: The name of the secret scope.
+        keys: The key names of the secrets to delete.
+    """
+    db = get_db_client()
+    return await _run_bulk(
+        "delete", scope_name, list(dict.fromkeys(keys)),
+        lambda key: db.secrets.delete_secret(scope=scope_name, key=key),
+    )
@@ -1,21 +1,75 @@
+import asyncio
+import contextlib
+import re
+from datetime import timedelta
+from typing import Literal
+from typing import get_args
+
 import structlog
+from structlog.contextvars import bound_contextvars
 # Import the mcp instance from app.py
 from ..app import mcp
 # from mcp import Tool, forms # Removed unused imports
 
 # Import compute service for Command Execution types
 from databricks.sdk.service import compute
+from databricks.sdk.service import jobs as jobs_service
 
 from ..db_client import get_db_client
 from ..error_mapping import map_databricks_errors
+from ..polling import cancel_after_timeout
+from ..polling import poll_intervals
+from ..polling import poll_schedule
+from ..polling import wait_for_run
+from ..polling import wait_timeout
+from ..sdk_utils import enum_value
+from ..sdk_utils import summarize_run
 
 log = structlog.get_logger(__name__)
 
 # Define language choices for execute_code
-from typing import Literal
-
 # Use Literal instead of Enum to avoid $ref in JSON schema (Claude API doesn't support $ref)
-LanguageOptions = Literal["python", "sql", "scala", "r"]
+# Limited to the compute.Language members command execution supports (it has no R)
+LanguageOptions = Literal["python", "sql", "scala"]
+
+# execute_code language -> SDK enum, resolved once
+_EXECUTE_LANGUAGES = {name: compute.Language(name) for name in get_args(LanguageOptions)}
+
+# Longest long-poll get_notebook_run accepts; longer waits belong in run_notebook
+MAX_RUN_WAIT_MS = 60_000
+# Run names keep the tail of the notebook path (its most specific part), with control characters removed
+_RUN_NAME_TMPL = "MCP Run: {}"
+RUN_NAME_MAX_PATH_CHARS = 200
+# One-time runs are submitted as a single notebook task under this key
+_RUN_TASK_KEY = "notebook"
+_NON_PRINTABLE_RE = re.compile(r"[\x00-\x1f\x7f-\x9f]")
+# Limits for run_notebooks: notebooks per call, and run submissions in flight at once
+MAX_BATCH_NOTEBOOKS = 100
+RUN_NOTEBOOKS_MAX_CONCURRENCY = 20
+
+_TERMINAL_COMMAND_STATUSES = frozenset({
+    compute.CommandStatus.FINISHED,
+    compute.CommandStatus.ERROR,
+    compute.CommandStatus.CANCELLED,
+})
+
+
+async def _poll_command(db, command_ids: dict, initial: float, cap: float) -> compute.CommandStatusResponse:
+    """Polls command_status with backoff until the command (cluster_id/context_id/command_id) reaches a terminal status."""
+    for delay in poll_schedule(initial, cap):
+        cmd = await asyncio.to_thread(db.command_execution.command_status, **command_ids)
+        if cmd.status in _TERMINAL_COMMAND_STATUSES:
+            return cmd
+        await asyncio.sleep(delay)
+
+
+async def _destroy_context(db, cluster_id: str, context_id: str) -> None:
+    """Best-effort removal of an execution context; clusters cap how many contexts may be open."""
+    try:
+        await asyncio.to_thread(db.command_execution.destroy, cluster_id=cluster_id, context_id=context_id)
+    except Exception as e:
+        log.warning("Failed to destroy execution context", error=str(e), cluster_id=cluster_id, context_id=context_id)
+
 
 @map_databricks_errors
 # Use the mcp instance decorator
@@ -23,57 +77,195 @@ LanguageOptions = Literal["python", "sql", "scala", "r"]
     name="databricks-workspace-run_notebook",
     description=(
         "Runs a Databricks notebook and waits for its completion. "
-        "NOTE: This tool currently blocks until the notebook run finishes, fails, or times out."
+        "NOTE: This tool waits until the notebook run finishes, fails, or times out."
     ),
 )
-def run_notebook(notebook_path: str, cluster_id: str | None = None, parameters: dict | None = None) -> dict:
+async def run_notebook(
+    notebook_path: str,
+    cluster_id: str | None = None,
+    parameters: dict | None = None,
+    poll_interval_initial: float | None = None,
+    poll_interval_max: float | None = None,
+    timeout_seconds: int | None = None,
+) -> dict:
     """
     Executes a Databricks notebook and waits for completion.
     REQ-WS-TOOL-01
+    The run is polled with backoff from the event loop, so other tool calls are
+    served meanwhile; concurrent waits on one run share its polls.
 
     Args:
         notebook_path: The absolute path of the notebook to run.
         cluster_id: Optional ID of the cluster to run on. Defaults might apply.
         parameters: Optional dictionary of parameters for the notebook.
+        poll_interval_initial: Optional first delay between status polls, in seconds (min 1, default 2).
+        poll_interval_max: Optional cap on the delay between status polls, in seconds (min 1, default 30).
+        timeout_seconds: Optional wait limit in seconds (min 1, default 1200); the run is cancelled past it.
     """
+    timeout = wait_timeout(timeout_seconds)
+    initial, cap = poll_intervals(poll_interval_initial, poll_interval_max)
     db = get_db_client()
-    log.info("Running Databricks notebook", notebook_path=notebook_path, cluster_id=cluster_id, params=parameters)
-
-    # Use Jobs API run_now for a one-time notebook run.
-    task = {
-        "notebook_task": {
-            "notebook_path": notebook_path,
-            "base_parameters": parameters or {},
-        }
-    }
-    cluster_spec = {}
-    if cluster_id:
-         cluster_spec["existing_cluster_id"] = cluster_id
+    with bound_contextvars(notebook_path=notebook_path, cluster_id=cluster_id):
+        log.info("Running Databricks notebook", params=parameters)
+        run_id = await _start_notebook_run(db, notebook_path, cluster_id, parameters)
 
-    run = db.jobs.run_now(
-        run_name=f"MCP Run: {notebook_path}", # Give it a descriptive name
-        tasks=[task],
-        **cluster_spec # Unpack cluster spec: existing_cluster_id or new_cluster
-    ).result() # Use .result() to block and wait for completion
-
-    run_details = db.jobs.get_run(run_id=run.run_id)
-    final_state = str(run_details.state.life_cycle_state.value) if run_details.state and run_details.state.life_cycle_state else "UNKNOWN"
-    result_state = str(run_details.state.result_state.value) if run_details.state and run_details.state.result_state else "UNKNOWN"
-
-    log.info(
-        "Notebook run finished",
-        notebook_path=notebook_path,
-        run_id=run.run_id,
-        life_cycle_state=final_state,
-        result_state=result_state,
-    )
+        try:
+            run_details = await wait_for_run(db, run_id, timeout, initial, cap)
+        except asyncio.TimeoutError:
+            await cancel_after_timeout(db.jobs.cancel_run, run_id=run_id)
+            raise TimeoutError(f"Run {run_id} did not finish within {timeout} seconds and was cancelled.") from None
+        result = summarize_run(run_id, run_details)
+
+        log.info(
+            "Notebook run finished",
+            run_id=run_id,
+            life_cycle_state=result["status"],
+            result_state=result["result_state"],
+        )
+    return result
 
-    return {
-        "run_id": run.run_id,
-        "status": final_state,
-        "result_state": result_state,
-        "run_page_url": run_details.run_page_url,
-    }
+
+@map_databricks_errors
+@mcp.tool(
+    name="databricks-workspace-run_notebooks",
+    description=(
+        "Runs several Databricks notebooks in parallel and waits for all of them to finish. "
+        "Each notebook is submitted as its own one-time run; failures are reported per notebook."
+    ),
+)
+async def run_notebooks(
+    notebook_paths: list[str],
+    cluster_id: str | None = None,
+    parameters: dict | None = None,
+    poll_interval_initial: float | None = None,
+    poll_interval_max: float | None = None,
+    timeout_seconds: int | None = None,
+) -> dict:
+    """
+    Executes several notebooks concurrently and waits for all of them.
+    REQ-WS-TOOL-05
+    Runs are submitted at most RUN_NOTEBOOKS_MAX_CONCURRENCY at a time and all
+    waited on together, so the call lasts about as long as the slowest run.
+
+    Args:
+        notebook_paths: The absolute paths of the notebooks to run (at most 100).
+        cluster_id: Optional ID of the cluster to run them on. Defaults might apply.
+        parameters: Optional dictionary of parameters passed to every notebook.
+        poll_interval_initial: Optional first delay between status polls, in seconds (min 1, default 2).
+        poll_interval_max: Optional cap on the delay between status polls, in seconds (min 1, default 30).
+        timeout_seconds: Optional wait limit per run in seconds (min 1, default 1200); runs past it are cancelled.
+    """
+    if len(notebook_paths) > MAX_BATCH_NOTEBOOKS:
+        raise ValueError(f"At most {MAX_BATCH_NOTEBOOKS} notebooks are allowed per call, got {len(notebook_paths)}.")
+    timeout = wait_timeout(timeout_seconds)
+    initial, cap = poll_intervals(poll_interval_initial, poll_interval_max)
+    db = get_db_client()
+    log.info("Running Databricks notebooks", notebook_count=len(notebook_paths), cluster_id=cluster_id)
+    submit_slots = asyncio.Semaphore(RUN_NOTEBOOKS_MAX_CONCURRENCY)
+
+    async def run_one(notebook_path: str) -> dict:
+        async with submit_slots:
+            run_id = await _start_notebook_run(db, notebook_path, cluster_id, parameters)
+        try:
+            run_details = await wait_for_run(db, run_id, timeout, initial, cap)
+        except asyncio.TimeoutError:
+            await cancel_after_timeout(db.jobs.cancel_run, run_id=run_id)
+            raise TimeoutError(f"Run {run_id} did not finish within {timeout} seconds and was cancelled.") from None
+        return summarize_run(run_id, run_details)
+
+    outcomes = await asyncio.gather(*(run_one(path) for path in notebook_paths), return_exceptions=True)
+    results = [None] * len(notebook_paths)
+    errors = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, Exception):
+            errors.append({"index": index, "notebook_path": notebook_paths[index], "error": str(outcome)})
+        else:
+            results[index] = outcome
+
+    log.info("Notebook runs finished", notebook_count=len(notebook_paths), error_count=len(errors))
+    return {"results": results, "errors": errors}
+
+
+@map_databricks_errors
+@mcp.tool(
+    name="databricks-workspace-start_notebook_run",
+    description=(
+        "Starts a one-time run of a Databricks notebook and returns its run_id without waiting. "
+        "Use 'get_notebook_run' to check on (or wait for) the run."
+    ),
+)
+async def start_notebook_run(notebook_path: str, cluster_id: str | None = None, parameters: dict | None = None) -> dict:
+    """
+    Starts a notebook run without waiting for it.
+    REQ-WS-TOOL-03
+
+    Args:
+        notebook_path: The absolute path of the notebook to run.
+        cluster_id: Optional ID of the cluster to run on. Defaults might apply.
+        parameters: Optional dictionary of parameters for the notebook.
+    """
+    db = get_db_client()
+    log.info("Starting Databricks notebook run", notebook_path=notebook_path, cluster_id=cluster_id, params=parameters)
+    run_id = await _start_notebook_run(db, notebook_path, cluster_id, parameters)
+    log.info("Notebook run started", notebook_path=notebook_path, run_id=run_id)
+    return {"run_id": run_id, "status": "PENDING"}
+
+
+@map_databricks_errors
+@mcp.tool(
+    name="databricks-workspace-get_notebook_run",
+    description=(
+        "Retrieves the state of a notebook (or job) run. With wait_time_ms, waits up to that long "
+        "for the run to finish before returning its current state."
+    ),
+)
+async def get_notebook_run(run_id: int, wait_time_ms: int = 0) -> dict:
+    """
+    Retrieves a run's state, optionally long-polling until it finishes.
+    REQ-WS-TOOL-04
+    Returning before the run finishes is not an error; the status is then non-terminal.
+
+    Args:
+        run_id: The unique identifier of the run.
+        wait_time_ms: Optional time to wait for the run to finish, in milliseconds (0-60000, default 0).
+    """
+    if not 0 <= wait_time_ms <= MAX_RUN_WAIT_MS:
+        raise ValueError(f"'wait_time_ms' must be between 0 and {MAX_RUN_WAIT_MS}.")
+    db = get_db_client()
+    log.info("Getting notebook run", run_id=run_id, wait_time_ms=wait_time_ms)
+
+    run_details = None
+    if wait_time_ms:
+        # Still running after the long-poll: fall through and report the current state
+        with contextlib.suppress(asyncio.TimeoutError):
+            run_details = await wait_for_run(db, run_id, wait_time_ms / 1000, *poll_intervals(None, None))
+    if run_details is None:
+        run_details = await asyncio.to_thread(db.jobs.get_run, run_id=run_id)
+    result = summarize_run(run_id, run_details)
+
+    log.info("Retrieved notebook run", run_id=run_id, life_cycle_state=result["status"], result_state=result["result_state"])
+    return result
+
+
+def _run_name(notebook_path: str) -> str:
+    """Builds a run name from notebook_path, well within the Jobs API's run_name length limit."""
+    return _RUN_NAME_TMPL.format(_NON_PRINTABLE_RE.sub("", notebook_path)[-RUN_NAME_MAX_PATH_CHARS:])
+
+
+async def _start_notebook_run(db, notebook_path: str, cluster_id: str | None, parameters: dict | None) -> int:
+    """Submits a one-time notebook run via the Jobs API and returns its run_id."""
+    task = jobs_service.SubmitTask(
+        task_key=_RUN_TASK_KEY,
+        notebook_task=jobs_service.NotebookTask(notebook_path=notebook_path, base_parameters=parameters),
+        # Unset fields are left out of the request, so no cluster is pinned without a cluster_id
+        existing_cluster_id=cluster_id,
+    )
+    waiter = await asyncio.to_thread(
+        db.jobs.submit,
+        run_name=_run_name(notebook_path), # Give it a descriptive name
+        tasks=[task],
+    ) # Do not wait on the waiter; it already carries the new run_id
+    return waiter.run_id
 
 
 @map_databricks_errors
@@ -81,55 +273,84 @@ def run_notebook(notebook_path: str, cluster_id: str | None = None, parameters:
 @mcp.tool(
     name="databricks-workspace-execute_code",
      description=(
-        "Executes a snippet of code (Python, SQL, Scala, R) on a specified cluster and waits for completion. "
-        "NOTE: This tool currently blocks until the command finishes, fails, or times out."
+        "Executes a snippet of code (Python, SQL, Scala) on a specified cluster and waits for completion. "
+        "NOTE: This tool waits until the command finishes, fails, or times out."
     ),
 )
-def execute_code(code: str, language: LanguageOptions, cluster_id: str) -> dict:
+async def execute_code(
+    code: str,
+    language: LanguageOptions,
+    cluster_id: str,
+    poll_interval_initial: float | None = None,
+    poll_interval_max: float | None = None,
+    timeout_seconds: int | None = None,
+) -> dict:
     """
     Executes a snippet of code within a specified cluster context and waits for completion.
     REQ-WS-TOOL-02
+    The command runs in an execution context created for this call and destroyed
+    after it. Its status is polled with backoff from the event loop, so no worker
+    thread is held for the length of the command.
 
     Args:
         code: The code snippet to execute.
-        language: The language of the code snippet (python, sql, scala, r).
+        language: The language of the code snippet (python, sql, scala).
         cluster_id: The ID of the cluster to execute the code on.
+        poll_interval_initial: Optional first delay between status polls, in seconds (min 1, default 2).
+        poll_interval_max: Optional cap on the delay between status polls, in seconds (min 1, default 30).
+        timeout_seconds: Optional wait limit in seconds (min 1, default 1200); the command is cancelled past it.
     """
+    sdk_language = _EXECUTE_LANGUAGES.get(language)
+    if sdk_language is None:
+        raise ValueError(f"Unsupported language '{language}'. Expected one of: {', '.join(_EXECUTE_LANGUAGES)}.")
+    timeout = wait_timeout(timeout_seconds)
+    initial, cap = poll_intervals(poll_interval_initial, poll_interval_max)
     db = get_db_client()
-    log.info("Executing code snippet", language=language, cluster_id=cluster_id)
-
-    # Use the Clusters API execute method
-    # cmd = db.command_execution.execute( # OLD
-    cmd = db.clusters.execute(
-        language=language,
-        cluster_id=cluster_id,
-        command=code
-    ).result() # Use .result() to block and wait for completion
-
-    # cmd_status = str(cmd.status) # OLD: Assumes cmd has status directly
-    cmd_status = str(cmd.status.value) if cmd.status else "UNKNOWN" # Use .value for Enum
-    result_data = None
-    result_type = "UNKNOWN"
-    if cmd.results:
-        log.debug("Processing command results", command_id=cmd.id, has_results_obj=True)
-        result_type = str(cmd.results.result_type.value) if cmd.results and cmd.results.result_type else "UNKNOWN"
-        log.debug("Determined result type", command_id=cmd.id, type=result_type)
-        # Assign data first
-        result_data = cmd.results.data if hasattr(cmd.results, 'data') else None
-        log.debug("Initial result data assignment", command_id=cmd.id, data=result_data)
-        # Overwrite with cause if it's an error (case-insensitive compare)
-        if result_type.upper() == compute.ResultType.ERROR.value.upper() and hasattr(cmd.results, 'cause'):
-             result_data = cmd.results.cause
-             log.debug("Overwrote result data with error cause", command_id=cmd.id, cause=result_data)
-
-    log.info(
-        "Code execution finished",
-        language=language,
-        cluster_id=cluster_id,
-        command_id=cmd.id,
-        status=cmd_status,
-        result_type=result_type,
-    )
+    with bound_contextvars(language=language, cluster_id=cluster_id):
+        log.info("Executing code snippet")
+
+        # Commands run inside an execution context; wait (off the loop) until it is ready
+        context = await asyncio.to_thread(
+            db.command_execution.create_and_wait,
+            cluster_id=cluster_id,
+            language=sdk_language,
+            timeout=timedelta(seconds=timeout),
+        )
+        try:
+            waiter = await asyncio.to_thread(
+                db.command_execution.execute,
+                cluster_id=cluster_id,
+                context_id=context.id,
+                language=sdk_language,
+                command=code,
+            ) # Do not wait on the waiter; it already carries the new command_id
+            command_ids = {"cluster_id": cluster_id, "context_id": context.id, "command_id": waiter.command_id}
+            try:
+                cmd = await asyncio.wait_for(_poll_command(db, command_ids, initial, cap), timeout)
+            except asyncio.TimeoutError:
+                await cancel_after_timeout(db.command_execution.cancel, **command_ids)
+                raise TimeoutError(f"Command did not finish within {timeout} seconds and was cancelled.") from None
+        finally:
+            await _destroy_context(db, cluster_id, context.id)
+
+        # cmd_status = str(cmd.status) # OLD: Assumes cmd has status directly
+        cmd_status = enum_value(cmd, 'status')
+        result_data = None
+        result_type = "UNKNOWN"
+        results = cmd.results
+        if results:
+            result_type = enum_value(results, 'result_type')
+            # compute.Results always defines data and cause; an error reports its cause instead of data
+            is_error = result_type.upper() == compute.ResultType.ERROR.value.upper()
+            result_data = results.cause if is_error else results.data
+            log.debug("Processed command results", command_id=cmd.id, type=result_type, data=result_data)
+
+        log.info(
+            "Code execution finished",
+            command_id=cmd.id,
+            status=cmd_status,
+            result_type=result_type,
+        )
 
     return {
         "command_id": cmd.id,
@@ -0,0 +1,21 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+# Resource modules whose get_db_client is swapped once for the whole package
+_SHARED_CLIENT_MODULES = ("jobs", "ml", "secrets", "workspace")
+
+
+@pytest.fixture(scope="session")
+def _db_client_template():
+    # One client mock for the whole session; per-module fixtures reset it before each test
+    return MagicMock()
+
+
+@pytest.fixture(scope="package", autouse=True)
+def _patch_shared_db_client(_db_client_template):
+    # Point get_db_client at the shared mock once, instead of patching per test
+    with pytest.MonkeyPatch.context() as mp:
+        for module in _SHARED_CLIENT_MODULES:
+            mp.setattr(f"databricks_mcp.resources.{module}.get_db_client", lambda: _db_client_template)
+        yield
@@ -1,33 +1,43 @@
+from types import SimpleNamespace
+
 import pytest
 from unittest.mock import MagicMock, patch
 from databricks.sdk.service import compute as compute_service
 
 from databricks_mcp.resources.compute import list_clusters, get_cluster_details
-from databricks_mcp.db_client import get_db_client # To mock
 
 # Mock the get_db_client function used by the resources
-@pytest.fixture(autouse=True)
+# One patch per module; _reset_mock_db_client_compute gives each test a clean client
+@pytest.fixture(scope="module", autouse=True)
 def mock_db_client_compute():
     mock_client = MagicMock()
     # Assign unused variable to _
     with patch('databricks_mcp.resources.compute.get_db_client', return_value=mock_client) as _:
         yield mock_client # Provide the mocked client instance if needed in tests
 
+@pytest.fixture(autouse=True)
+def _reset_mock_db_client_compute(mock_db_client_compute):
+    yield
+    mock_db_client_compute.reset_mock(return_value=True, side_effect=True)
+
+def _fake_cluster(**attrs):
+    # Plain attribute bag: cheaper than a MagicMock and fails loudly on unexpected attribute reads
+    return SimpleNamespace(**attrs)
+
 # --- Tests for list_clusters ---
 
 def test_list_clusters_success(mock_db_client_compute):
     # Arrange
-    # Remove spec
-    cluster1 = MagicMock() # spec=compute_service.ClusterDetails removed
-    cluster1.cluster_id = "c1"; cluster1.cluster_name = "Cluster 1"; cluster1.state = compute_service.State.RUNNING
-    cluster1.node_type_id = "type1"; cluster1.spark_version = "13.3.x"
-    # Remove spec
-    cluster2 = MagicMock() # spec=compute_service.ClusterDetails removed
-    cluster2.cluster_id = "c2"; cluster2.cluster_name = "Cluster 2"; cluster2.state = compute_service.State.TERMINATED
-    cluster2.node_type_id = "type2"; cluster2.spark_version = "12.2.x"
-    # Mock the response object directly setting the 'clusters' attribute
-    mock_resp = MagicMock() # spec=compute_service.ListClustersResponse removed
-    mock_resp.clusters = [cluster1, cluster2]
+    cluster1 = _fake_cluster(
+        cluster_id="c1", cluster_name="Cluster 1", state=compute_service.State.RUNNING,
+        driver_node_type_id="type1", node_type_id="type1", spark_version="13.3.x",
+    )
+    cluster2 = _fake_cluster(
+        cluster_id="c2", cluster_name="Cluster 2", state=compute_service.State.TERMINATED,
+        driver_node_type_id="type2", node_type_id="type2", spark_version="12.2.x",
+    )
+    # A response object carrying the 'clusters' attribute
+    mock_resp = SimpleNamespace(clusters=[cluster1, cluster2])
     mock_db_client_compute.clusters.list.return_value = mock_resp
 
     # Act
@@ -35,39 +45,63 @@ def test_list_clusters_success(mock_db_client_compute):
 
     # Assert
     mock_db_client_compute.clusters.list.assert_called_once()
-    assert len(result) == 2
-    assert result[0]["cluster_id"] == "c1"
-    assert result[0]["state"] == "RUNNING"
-    assert result[1]["cluster_id"] == "c2"
-    assert result[1]["state"] == "TERMINATED"
+    assert result["truncated"] is False
+    items = result["items"]
+    assert len(items) == 2
+    assert items[0]["cluster_id"] == "c1"
+    assert items[0]["state"] == "RUNNING"
+    assert items[1]["cluster_id"] == "c2"
+    assert items[1]["state"] == "TERMINATED"
 
 def test_list_clusters_empty(mock_db_client_compute):
     """Verify list_clusters handles an empty list."""
     mock_db_client_compute.clusters.list.return_value = []
     result = list_clusters()
     mock_db_client_compute.clusters.list.assert_called_once()
-    assert result == []
+    assert result == {"items": [], "truncated": False}
+
+def test_list_clusters_stops_at_max_results(mock_db_client_compute):
+    """Listing stops consuming the SDK iterator once the limit (plus one) is reached."""
+    def clusters():
+        for n in range(10):
+            yield _fake_cluster(
+                cluster_id=f"c{n}", cluster_name=f"Cluster {n}", state=None,
+                driver_node_type_id="t", node_type_id="t",
+            )
+        raise AssertionError("listing should have stopped before fetching more")
+    mock_db_client_compute.clusters.list.return_value = clusters()
+
+    with patch("databricks_mcp.resources.compute.settings.resource_list_max_results", 3):
+        result = list_clusters()
+
+    assert [c["cluster_id"] for c in result["items"]] == ["c0", "c1", "c2"]
+    assert result["truncated"] is True
 
 # --- Tests for get_cluster_details ---
 
-def test_get_cluster_details_success(mock_db_client_compute):
+@pytest.mark.parametrize(
+    "autoscale, num_workers, present_key, absent_key, expected",
+    [
+        (SimpleNamespace(min_workers=2, max_workers=8), None, "autoscale", "num_workers", {"min_workers": 2, "max_workers": 8}),
+        (None, 5, "num_workers", "autoscale", 5),
+    ],
+    ids=["autoscale", "fixed"],
+)
+def test_get_cluster_details(mock_db_client_compute, autoscale, num_workers, present_key, absent_key, expected):
     # Arrange
-    # Remove spec, set attributes directly
-    cluster_info = MagicMock() # spec=compute_service.ClusterDetails removed
-    cluster_info.cluster_id = "details-c1"
-    cluster_info.creator_user_name = "user@example.com"
-    cluster_info.cluster_name = "Detailed Cluster"
-    cluster_info.spark_version = "13.3.x-scala2.12"
-    cluster_info.node_type_id = "i3.xlarge"
-    cluster_info.driver_node_type_id = "i3.xlarge"
-    cluster_info.autotermination_minutes = 60
-    cluster_info.state = compute_service.State.RUNNING
-    cluster_info.state_message = "Running"
-    cluster_info.autoscale = MagicMock() # Remove spec=compute_service.AutoScale
-    cluster_info.autoscale.min_workers = 2
-    cluster_info.autoscale.max_workers = 8
-    cluster_info.num_workers = None # Ensure this is None if autoscale is used
-
+    cluster_info = _fake_cluster(
+        cluster_id="details-c1",
+        creator_user_name="user@example.com",
+        cluster_name="Detailed Cluster",
+        spark_version="13.3.x-scala2.12",
+        node_type_id="i3.xlarge",
+        driver_node_type_id="i3.xlarge",
+        autotermination_minutes=60,
+        state=compute_service.State.RUNNING,
+        state_message="Running",
+        autoscale=autoscale,
+        num_workers=num_workers,
+    )
     mock_db_client_compute.clusters.get.return_value = cluster_info
 
     # Act
@@ -78,36 +112,8 @@ def test_get_cluster_details_success(mock_db_client_compute):
     assert result["cluster_id"] == "details-c1"
     assert result["cluster_name"] == "Detailed Cluster"
     assert result["state"] == "RUNNING"
-    assert result["autoscale"] == {"min_workers": 2, "max_workers": 8}
-    assert "num_workers" not in result # Check fixed size key is not present
-
-def test_get_cluster_details_fixed_size(mock_db_client_compute):
-    # Arrange
-    # Remove spec, set attributes directly
-    cluster_info_fixed = MagicMock() # spec=compute_service.ClusterDetails removed
-    cluster_info_fixed.cluster_id = "fixed-c1"
-    cluster_info_fixed.creator_user_name = "user@example.com"
-    cluster_info_fixed.cluster_name = "Fixed Size Cluster"
-    cluster_info_fixed.spark_version = "13.3.x-scala2.12"
-    cluster_info_fixed.node_type_id = "m5.large"
-    cluster_info_fixed.driver_node_type_id = "m5.large"
-    cluster_info_fixed.autotermination_minutes = 0
-    cluster_info_fixed.state = compute_service.State.TERMINATED
-    cluster_info_fixed.state_message = "Terminated by user"
-    cluster_info_fixed.autoscale = None # Ensure autoscale is None
-    cluster_info_fixed.num_workers = 5
-
-    mock_db_client_compute.clusters.get.return_value = cluster_info_fixed
-
-    # Act
-    result = get_cluster_details(cluster_id="fixed-c1")
-
-    # Assert
-    mock_db_client_compute.clusters.get.assert_called_once_with(cluster_id="fixed-c1")
-    assert result["cluster_id"] == "fixed-c1"
-    assert result["state"] == "TERMINATED"
-    assert result["num_workers"] == 5
-    assert "autoscale" not in result # Check autoscale key is not present
+    assert result[present_key] == expected
+    assert absent_key not in result # Only one of autoscale / num_workers is reported
 
 # We rely on the map_databricks_errors decorator to handle exceptions,
 # so we don't explicitly test raising MCPError here unless we want to test
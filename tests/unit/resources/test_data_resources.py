@@ -1,10 +1,12 @@
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
 import pytest
+from databricks.sdk.errors import NotFound
 from databricks.sdk.service import catalog as uc
 from databricks.sdk.service import sql as sql_service
-from databricks_mcp import error_mapping as mcp_errors # For preview error test
+from databricks_mcp.resources import data as data_resources
 
 from databricks_mcp.resources.data import get_table_schema
 from databricks_mcp.resources.data import list_catalogs
@@ -15,33 +17,31 @@ from databricks_mcp.resources.data import preview_table
 
 
 # Mock the get_db_client function
-@pytest.fixture(autouse=True)
+# One patch per module; _reset_mock_db_client_data gives each test a clean client
+@pytest.fixture(scope="module", autouse=True)
 def mock_db_client_data():
     mock_client = MagicMock()
     with patch('databricks_mcp.resources.data.get_db_client', return_value=mock_client) as mock_get:
         yield mock_client
 
+@pytest.fixture(autouse=True)
+def _reset_mock_db_client_data(mock_db_client_data):
+    yield
+    mock_db_client_data.reset_mock(return_value=True, side_effect=True)
+
 # --- Tests for list_catalogs ---
 def test_list_catalogs_success(mock_db_client_data):
-    cat1 = MagicMock()
-    cat1.name = "main"
-    cat1.comment = "Main catalog"
-    cat1.owner = "admin"
+    cat1 = SimpleNamespace(name="main", comment="Main catalog", owner="admin")
     mock_db_client_data.catalogs.list.return_value = [cat1]
     result = list_catalogs()
-    assert len(result) == 1
-    assert result[0] == {"name": "main", "comment": "Main catalog", "owner": "admin"}
-    mock_db_client_data.catalogs.list.assert_called_once()
+    assert result == {"items": [{"name": "main", "comment": "Main catalog", "owner": "admin"}], "truncated": False}
+    mock_db_client_data.catalogs.list.assert_called_once_with(max_results=501)
 
 # --- Tests for list_schemas ---
 def test_list_schemas_success(mock_db_client_data):
-    sch1 = MagicMock()
-    sch1.name = "default"
-    sch1.catalog_name = "main"
-    sch1.comment = "Default schema"
-    sch1.owner = "admin"
+    sch1 = SimpleNamespace(name="default", catalog_name="main", comment="Default schema", owner="admin")
     mock_db_client_data.schemas.list.return_value = [sch1]
-    result = list_schemas(catalog_name="main")
+    result = list_schemas(catalog_name="main")["items"]
     assert len(result) == 1
     assert result[0] == {
         "name": "default",
@@ -49,19 +49,16 @@ def test_list_schemas_success(mock_db_client_data):
         "comment": "Default schema",
         "owner": "admin"
     }
-    mock_db_client_data.schemas.list.assert_called_once_with(catalog_name="main")
+    mock_db_client_data.schemas.list.assert_called_once_with(catalog_name="main", max_results=501)
 
 # --- Tests for list_tables ---
 def test_list_tables_success(mock_db_client_data):
-    tbl1 = MagicMock()
-    tbl1.name = "my_table"
-    tbl1.catalog_name = "main"
-    tbl1.schema_name = "default"
-    tbl1.table_type = uc.TableType.MANAGED
-    tbl1.comment = "A test table"
-    tbl1.owner = "admin"
+    tbl1 = SimpleNamespace(
+        name="my_table", catalog_name="main", schema_name="default",
+        table_type=uc.TableType.MANAGED, comment="A test table", owner="admin",
+    )
     mock_db_client_data.tables.list.return_value = [tbl1]
-    result = list_tables(catalog_name="main", schema_name="default")
+    result = list_tables(catalog_name="main", schema_name="default")["items"]
     assert len(result) == 1
     assert result[0] == {
         "name": "my_table",
@@ -71,20 +68,18 @@ def test_list_tables_success(mock_db_client_data):
         "comment": "A test table",
         "owner": "admin"
     }
-    mock_db_client_data.tables.list.assert_called_once_with(catalog_name="main", schema_name="default")
+    mock_db_client_data.tables.list.assert_called_once_with(
+        catalog_name="main", schema_name="default", max_results=501, omit_columns=True, omit_properties=True,
+    )
 
 # --- Tests for get_table_schema ---
 def test_get_table_schema_success(mock_db_client_data):
-    col1 = MagicMock()
-    col1.name = "id"; col1.type_text = "int"; col1.position = 0; col1.nullable = False; col1.comment = "ID"
-    col2 = MagicMock()
-    col2.name = "data"; col2.type_text = "string"; col2.position = 1; col2.nullable = True; col2.comment = None
+    col1 = SimpleNamespace(name="id", type_text="int", position=0, nullable=False, comment="ID")
+    col2 = SimpleNamespace(name="data", type_text="string", position=1, nullable=True, comment=None)
 
-    tbl_info = MagicMock()
-    tbl_info.table_type = uc.TableType.EXTERNAL
-    tbl_info.columns = [col1, col2]
-    tbl_info.comment = "Table comment"
-    tbl_info.owner = "admin"
+    tbl_info = SimpleNamespace(
+        table_type=uc.TableType.EXTERNAL, columns=[col1, col2], comment="Table comment", owner="admin",
+    )
 
     mock_db_client_data.tables.get.return_value = tbl_info
     result = get_table_schema(catalog_name="cat", schema_name="sch", table_name="tbl")
@@ -98,38 +93,37 @@ def test_get_table_schema_success(mock_db_client_data):
     mock_db_client_data.tables.get.assert_called_once_with(full_name="cat.sch.tbl")
 
 # --- Tests for preview_table ---
+@pytest.fixture(autouse=True)
+def monotonic_clock():
+    """Drives the preview warehouse cache from a settable clock, starting each test with it empty."""
+    clock = MagicMock(return_value=1000.0)
+    data_resources._invalidate_warehouse_cache()
+    with patch("databricks_mcp.resources.data.time.monotonic", clock):
+        yield clock
+    data_resources._invalidate_warehouse_cache()
+
+
+def _statement(state=sql_service.StatementState.SUCCEEDED, columns=("col_a",), data_array=((1,),), error=None):
+    """A StatementResponse as execute_statement returns it; the manifest sits beside the result, not in it."""
+    return sql_service.StatementResponse(
+        statement_id="stmt-1",
+        status=sql_service.StatementStatus(state=state, error=error),
+        manifest=sql_service.ResultManifest(
+            schema=sql_service.ResultSchema(columns=[sql_service.ColumnInfo(name=name) for name in columns])
+        ),
+        result=sql_service.ResultData(data_array=[list(row) for row in data_array]) if data_array else None,
+    )
+
 def test_preview_table_success(mock_db_client_data):
     # Arrange
     # 1. Mock finding a running warehouse
-    wh_info = MagicMock()
-    wh_info.id = "wh123"
-    wh_info.state = sql_service.State.RUNNING
+    wh_info = SimpleNamespace(id="wh123", state=sql_service.State.RUNNING)
     mock_db_client_data.warehouses.list.return_value = [wh_info]
 
-    # 2. Mock statement execution result
-    col1_schema = MagicMock()
-    col1_schema.name = "col_a"
-    col2_schema = MagicMock()
-    col2_schema.name = "col_b"
-    manifest = MagicMock()
-    manifest.schema = MagicMock()
-    manifest.schema.columns = [col1_schema, col2_schema]
-
-    result_data_mock = MagicMock()
-    result_data_mock.data_array = [[1, "a"], [2, "b"]]
-    result_data_mock.manifest = manifest
-
-    status = MagicMock()
-    status.state = sql_service.StatementState.SUCCEEDED
-
-    statement_resp = MagicMock()
-    statement_resp.status = status
-    statement_resp.result = result_data_mock
-
-    # Simulate execute_statement returning a waiter that returns the response
-    waiter = MagicMock()
-    waiter.result.return_value = statement_resp
-    mock_db_client_data.statement_execution.execute_statement.return_value = waiter
+    # 2. Mock statement execution result; execute_statement waits and returns the response itself
+    mock_db_client_data.statement_execution.execute_statement.return_value = _statement(
+        columns=("col_a", "col_b"), data_array=((1, "a"), (2, "b"))
+    )
 
     # Act
     preview_result = preview_table(catalog_name="cat", schema_name="sch", table_name="tbl", row_limit=50)
@@ -141,7 +135,6 @@ def test_preview_table_success(mock_db_client_data):
         warehouse_id="wh123",
         wait_timeout='50s'
     )
-    waiter.result.assert_called_once()
     assert len(preview_result) == 2
     assert preview_result[0] == {"col_a": 1, "col_b": "a"}
     assert preview_result[1] == {"col_a": 2, "col_b": "b"}
@@ -161,45 +154,117 @@ def test_preview_table_no_warehouse(mock_db_client_data):
 def test_preview_table_query_fails(mock_db_client_data):
      # Arrange
     # 1. Mock finding a running warehouse
-    wh_info = MagicMock()
-    wh_info.id = "wh123"
-    wh_info.state = sql_service.State.RUNNING
+    wh_info = SimpleNamespace(id="wh123", state=sql_service.State.RUNNING)
     mock_db_client_data.warehouses.list.return_value = [wh_info]
     # 2. Mock failed statement execution
-    status = MagicMock()
-    status.state = sql_service.StatementState.FAILED
-    status.error = MagicMock()
-    status.error.message = "Syntax error"
-    statement_resp = MagicMock()
-    statement_resp.status = status
-    statement_resp.result = None
-    waiter = MagicMock(); waiter.result.return_value = statement_resp
-    mock_db_client_data.statement_execution.execute_statement.return_value = waiter
+    mock_db_client_data.statement_execution.execute_statement.return_value = _statement(
+        state=sql_service.StatementState.FAILED, data_array=(), error=sql_service.ServiceError(message="Syntax error")
+    )
     # Act & Assert
     # Import relevant error codes
     from databricks_mcp.error_mapping import CODE_SERVER_ERROR
     with pytest.raises(Exception) as exc_info:
         preview_table(catalog_name="cat", schema_name="sch", table_name="tbl")
     # Check the wrapped exception message for a statement execution failure
-    # The original error is mocked as waiter.result() returning status FAILED
+    # The original error is mocked as execute_statement returning status FAILED
     # This should be caught and likely mapped to CODE_SERVER_ERROR
     assert f"[MCP Error Code {CODE_SERVER_ERROR}]" in str(exc_info.value)
     # The original error message from the mock was "Syntax error"
     assert "Syntax error" in str(exc_info.value)
 
 # --- Tests for list_sql_warehouses ---
+_RUNNING_WAREHOUSE = SimpleNamespace(state=sql_service.State.RUNNING) # warehouses.get response
+
+def test_preview_table_reuses_cached_warehouse(mock_db_client_data, monotonic_clock):
+    mock_db_client_data.warehouses.list.return_value = [SimpleNamespace(id="wh123", state=sql_service.State.RUNNING)]
+    mock_db_client_data.warehouses.get.return_value = _RUNNING_WAREHOUSE
+    mock_db_client_data.statement_execution.execute_statement.return_value = _statement()
+
+    preview_table(catalog_name="cat", schema_name="sch", table_name="tbl")
+    monotonic_clock.return_value = 1059.0
+    assert preview_table(catalog_name="cat", schema_name="sch", table_name="tbl") == [{"col_a": 1}]
+
+    mock_db_client_data.warehouses.list.assert_called_once()
+    mock_db_client_data.warehouses.get.assert_called_once_with(id="wh123")
+    assert mock_db_client_data.statement_execution.execute_statement.call_count == 2
+    assert mock_db_client_data.statement_execution.execute_statement.call_args.kwargs["warehouse_id"] == "wh123"
+
+def test_preview_table_skips_stopped_cached_warehouse(mock_db_client_data):
+    # Arrange - the cached warehouse has stopped since; another one is running now
+    mock_db_client_data.warehouses.list.return_value = [SimpleNamespace(id="wh123", state=sql_service.State.RUNNING)]
+    mock_db_client_data.statement_execution.execute_statement.return_value = _statement()
+    preview_table(catalog_name="cat", schema_name="sch", table_name="tbl")
+    mock_db_client_data.warehouses.get.return_value = SimpleNamespace(state=sql_service.State.STOPPED)
+    mock_db_client_data.warehouses.list.return_value = [SimpleNamespace(id="wh456", state=sql_service.State.RUNNING)]
+
+    # Act
+    preview_table(catalog_name="cat", schema_name="sch", table_name="tbl")
+
+    # Assert - no statement is sent to the stopped warehouse, which would start it
+    warehouse_ids = [c.kwargs["warehouse_id"] for c in mock_db_client_data.statement_execution.execute_statement.call_args_list]
+    assert warehouse_ids == ["wh123", "wh456"]
+
+def test_preview_table_refreshes_when_cached_warehouse_does_not_run_preview(mock_db_client_data):
+    # Arrange - on the cached warehouse the preview is still pending when wait_timeout runs out
+    mock_db_client_data.warehouses.list.return_value = [SimpleNamespace(id="wh123", state=sql_service.State.RUNNING)]
+    mock_db_client_data.statement_execution.execute_statement.return_value = _statement()
+    preview_table(catalog_name="cat", schema_name="sch", table_name="tbl")
+    mock_db_client_data.warehouses.get.return_value = _RUNNING_WAREHOUSE
+    mock_db_client_data.warehouses.list.return_value = [SimpleNamespace(id="wh456", state=sql_service.State.RUNNING)]
+    mock_db_client_data.statement_execution.execute_statement.side_effect = [
+        _statement(state=sql_service.StatementState.PENDING, data_array=()),
+        _statement(),
+    ]
+
+    # Act
+    assert preview_table(catalog_name="cat", schema_name="sch", table_name="tbl") == [{"col_a": 1}]
+
+    # Assert - the pending statement is cancelled and the preview rerun on a running warehouse
+    mock_db_client_data.statement_execution.cancel_execution.assert_called_once_with(statement_id="stmt-1")
+    assert mock_db_client_data.statement_execution.execute_statement.call_args.kwargs["warehouse_id"] == "wh456"
+    assert data_resources._warehouse_cache[0] == "wh456"
+
+def test_preview_table_relists_after_cache_expiry(mock_db_client_data, monotonic_clock):
+    mock_db_client_data.warehouses.list.return_value = [SimpleNamespace(id="wh123", state=sql_service.State.RUNNING)]
+    mock_db_client_data.statement_execution.execute_statement.return_value = _statement()
+
+    preview_table(catalog_name="cat", schema_name="sch", table_name="tbl")
+    monotonic_clock.return_value = 1000.0 + data_resources.WAREHOUSE_CACHE_TTL_SECONDS
+    preview_table(catalog_name="cat", schema_name="sch", table_name="tbl")
+
+    assert mock_db_client_data.warehouses.list.call_count == 2
+
+def test_preview_table_refreshes_rejected_cached_warehouse(mock_db_client_data):
+    mock_db_client_data.warehouses.list.return_value = [SimpleNamespace(id="wh123", state=sql_service.State.RUNNING)]
+    mock_db_client_data.warehouses.get.return_value = _RUNNING_WAREHOUSE
+    mock_db_client_data.statement_execution.execute_statement.return_value = _statement()
+    preview_table(catalog_name="cat", schema_name="sch", table_name="tbl")
+
+    # The cached warehouse was deleted; another one is running now
+    mock_db_client_data.warehouses.list.return_value = [SimpleNamespace(id="wh456", state=sql_service.State.RUNNING)]
+    mock_db_client_data.statement_execution.execute_statement.side_effect = [
+        NotFound("warehouse wh123 does not exist"),
+        _statement(),
+    ]
+    assert preview_table(catalog_name="cat", schema_name="sch", table_name="tbl") == [{"col_a": 1}]
+
+    assert mock_db_client_data.warehouses.list.call_count == 2
+    warehouse_ids = [c.kwargs["warehouse_id"] for c in mock_db_client_data.statement_execution.execute_statement.call_args_list]
+    assert warehouse_ids == ["wh123", "wh123", "wh456"]
+    assert data_resources._warehouse_cache[0] == "wh456"
+
 def test_list_sql_warehouses_success(mock_db_client_data):
-    wh1 = MagicMock()
-    wh1.id = "wh1"; wh1.name = "WH One"
-    wh1.state = sql_service.State.RUNNING
-    wh1.cluster_size = "Medium"; wh1.num_clusters = 1; wh1.creator_name = "u1"
-    wh2 = MagicMock()
-    wh2.id = "wh2"; wh2.name = "WH Two"
-    wh2.state = sql_service.State.STOPPED
-    wh2.cluster_size = "Small"; wh2.num_clusters = 0; wh2.creator_name = "u2"
+    wh1 = SimpleNamespace(
+        id="wh1", name="WH One", state=sql_service.State.RUNNING,
+        cluster_size="Medium", num_clusters=1, creator_name="u1",
+    )
+    wh2 = SimpleNamespace(
+        id="wh2", name="WH Two", state=sql_service.State.STOPPED,
+        cluster_size="Small", num_clusters=0, creator_name="u2",
+    )
 
     mock_db_client_data.warehouses.list.return_value = [wh1, wh2]
-    result = list_sql_warehouses()
+    result = list_sql_warehouses()["items"]
 
     assert len(result) == 2
     assert result[0] == {"id": "wh1", "name": "WH One", "state": "RUNNING", "cluster_size": "Medium", "num_clusters": 1, "creator_name": "u1"}
@@ -1,3 +1,4 @@
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
@@ -8,31 +9,30 @@ from databricks_mcp.resources.files import list_files
 
 
 # Mock the get_db_client function
-@pytest.fixture(autouse=True)
+# One patch per module; _reset_mock_db_client_files gives each test a clean client
+@pytest.fixture(scope="module", autouse=True)
 def mock_db_client_files():
     mock_client = MagicMock()
     with patch('databricks_mcp.resources.files.get_db_client', return_value=mock_client) as mock_get:
         yield mock_client
 
+@pytest.fixture(autouse=True)
+def _reset_mock_db_client_files(mock_db_client_files):
+    yield
+    mock_db_client_files.reset_mock(return_value=True, side_effect=True)
+
 # --- Tests for list_files ---
 
 @pytest.mark.parametrize("path_to_list", ["/dbfs/data", "/mnt/my_mount", "/other/path"])
 def test_list_files_dbfs_paths(mock_db_client_files, path_to_list):
     # Arrange
-    file_info = MagicMock()
-    file_info.path = f"{path_to_list.rstrip('/')}/file.txt"
-    file_info.is_dir = False
-    file_info.file_size = 1024
-
-    dir_info = MagicMock()
-    dir_info.path = f"{path_to_list.rstrip('/')}/subdir"
-    dir_info.is_dir = True
-    dir_info.file_size = 0 # Dirs usually have 0 size
+    file_info = SimpleNamespace(path=f"{path_to_list.rstrip('/')}/file.txt", is_dir=False, file_size=1024)
+    dir_info = SimpleNamespace(path=f"{path_to_list.rstrip('/')}/subdir", is_dir=True, file_size=0) # Dirs usually have 0 size
 
     mock_db_client_files.dbfs.list.return_value = [file_info, dir_info]
 
     # Act
-    result = list_files(path=path_to_list)
+    result = list_files(path=path_to_list)["items"]
 
     # Assert
     mock_db_client_files.dbfs.list.assert_called_once_with(path=path_to_list)
@@ -40,20 +40,25 @@ def test_list_files_dbfs_paths(mock_db_client_files, path_to_list):
     assert result[0] == {"path": f"{path_to_list.rstrip('/')}/file.txt", "is_dir": False, "size": 1024}
     assert result[1] == {"path": f"{path_to_list.rstrip('/')}/subdir", "is_dir": True, "size": 0}
 
-def test_list_files_volume_path_uses_dbfs_api(mock_db_client_files):
-    """Verify (for now) that Volume paths also call the dbfs.list mock"""
-     # Arrange
+def test_list_files_volume_path_uses_files_api(mock_db_client_files):
+    # Arrange
     volume_path = "/Volumes/main/default/myvol"
-    file_info = MagicMock()
-    file_info.path = f"{volume_path}/vol_file.csv"
-    file_info.is_dir = False
-    file_info.file_size = 500
-    mock_db_client_files.dbfs.list.return_value = [file_info]
+    entries = [
+        dbfs_service.DirectoryEntry(path=f"{volume_path}/vol_file.csv", is_directory=False, file_size=500),
+        dbfs_service.DirectoryEntry(path=f"{volume_path}/subdir/", is_directory=True),
+    ]
+    mock_db_client_files.files.list_directory_contents.return_value = iter(entries)
 
     # Act
     result = list_files(path=volume_path)
 
     # Assert
-    mock_db_client_files.dbfs.list.assert_called_once_with(path=volume_path)
-    assert len(result) == 1
-    assert result[0]["path"] == f"{volume_path}/vol_file.csv"
+    mock_db_client_files.files.list_directory_contents.assert_called_once_with(directory_path=volume_path)
+    mock_db_client_files.dbfs.list.assert_not_called()
+    assert result == {
+        "items": [
+            {"path": f"{volume_path}/vol_file.csv", "is_dir": False, "size": 500},
+            {"path": f"{volume_path}/subdir/", "is_dir": True, "size": None},
+        ],
+        "truncated": False,
+    }
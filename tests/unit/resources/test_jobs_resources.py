@@ -1,6 +1,3 @@
-from unittest.mock import MagicMock
-from unittest.mock import patch
-
 import pytest
 from databricks.sdk.service import jobs as jobs_service
 
@@ -9,27 +6,33 @@ from databricks_mcp.resources.jobs import list_job_runs
 from databricks_mcp.resources.jobs import list_jobs
 
 
+# SDK enum members used by the run fixtures, resolved once
+_TERMINATED = jobs_service.RunLifeCycleState.TERMINATED
+_RUNNING = jobs_service.RunLifeCycleState.RUNNING
+_RES_SUCCESS = jobs_service.RunResultState.SUCCESS
+_RES_FAILED = jobs_service.RunResultState.FAILED
+_TRIG_PERIODIC = jobs_service.TriggerType.PERIODIC
+
 # Mock the get_db_client function
 @pytest.fixture(autouse=True)
-def mock_db_client_jobs():
-    mock_client = MagicMock()
-    with patch('databricks_mcp.resources.jobs.get_db_client', return_value=mock_client) as mock_get:
-        yield mock_client
+def mock_db_client_jobs(_db_client_template):
+    # get_db_client already returns the shared mock (see conftest.py); give each test a clean one
+    _db_client_template.reset_mock(return_value=True, side_effect=True)
+    return _db_client_template
 
 # --- Tests for list_jobs ---
 def test_list_jobs_success(mock_db_client_jobs):
     # Arrange
-    job1_settings = MagicMock(spec=jobs_service.JobSettings)
-    job1_settings.name = "Job One"
-    job1_settings.schedule = MagicMock(spec=jobs_service.CronSchedule)
-    job1_settings.schedule.quartz_cron_expression = "0 0 1 * * ?"
-    job1_settings.schedule.timezone_id = "UTC"
-
-    job1 = MagicMock(spec=jobs_service.Job)
-    job1.job_id = 101
-    job1.creator_user_name = "user1"
-    job1.created_time = 1678886400000
-    job1.settings = job1_settings
+    # Real SDK dataclasses: unset fields default to None, with no spec introspection per object
+    job1 = jobs_service.Job(
+        job_id=101,
+        creator_user_name="user1",
+        created_time=1678886400000,
+        settings=jobs_service.JobSettings(
+            name="Job One",
+            schedule=jobs_service.CronSchedule(quartz_cron_expression="0 0 1 * * ?", timezone_id="UTC"),
+        ),
+    )
 
     mock_db_client_jobs.jobs.list.return_value = [job1]
 
@@ -58,15 +61,13 @@ def test_list_jobs_with_filter(mock_db_client_jobs):
 def test_get_job_details_success(mock_db_client_jobs):
     # Arrange
     mock_settings_dict = {"name": "Detailed Job", "tasks": [{"task_key": "A", "notebook_task": {"notebook_path": "/nb"}}]}
-    mock_settings = MagicMock(spec=jobs_service.JobSettings)
-    mock_settings.as_dict.return_value = mock_settings_dict # Mock the dict conversion
-
-    mock_job = MagicMock(spec=jobs_service.Job)
-    mock_job.job_id = 202
-    mock_job.creator_user_name = "creator"
-    mock_job.created_time = 1678880000000
-    mock_job.run_as_user_name = "service_principal"
-    mock_job.settings = mock_settings
+    mock_job = jobs_service.Job(
+        job_id=202,
+        creator_user_name="creator",
+        created_time=1678880000000,
+        run_as_user_name="service_principal",
+        settings=jobs_service.JobSettings.from_dict(mock_settings_dict),
+    )
 
     mock_db_client_jobs.jobs.get.return_value = mock_job
 
@@ -86,20 +87,20 @@ def test_get_job_details_success(mock_db_client_jobs):
 # --- Tests for list_job_runs ---
 def test_list_job_runs_success(mock_db_client_jobs):
     # Arrange
-    run1_state = MagicMock(spec=jobs_service.RunState)
-    run1_state.life_cycle_state = jobs_service.RunLifeCycleState.TERMINATED
-    run1_state.result_state = jobs_service.RunResultState.SUCCESS
-    run1_state.state_message = "Finished"
-
-    run1 = MagicMock(spec=jobs_service.Run)
-    run1.run_id = 5001
-    run1.job_id = 303
-    run1.start_time = 1678890000000
-    run1.end_time = 1678890100000
-    run1.execution_duration = 100000
-    run1.state = run1_state
-    run1.run_page_url = "http://..."
-    run1.trigger = jobs_service.TriggerType.PERIODIC
+    run1 = jobs_service.Run(
+        run_id=5001,
+        job_id=303,
+        start_time=1678890000000,
+        end_time=1678890100000,
+        execution_duration=100000,
+        state=jobs_service.RunState(
+            life_cycle_state=_TERMINATED,
+            result_state=_RES_SUCCESS,
+            state_message="Finished",
+        ),
+        run_page_url="http://...",
+        trigger=_TRIG_PERIODIC,
+    )
 
     mock_db_client_jobs.jobs.list_runs.return_value = [run1]
 
@@ -122,22 +123,21 @@ def test_list_job_runs_success(mock_db_client_jobs):
         "trigger_type": "PERIODIC",
     }
 
-def test_list_job_runs_with_status_filter(mock_db_client_jobs):
-     # Arrange
-    run_term_succ = MagicMock(spec=jobs_service.Run); run_term_succ.run_id = 1
-    run_term_succ.state = MagicMock(); run_term_succ.state.life_cycle_state = jobs_service.RunLifeCycleState.TERMINATED
-    run_term_succ.state.result_state = jobs_service.RunResultState.SUCCESS
-
-    run_term_fail = MagicMock(spec=jobs_service.Run); run_term_fail.run_id = 2
-    run_term_fail.state = MagicMock(); run_term_fail.state.life_cycle_state = jobs_service.RunLifeCycleState.TERMINATED
-    run_term_fail.state.result_state = jobs_service.RunResultState.FAILED
+# Runs in each life cycle state, built once; list_job_runs only reads them
+def _run(run_id, life_cycle_state, result_state=None):
+    return jobs_service.Run(
+        run_id=run_id,
+        state=jobs_service.RunState(life_cycle_state=life_cycle_state, result_state=result_state),
+    )
 
-    run_running = MagicMock(spec=jobs_service.Run); run_running.run_id = 3
-    run_running.state = MagicMock(); run_running.state.life_cycle_state = jobs_service.RunLifeCycleState.RUNNING
-    run_running.state.result_state = None # No result state yet
+_RUN_TERM_SUCC = _run(1, _TERMINATED, _RES_SUCCESS)
+_RUN_TERM_FAIL = _run(2, _TERMINATED, _RES_FAILED)
+_RUN_RUNNING = _run(3, _RUNNING) # No result state yet
 
+def test_list_job_runs_with_status_filter(mock_db_client_jobs):
+     # Arrange
     # Mock SDK returning all runs (filtering happens in our code for this test)
-    mock_db_client_jobs.jobs.list_runs.return_value = [run_term_succ, run_term_fail, run_running]
+    mock_db_client_jobs.jobs.list_runs.return_value = [_RUN_TERM_SUCC, _RUN_TERM_FAIL, _RUN_RUNNING]
 
     # Act
     result = list_job_runs(job_id=404, status_filter="TERMINATED") # Filter for TERMINATED
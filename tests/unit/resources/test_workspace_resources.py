@@ -1,6 +1,5 @@
 import base64
-from unittest.mock import MagicMock
-from unittest.mock import patch
+from types import SimpleNamespace
 
 import pytest
 from databricks.sdk.service import workspace as workspace_service
@@ -9,30 +8,24 @@ from databricks_mcp.resources.workspace import get_notebook_content
 from databricks_mcp.resources.workspace import get_repo_status
 from databricks_mcp.resources.workspace import list_repos
 from databricks_mcp.resources.workspace import list_workspace_items
-from databricks_mcp.db_client import get_db_client # To mock
 
+# Notebook source and its export encoding, computed once at import
+_RAW_NB = "# Databricks notebook source\nprint('hello')"
+_ENCODED_NB = base64.b64encode(_RAW_NB.encode('utf-8')).decode('ascii')
 
 # Mock the get_db_client function
 @pytest.fixture(autouse=True)
-def mock_db_client_ws(): # Changed fixture name slightly to avoid potential clashes
-    mock_client = MagicMock()
-    # Assign unused variable to _
-    with patch('databricks_mcp.resources.workspace.get_db_client', return_value=mock_client) as _:
-        yield mock_client
+def mock_db_client_ws(_db_client_template): # Changed fixture name slightly to avoid potential clashes
+    # get_db_client already returns the shared mock (see conftest.py); give each test a clean one
+    _db_client_template.reset_mock(return_value=True, side_effect=True)
+    return _db_client_template
 
 # --- Tests for list_workspace_items ---
 
 def test_list_workspace_items_success(mock_db_client_ws):
     # Arrange
-    item1 = MagicMock()
-    item1.path = "/Users/test/notebook"
-    item1.object_type = workspace_service.ObjectType.NOTEBOOK
-    item1.object_id = 123
-
-    item2 = MagicMock()
-    item2.path = "/Users/test/folder"
-    item2.object_type = workspace_service.ObjectType.DIRECTORY
-    item2.object_id = 456
+    item1 = SimpleNamespace(path="/Users/test/notebook", object_type=workspace_service.ObjectType.NOTEBOOK, object_id=123)
+    item2 = SimpleNamespace(path="/Users/test/folder", object_type=workspace_service.ObjectType.DIRECTORY, object_id=456)
 
     mock_db_client_ws.workspace.list.return_value = [item1, item2]
 
@@ -50,14 +43,8 @@ def test_list_workspace_items_success(mock_db_client_ws):
 def test_get_notebook_content_success(mock_db_client_ws):
     # Arrange
     notebook_path = "/Users/test/my_notebook"
-    raw_content = "# Databricks notebook source\nprint('hello')"
-    encoded_content = base64.b64encode(raw_content.encode('utf-8')).decode('ascii')
-
-    mock_export = MagicMock()
-    mock_export.content = encoded_content
-
-    mock_status = MagicMock()
-    mock_status.language = workspace_service.Language.PYTHON
+    mock_export = SimpleNamespace(content=_ENCODED_NB)
+    mock_status = SimpleNamespace(language=workspace_service.Language.PYTHON)
 
     mock_db_client_ws.workspace.export.return_value = mock_export
     mock_db_client_ws.workspace.get_status.return_value = mock_status
@@ -69,7 +56,7 @@ def test_get_notebook_content_success(mock_db_client_ws):
     mock_db_client_ws.workspace.export.assert_called_once_with(path=notebook_path, format=workspace_service.ExportFormat.SOURCE)
     mock_db_client_ws.workspace.get_status.assert_called_once_with(path=notebook_path)
     assert result["path"] == notebook_path
-    assert result["content"] == raw_content
+    assert result["content"] == _RAW_NB
     assert result["language"] == "PYTHON"
 
 def test_get_notebook_content_decode_error(mock_db_client_ws):
@@ -77,11 +64,8 @@ def test_get_notebook_content_decode_error(mock_db_client_ws):
     notebook_path = "/Users/test/bad_notebook"
     bad_encoded_content = "this is not base64" # Invalid base64
 
-    mock_export = MagicMock()
-    mock_export.content = bad_encoded_content
-
-    mock_status = MagicMock()
-    mock_status.language = None # No language info
+    mock_export = SimpleNamespace(content=bad_encoded_content)
+    mock_status = SimpleNamespace(language=None) # No language info
 
     mock_db_client_ws.workspace.export.return_value = mock_export
     mock_db_client_ws.workspace.get_status.return_value = mock_status # Or mock it to raise
@@ -99,12 +83,13 @@ def test_get_notebook_content_decode_error(mock_db_client_ws):
 
 def test_list_repos_success(mock_db_client_ws):
     # Arrange
-    repo1 = MagicMock()
-    repo1.id = "repo1"
-    repo1.path = "/Repos/test/repo-one"
-    repo1.url = "git@github.com:user/repo-one.git"
-    repo1.branch = "main"
-    repo1.head_commit_id = "abc123def"
+    repo1 = SimpleNamespace(
+        id="repo1",
+        path="/Repos/test/repo-one",
+        url="git@github.com:user/repo-one.git",
+        branch="main",
+        head_commit_id="abc123def",
+    )
 
     mock_db_client_ws.repos.list.return_value = [repo1]
 
@@ -127,11 +112,12 @@ def test_list_repos_success(mock_db_client_ws):
 def test_get_repo_status_success(mock_db_client_ws):
      # Arrange
     repo_id_to_get = "repo-xyz"
-    mock_repo_info = MagicMock()
-    mock_repo_info.id = repo_id_to_get
-    mock_repo_info.url = "git@github.com:org/repo-xyz.git"
-    mock_repo_info.branch = "develop"
-    mock_repo_info.head_commit_id = "fed456cba"
+    mock_repo_info = SimpleNamespace(
+        id=repo_id_to_get,
+        url="git@github.com:org/repo-xyz.git",
+        branch="develop",
+        head_commit_id="fed456cba",
+    )
 
     mock_db_client_ws.repos.get.return_value = mock_repo_info
 
@@ -0,0 +1,40 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from databricks_mcp import app as app_module
+from databricks_mcp.app import DatabricksMCP
+
+
+def _server_with_tool(result):
+    server = DatabricksMCP(server_name="test")
+
+    @server.tool(name="echo")
+    def echo() -> dict:
+        return result
+
+    return server
+
+
+@pytest.mark.asyncio
+async def test_call_tool_serializes_dict_results_with_orjson():
+    pytest.importorskip("orjson")
+    result = {"status": "SUCCEEDED", "result_data": [{"id": 1, "name": "a"}], "schema": None}
+    server = _server_with_tool(result)
+
+    content = await server.call_tool("echo", {})
+
+    assert len(content) == 1
+    assert json.loads(content[0].text) == result
+
+
+@pytest.mark.asyncio
+async def test_call_tool_without_orjson_uses_default_conversion():
+    result = {"status": "SUCCEEDED"}
+    server = _server_with_tool(result)
+
+    with patch.object(app_module, "orjson", None):
+        content = await server.call_tool("echo", {})
+
+    assert json.loads(content[0].text) == result
@@ -0,0 +1,20 @@
+import pytest
+from pydantic import ValidationError
+
+from databricks_mcp.config import Settings
+
+
+def test_replay_mode_requires_enabled_caches():
+    with pytest.raises(ValidationError, match="ML_CACHE_REPLAY=true requires SERVING_PREDICTION_CACHE_SIZE > 0"):
+        Settings(_env_file=None, ml_cache_replay=True, serving_prediction_cache_size=0, vector_query_cache_size=128)
+
+
+def test_replay_mode_accepts_enabled_caches():
+    settings = Settings(_env_file=None, ml_cache_replay=True, serving_prediction_cache_size=128, vector_query_cache_size=128)
+    assert settings.ml_cache_replay
+
+
+def test_query_caches_are_off_by_default():
+    settings = Settings(_env_file=None)
+    assert settings.serving_prediction_cache_size == 0
+    assert settings.vector_query_cache_size == 0
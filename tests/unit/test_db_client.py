@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from databricks_mcp import db_client
+
+
+@pytest.fixture
+def mock_sdk_config(monkeypatch):
+    mock_config = MagicMock()
+    monkeypatch.setattr(db_client, "Config", mock_config)
+    return mock_config
+
+
+@pytest.fixture
+def mock_workspace_client(monkeypatch):
+    mock_ws = MagicMock()
+    monkeypatch.setattr(db_client, "WorkspaceClient", mock_ws)
+    return mock_ws
+
+
+def _set_http_settings(monkeypatch, timeout, pool_size, retry_timeout):
+    monkeypatch.setattr(db_client.settings, "databricks_http_timeout_seconds", timeout)
+    monkeypatch.setattr(db_client.settings, "databricks_http_pool_size", pool_size)
+    monkeypatch.setattr(db_client.settings, "databricks_http_retry_timeout_seconds", retry_timeout)
+
+
+def test_build_sdk_config_applies_http_settings(monkeypatch, mock_sdk_config):
+    _set_http_settings(monkeypatch, 30, 64, 90)
+    db_client._build_sdk_config()
+
+    mock_sdk_config.assert_called_once_with(
+        http_timeout_seconds=30,
+        max_connection_pools=64,
+        max_connections_per_pool=64,
+        retry_timeout_seconds=90,
+    )
+
+
+def test_build_sdk_config_keeps_sdk_defaults_when_unset(monkeypatch, mock_sdk_config):
+    _set_http_settings(monkeypatch, None, None, None)
+    db_client._build_sdk_config()
+
+    mock_sdk_config.assert_called_once_with()
+
+
+@pytest.mark.usefixtures("mock_sdk_config")
+def test_reset_db_client_forces_rebuild(mock_workspace_client):
+    db_client.reset_db_client()
+    first = db_client.get_db_client()
+    assert db_client.get_db_client() is first
+    db_client.reset_db_client()
+    db_client.get_db_client()
+
+    assert mock_workspace_client.call_count == 2
+    db_client.reset_db_client()
@@ -0,0 +1,32 @@
+import pytest
+from databricks.sdk.errors import DatabricksError, NotFound, ResourceDoesNotExist
+
+from databricks_mcp import error_mapping
+from databricks_mcp.error_mapping import CODE_INTERNAL_ERROR, CODE_INVALID_PARAMS, CODE_RATE_LIMIT, CODE_RESOURCE_NOT_FOUND
+
+
+@error_mapping.map_databricks_errors
+def _raise(error):
+    raise error
+
+
+@pytest.mark.parametrize(
+    ("error", "expected_code"),
+    [
+        pytest.param(NotFound("missing"), CODE_RESOURCE_NOT_FOUND, id="mapped"),
+        pytest.param(ResourceDoesNotExist("gone"), CODE_RESOURCE_NOT_FOUND, id="mapped_subclass"),
+        pytest.param(DatabricksError("slow down", error_code="REQUEST_LIMIT_EXCEEDED"), CODE_RATE_LIMIT, id="rate_limit"),
+        pytest.param(ValueError("bad argument"), CODE_INVALID_PARAMS, id="value_error"),
+        pytest.param(RuntimeError("boom"), CODE_INTERNAL_ERROR, id="unmapped"),
+    ],
+)
+def test_map_databricks_errors_codes(error, expected_code):
+    with pytest.raises(Exception, match=rf"\[MCP Error Code {expected_code}\]"):
+        _raise(error)
+
+
+def test_mapped_code_is_cached_per_exception_class():
+    error_mapping._mapped_code.cache_clear()
+    _ = [error_mapping._mapped_code(NotFound) for _ in range(3)]
+    assert error_mapping._mapped_code.cache_info().hits == 2
+    assert error_mapping._mapped_code(RuntimeError) is None
@@ -0,0 +1,25 @@
+import logging
+import logging.handlers
+
+from databricks_mcp import logging_config
+
+
+def test_setup_logging_routes_records_through_queue():
+    root = logging.getLogger()
+    saved_handlers = root.handlers[:]
+    saved_level = root.level
+    root.handlers = []
+    try:
+        logging_config.setup_logging()
+        listener = logging_config._queue_listener
+
+        assert listener is not None
+        assert any(isinstance(h, logging.handlers.QueueHandler) for h in root.handlers)
+
+        # A second call must not start another listener
+        logging_config.setup_logging()
+        assert logging_config._queue_listener is listener
+    finally:
+        logging_config._stop_queue_listener()
+        root.handlers = saved_handlers
+        root.setLevel(saved_level)
@@ -0,0 +1,16 @@
+import itertools
+
+from databricks_mcp import polling
+
+
+def test_poll_schedule_backs_off_to_cap_with_jitter():
+    delays = list(itertools.islice(polling.poll_schedule(2.0, 30.0), 10))
+    assert 1.6 <= delays[0] <= 2.4
+    assert 2.72 <= delays[1] <= 4.08 # 2 * 1.7, +/-20%
+    assert all(24.0 <= d <= 36.0 for d in delays[6:])
+
+
+def test_poll_intervals_floor_caller_values():
+    assert polling.poll_intervals(None, None) == (2.0, 30.0)
+    assert polling.poll_intervals(0.1, 0.5) == (1.0, 1.0)
+    assert polling.poll_intervals(10, 5) == (10, 10)
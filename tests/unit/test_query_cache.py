@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import patch
+
+from databricks_mcp.query_cache import QueryCache
+
+SCOPE = ("idx", ("id",), None, 10, "ANN")
+
+
+def test_exact_text_hit_and_ttl_expiry():
+    cache = QueryCache(max_size=8, ttl_seconds=60)
+    with patch("databricks_mcp.query_cache.time.monotonic", return_value=100.0):
+        cache.put(SCOPE, {"results": [[1]]}, query_text="q")
+        assert cache.get(SCOPE, query_text="q") == {"results": [[1]]}
+    with patch("databricks_mcp.query_cache.time.monotonic", return_value=161.0):
+        assert cache.get(SCOPE, query_text="q") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction_past_max_size():
+    cache = QueryCache(max_size=2, ttl_seconds=60)
+    cache.put(SCOPE, {"n": 1}, query_text="a")
+    cache.put(SCOPE, {"n": 2}, query_text="b")
+    cache.get(SCOPE, query_text="a") # "a" becomes most recently used
+    cache.put(SCOPE, {"n": 3}, query_text="c")
+    assert cache.get(SCOPE, query_text="b") is None
+    assert cache.get(SCOPE, query_text="a") == {"n": 1}
+
+
+def test_similar_vector_hit_only_below_exact_threshold():
+    exact = QueryCache(max_size=8, ttl_seconds=60)
+    exact.put(SCOPE, {"n": 1}, query_vector=[1.0, 0.0])
+    assert exact.get(SCOPE, query_vector=[0.99, 0.01]) is None
+
+    similar = QueryCache(max_size=8, ttl_seconds=60, min_similarity=0.95)
+    similar.put(SCOPE, {"n": 1}, query_vector=[1.0, 0.0])
+    assert similar.get(SCOPE, query_vector=[0.99, 0.01]) == {"n": 1}
+    assert similar.get(SCOPE, query_vector=[0.0, 1.0]) is None
+
+
+def test_invalidate_drops_only_that_index():
+    cache = QueryCache(max_size=8, ttl_seconds=60)
+    other_scope = ("other",) + SCOPE[1:]
+    cache.put(SCOPE, {"n": 1}, query_text="q")
+    cache.put(other_scope, {"n": 2}, query_text="q")
+    assert cache.invalidate("idx") == 1 # new version of "idx"
+    assert cache.get(SCOPE, query_text="q") is None
+    assert cache.get(other_scope, query_text="q") == {"n": 2}
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = QueryCache(max_size=100, ttl_seconds=60, max_bytes=60)
+    cache.put(SCOPE, {"v": "x" * 25}, query_text="a")
+    cache.put(SCOPE, {"v": "y" * 25}, query_text="b")
+    assert cache.get(SCOPE, query_text="a") is None
+    assert cache.get(SCOPE, query_text="b") == {"v": "y" * 25}
+
+
+def test_put_skips_size_estimate_without_byte_budget():
+    cache = QueryCache(max_size=8, ttl_seconds=60)
+    with patch("databricks_mcp.query_cache._estimate_size") as estimate:
+        cache.put(SCOPE, {"n": 1}, query_text="q")
+    estimate.assert_not_called()
+    assert cache.get(SCOPE, query_text="q") == {"n": 1}
+
+
+def test_lookup_reports_similarity_of_approximate_hit():
+    cache = QueryCache(max_size=8, ttl_seconds=60, min_similarity=0.95)
+    cache.put(SCOPE, {"n": 1}, query_vector=[1.0, 0.0])
+    assert cache.lookup(SCOPE, query_vector=[1.0, 0.0]) == ({"n": 1}, 1.0)
+    response, similarity = cache.lookup(SCOPE, query_vector=[0.99, 0.01])
+    assert response == {"n": 1} and 0.95 <= similarity < 1.0
+
+
+def test_threshold_adapts_per_index_within_floor():
+    cache = QueryCache(max_size=8, ttl_seconds=60, min_similarity=0.9, index_similarity={"other": 0.97})
+    assert cache.threshold("other") == 0.97
+    assert cache.record_verification("idx", agreed=False) == pytest.approx(0.91)
+    assert cache.record_verification("idx", agreed=True) == pytest.approx(0.909)
+    for _ in range(20):
+        cache.record_verification("idx", agreed=True)
+    assert cache.threshold("idx") == 0.9
+    assert cache.threshold("other") == 0.97
+
+    # A tightened threshold stops answering vectors that used to match
+    cache.put(SCOPE, {"n": 1}, query_vector=[1.0, 0.0])
+    assert cache.get(SCOPE, query_vector=[0.95, 0.32]) is not None
+    for _ in range(5):
+        cache.record_verification("idx", agreed=False)
+    assert cache.get(SCOPE, query_vector=[0.95, 0.32]) is None
+
+
+def test_invalidate_retires_similar_vectors_and_rejects_racing_puts():
+    cache = QueryCache(max_size=8, ttl_seconds=60, min_similarity=0.9)
+    cache.put(SCOPE, {"n": 1}, query_vector=[1.0, 0.0])
+    version = cache.version("idx") # read by a query that is still running
+    cache.invalidate("idx")
+    assert cache.get(SCOPE, query_vector=[0.99, 0.01]) is None
+
+    cache.put(SCOPE, {"n": 2}, query_vector=[1.0, 0.0], version=version)
+    assert cache.get(SCOPE, query_vector=[1.0, 0.0]) is None
+    cache.put(SCOPE, {"n": 3}, query_vector=[1.0, 0.0], version=cache.version("idx"))
+    assert cache.get(SCOPE, query_vector=[1.0, 0.0]) == {"n": 3}
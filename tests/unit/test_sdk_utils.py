@@ -0,0 +1,13 @@
+from databricks_mcp.sdk_utils import shape_rows
+
+
+def test_shape_rows_matches_dict_zip():
+    columns = ("id", "it's \"quoted\"", "id")
+    rows = [[1, "x", 3], [4, "y", 6]]
+    assert shape_rows(columns, rows) == [dict(zip(columns, row)) for row in rows]
+    # Short rows fall back to zip() truncation
+    assert shape_rows(("a", "b"), [[1, 2], [3]]) == [{"a": 1, "b": 2}, {"a": 3}]
+
+
+def test_shape_rows_columnar():
+    assert shape_rows(("a", "b"), [[1, 2]], "columnar") == {"columns": ["a", "b"], "rows": [[1, 2]]}
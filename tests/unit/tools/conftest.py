@@ -0,0 +1,28 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+# Tool modules whose get_db_client is swapped once for the whole package
+_TOOL_MODULES = ("compute", "data", "files", "jobs", "ml", "secrets", "workspace")
+
+
+@pytest.fixture(scope="session")
+def _tool_client_template():
+    # One client mock for the whole session; tool_client resets it before each test that asks for it
+    return MagicMock()
+
+
+@pytest.fixture(scope="package", autouse=True)
+def _patch_shared_tool_client(_tool_client_template):
+    # Point get_db_client at the shared mock once, instead of patching per module or test
+    with pytest.MonkeyPatch.context() as mp:
+        for module in _TOOL_MODULES:
+            mp.setattr(f"databricks_mcp.tools.{module}.get_db_client", lambda: _tool_client_template)
+        yield
+
+
+@pytest.fixture
+def tool_client(_tool_client_template):
+    # Clear return values, side effects and call history left by the previous test
+    _tool_client_template.reset_mock(return_value=True, side_effect=True)
+    return _tool_client_template
@@ -1,41 +1,44 @@
 import pytest
-from unittest.mock import MagicMock, patch
-from databricks.sdk.service import compute as compute_service
+from unittest.mock import MagicMock
 from databricks.sdk.errors import NotFound
 
 from databricks_mcp.tools.compute import start_cluster, terminate_cluster
-from databricks_mcp.db_client import get_db_client # To mock
 from databricks_mcp.error_mapping import CODE_RESOURCE_NOT_FOUND # Import error code directly
 
-# Mock the get_db_client function used by the tools
+# Mock the get_db_client function used by the tools (swapped once in conftest.py)
 @pytest.fixture(autouse=True)
-def mock_db_client():
-    mock_client = MagicMock()
+def mock_db_client(tool_client):
+    # tool_client arrives reset (see conftest.py); re-wire the waiters
     # Mock the result() method often chained in the tools
     mock_waiter = MagicMock()
     mock_waiter.result.return_value = None # Simulate successful wait
 
     # Configure SDK methods to return the waiter
-    mock_client.clusters.start.return_value = mock_waiter
-    mock_client.clusters.delete.return_value = mock_waiter
-
-    # Assign unused variable to _
-    with patch('databricks_mcp.tools.compute.get_db_client', return_value=mock_client) as _:
-        yield mock_client # Provide the mocked client instance if needed in tests
-
-
-# --- Tests for start_cluster ---
-
-def test_start_cluster_success(mock_db_client):
-    """Verify start_cluster calls SDK correctly on success."""
+    tool_client.clusters.start.return_value = mock_waiter
+    tool_client.clusters.delete.return_value = mock_waiter
+    return tool_client # Provide the mocked client instance if needed in tests
+
+
+# --- Tests for start_cluster / terminate_cluster ---
+
+@pytest.mark.parametrize(
+    ("tool", "sdk_method", "cluster_id", "status"),
+    [
+        pytest.param(start_cluster, "start", "start-me", "STARTED", id="start"),
+        pytest.param(terminate_cluster, "delete", "stop-me", "TERMINATED", id="terminate"),
+    ],
+)
+def test_cluster_action_success(mock_db_client, tool, sdk_method, cluster_id, status):
+    """Verify start/terminate_cluster call the SDK and wait on its waiter on success."""
     # Act
-    result = start_cluster(cluster_id="start-me")
+    result = tool(cluster_id=cluster_id)
 
     # Assert
-    mock_db_client.clusters.start.assert_called_once_with(cluster_id="start-me")
+    method = getattr(mock_db_client.clusters, sdk_method)
+    method.assert_called_once_with(cluster_id=cluster_id)
     # Check if the waiter's result method was called
-    mock_db_client.clusters.start.return_value.result.assert_called_once()
-    assert result == {"cluster_id": "start-me", "status": "STARTED"}
+    method.return_value.result.assert_called_once()
+    assert result == {"cluster_id": cluster_id, "status": status}
 
 def test_start_cluster_sdk_error_mapped(mock_db_client):
     """Verify SDK errors are mapped by the decorator."""
@@ -55,16 +58,6 @@ def test_start_cluster_sdk_error_mapped(mock_db_client):
 
 # --- Tests for terminate_cluster ---
 
-def test_terminate_cluster_success(mock_db_client):
-    """Verify terminate_cluster calls SDK correctly on success."""
-    # Act
-    result = terminate_cluster(cluster_id="stop-me")
-
-    # Assert
-    mock_db_client.clusters.delete.assert_called_once_with(cluster_id="stop-me")
-    mock_db_client.clusters.delete.return_value.result.assert_called_once()
-    assert result == {"cluster_id": "stop-me", "status": "TERMINATED"}
-
 def test_terminate_cluster_sdk_error_mapped(mock_db_client):
     """Verify SDK errors are mapped by the decorator for terminate."""
     # Arrange
@@ -1,45 +1,51 @@
+import asyncio
+import time
 import pytest
-import json
 from unittest.mock import MagicMock, patch
 from databricks.sdk.service import sql as sql_service
+from databricks.sdk.errors import NotFound
 
+from databricks_mcp.tools import data as data_tools
 from databricks_mcp.tools.data import (
     execute_sql,
     get_statement_result,
     start_sql_warehouse,
     stop_sql_warehouse
 )
-from databricks_mcp.db_client import get_db_client # To mock
+from databricks_mcp.error_mapping import CODE_RESOURCE_NOT_FOUND
 
-# Mock the get_db_client function
+# SDK response pieces as real SDK dataclasses, built once at import; the tools only read them
+_PENDING = sql_service.StatementState.PENDING
+_SUCCEEDED = sql_service.StatementState.SUCCEEDED
+_EXEC_RESPONSE = sql_service.StatementResponse(statement_id="stmt-123", status=sql_service.StatementStatus(state=_PENDING))
+_RESULT = sql_service.ResultData(data_array=[[1, "a"], [2, "b"]])
+_MANIFEST = sql_service.ResultManifest(
+    schema=sql_service.ResultSchema(columns=[sql_service.ColumnInfo(name="colA"), sql_service.ColumnInfo(name="colB")]),
+    total_chunk_count=1,
+)
+_REMAINING_CHUNKS = {1: sql_service.ResultData(data_array=[[3, "c"]]), 2: sql_service.ResultData(data_array=[[4, "d"]])}
+
+# Single-flight key of get_statement_result(statement_id="stmt-123") with default arguments
+_DEFAULT_INFLIGHT_KEY = ("stmt-123", 0, False, False, "records")
+
+# Fresh get_statement response around the shared pieces; tests swap pieces instead of mutating them
+def _statement(state=_SUCCEEDED, result=_RESULT, manifest=_MANIFEST, error=None):
+    return sql_service.StatementResponse(
+        statement_id="stmt-123",
+        status=sql_service.StatementStatus(state=state, error=error),
+        result=result,
+        manifest=manifest,
+    )
+
+# Mock the get_db_client function (swapped once in conftest.py)
 @pytest.fixture(autouse=True)
-def mock_db_client_data_tools():
-    mock_client = MagicMock()
+def mock_db_client_data_tools(tool_client):
+    # tool_client arrives reset (see conftest.py); re-wire the canned responses
+    mock_client = tool_client
 
-    # Mock execute_statement response
-    mock_exec_resp = MagicMock()
-    mock_exec_resp.statement_id = "stmt-123"
-    mock_exec_resp.status = MagicMock()
     # Changed default fixture status to PENDING as execute_statement is async
-    mock_exec_resp.status.state = sql_service.StatementState.PENDING
-    mock_client.statement_execution.execute_statement.return_value = mock_exec_resp
-
-    # Mock get_statement response
-    mock_get_resp = MagicMock()
-    mock_get_resp.statement_id = "stmt-123"
-    mock_get_resp.status = MagicMock()
-    mock_get_resp.status.state = sql_service.StatementState.SUCCEEDED
-    mock_get_resp.result = MagicMock()
-    mock_get_resp.result.data_array = [[1, "a"], [2, "b"]]
-    mock_get_resp.result.manifest = MagicMock()
-    # Create a mock schema object explicitly
-    mock_schema = MagicMock()
-    col1 = MagicMock(name="colA")
-    col2 = MagicMock(name="colB")
-    mock_schema.columns = [col1, col2] # Assign list to mock schema's columns
-    # Assign the mock schema to the manifest
-    mock_get_resp.result.manifest.schema = mock_schema
-    mock_client.statement_execution.get_statement.return_value = mock_get_resp
+    mock_client.statement_execution.execute_statement.return_value = _EXEC_RESPONSE
+    mock_client.statement_execution.get_statement.return_value = _statement()
 
     # Mock start/stop warehouse to return a waiter like other blocking calls
     mock_start_waiter = MagicMock()
@@ -49,8 +55,7 @@ def mock_db_client_data_tools():
     mock_client.warehouses.start.return_value = mock_start_waiter
     mock_client.warehouses.stop.return_value = mock_stop_waiter
 
-    with patch('databricks_mcp.tools.data.get_db_client', return_value=mock_client) as _:
-        yield mock_client
+    return mock_client
 
 # --- Tests for execute_sql ---
 def test_execute_sql_success(mock_db_client_data_tools):
@@ -77,103 +82,261 @@ def test_execute_sql_success(mock_db_client_data_tools):
     assert result == {"statement_id": "stmt-123", "status": "PENDING"}
 
 # --- Tests for get_statement_result ---
-def test_get_statement_result_pending(mock_db_client_data_tools):
-    # Arrange - modify fixture return for get_statement to be PENDING
-    mock_get_resp = mock_db_client_data_tools.statement_execution.get_statement.return_value
-    mock_get_resp.status.state = sql_service.StatementState.PENDING
-    mock_get_resp.result = None # Ensure no result data when pending
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("response", "expected"),
+    [
+        pytest.param(
+            _statement(_PENDING, result=None), # Ensure no result data when pending
+            {"status": "PENDING", "schema": None, "result_data": None, "error_message": None},
+            id="pending",
+        ),
+        pytest.param(
+            _statement(),
+            {
+                "status": "SUCCEEDED",
+                "schema": [
+                    {"name": "colA", "type": None, "position": None},
+                    {"name": "colB", "type": None, "position": None},
+                ],
+                "result_data": [{"colA": 1, "colB": "a"}, {"colA": 2, "colB": "b"}], # Check transformation
+                "error_message": None,
+            },
+            id="succeeded",
+        ),
+        pytest.param(
+            _statement(sql_service.StatementState.FAILED, result=None, error=sql_service.ServiceError(message="SQL Error Occurred")),
+            {"status": "FAILED", "schema": None, "result_data": None, "error_message": "SQL Error Occurred"},
+            id="failed",
+        ),
+    ],
+)
+async def test_get_statement_result_by_state(mock_db_client_data_tools, response, expected):
+    # Arrange
+    mock_db_client_data_tools.statement_execution.get_statement.return_value = response
 
     # Act
-    result = get_statement_result(statement_id="stmt-123")
+    result = await get_statement_result(statement_id="stmt-123")
 
     # Assert
-    assert result["statement_id"] == "stmt-123"
-    assert result["status"] == "PENDING"
-    # Assert the key returned by the function (likely 'result_data' or similar)
-    assert result["result_data"] is None
-    assert result["error_message"] is None
-
-def test_get_statement_result_success(mock_db_client_data_tools):
-    # Arrange - OVERRIDE fixture mock for this specific test
-    mock_get_resp_success = MagicMock()
-    mock_get_resp_success.statement_id = "stmt-123"
-    mock_get_resp_success.status = MagicMock()
-    mock_get_resp_success.status.state = sql_service.StatementState.SUCCEEDED
-
-    # Setup result with data_array
-    mock_get_resp_success.result = MagicMock()
-    mock_get_resp_success.result.data_array = [[1, "a"], [2, "b"]]
-
-    # Setup manifest with schema and columns
-    mock_get_resp_success.manifest = MagicMock()
-    mock_schema = MagicMock()
-    # Create mocks THEN set the name attribute
-    col1 = MagicMock()
-    col1.name = "colA"
-    col2 = MagicMock()
-    col2.name = "colB"
-    mock_schema.columns = [col1, col2]
-    mock_get_resp_success.manifest.schema = mock_schema
-
-    # Configure the main mock client's method
-    mock_db_client_data_tools.statement_execution.get_statement.return_value = mock_get_resp_success
+    mock_db_client_data_tools.statement_execution.get_statement.assert_called_once_with(statement_id="stmt-123")
+    assert result == {"statement_id": "stmt-123", **expected}
+
+@pytest.mark.asyncio
+async def test_get_statement_result_running_skips_result_handling(mock_db_client_data_tools):
+    # Arrange
+    mock_db_client_data_tools.statement_execution.get_statement.return_value = _statement(sql_service.StatementState.RUNNING)
 
     # Act
-    result = get_statement_result(statement_id="stmt-123")
+    result = await get_statement_result(statement_id="stmt-123", fetch_chunk_if_missing=True)
 
-    # Assert
-    mock_db_client_data_tools.statement_execution.get_statement.assert_called_once_with(statement_id="stmt-123")
-    assert result["statement_id"] == "stmt-123"
+    # Assert - no chunk fallback while the statement hasn't finished
+    assert result == {"statement_id": "stmt-123", "status": "RUNNING", "schema": None, "result_data": None, "error_message": None}
+    mock_db_client_data_tools.statement_execution.get_statement_result_chunk_n.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_statement_result_waits_for_running_statement(mock_db_client_data_tools):
+    # Arrange - first poll is RUNNING, second is SUCCEEDED
+    running = _statement(sql_service.StatementState.RUNNING, result=None)
+    succeeded = mock_db_client_data_tools.statement_execution.get_statement.return_value
+    mock_db_client_data_tools.statement_execution.get_statement.side_effect = [running, succeeded]
+
+    # Act
+    with patch('databricks_mcp.tools.data.asyncio.sleep') as mock_sleep:
+        result = await get_statement_result(statement_id="stmt-123", wait_timeout_seconds=10)
+
+    # Assert - the backoff sleep is awaited on the event loop, not time.sleep
+    assert mock_db_client_data_tools.statement_execution.get_statement.call_count == 2
+    mock_sleep.assert_awaited_once_with(data_tools.POLL_INITIAL_DELAY_SECONDS)
     assert result["status"] == "SUCCEEDED"
-    assert result["error_message"] is None
-    assert result["schema"] is not None # Check schema was processed
-    assert len(result["schema"]) == 2
-    assert result["schema"][0]["name"] == "colA"
-    assert result["result_data"] is not None # Check result_data exists
-    assert len(result["result_data"]) == 2
-    assert result["result_data"][0] == {"colA": 1, "colB": "a"} # Check transformation
-    assert result["result_data"][1] == {"colA": 2, "colB": "b"}
-
-def test_get_statement_result_failed(mock_db_client_data_tools):
-    # Arrange - modify fixture return for get_statement to be FAILED
-    mock_get_resp = mock_db_client_data_tools.statement_execution.get_statement.return_value
-    mock_get_resp.status.state = sql_service.StatementState.FAILED
-    mock_get_resp.status.error = MagicMock()
-    mock_get_resp.status.error.message = "SQL Error Occurred"
-    mock_get_resp.result = None
+
+@pytest.mark.asyncio
+async def test_get_statement_result_clamps_wait_timeout(mock_db_client_data_tools):
+    # Arrange - the statement never finishes
+    mock_db_client_data_tools.statement_execution.get_statement.return_value = _statement(sql_service.StatementState.RUNNING, result=None)
+    slept = []
+
+    async def fake_sleep(delay):
+        slept.append(delay)
+
+    # Act - loop.time() jumps by each requested delay so the deadline is reached without real waiting
+    loop = asyncio.get_running_loop()
+    with patch('databricks_mcp.tools.data.asyncio.sleep', fake_sleep), patch.object(loop, "time", side_effect=lambda: sum(slept)):
+        result = await get_statement_result(statement_id="stmt-123", wait_timeout_seconds=3600)
+
+    # Assert - waiting stops at the cap instead of the requested hour
+    assert result["status"] == "RUNNING"
+    assert sum(slept) == pytest.approx(data_tools.MAX_WAIT_TIMEOUT_SECONDS)
+
+@pytest.mark.asyncio
+async def test_get_statement_result_skips_chunk_fetch_by_default(mock_db_client_data_tools):
+    # Arrange - succeeded statement without inline data
+    mock_db_client_data_tools.statement_execution.get_statement.return_value = _statement(result=None)
 
     # Act
-    result = get_statement_result(statement_id="stmt-123")
+    await get_statement_result(statement_id="stmt-123")
+    await get_statement_result(statement_id="stmt-123", fetch_chunk_if_missing=True)
 
-    # Assert
-    assert result["statement_id"] == "stmt-123"
-    assert result["status"] == "FAILED"
-    assert result["error_message"] == "SQL Error Occurred"
-    # Assert the key returned by the function
-    assert result["result_data"] is None
-
-# --- Tests for start_sql_warehouse ---
-def test_start_sql_warehouse_success(mock_db_client_data_tools):
+    # Assert - only the opt-in call fetches chunk 0
+    mock_db_client_data_tools.statement_execution.get_statement_result_chunk_n.assert_called_once_with(
+        statement_id="stmt-123", chunk_index=0
+    )
+
+@pytest.mark.asyncio
+async def test_get_statement_result_fetch_all_chunks(mock_db_client_data_tools):
+    # Arrange - inline chunk 0 plus two more chunks
+    mock_db_client_data_tools.statement_execution.get_statement.return_value = _statement(
+        manifest=sql_service.ResultManifest(schema=sql_service.ResultSchema(columns=[]), total_chunk_count=3)
+    )
+    mock_db_client_data_tools.statement_execution.get_statement_result_chunk_n.side_effect = (
+        lambda chunk_index, **_: _REMAINING_CHUNKS[chunk_index]
+    )
+
+    # Act
+    result = await get_statement_result(statement_id="stmt-123", fetch_all_chunks=True)
+
+    # Assert - rows from every chunk, in chunk order
+    assert result["result_data"] == [[1, "a"], [2, "b"], [3, "c"], [4, "d"]]
+    assert mock_db_client_data_tools.statement_execution.get_statement_result_chunk_n.call_count == 2
+
+@pytest.mark.asyncio
+async def test_get_statement_result_joins_inflight_fetch(mock_db_client_data_tools):
+    # Arrange - another caller is already fetching this statement
+    shared = {"statement_id": "stmt-123", "status": "RUNNING", "schema": None, "result_data": None, "error_message": None}
+    inflight = asyncio.get_running_loop().create_future()
+    inflight.set_result(shared)
+    data_tools._inflight_results[_DEFAULT_INFLIGHT_KEY] = inflight
+    try:
+        # Act
+        result = await get_statement_result(statement_id="stmt-123")
+    finally:
+        data_tools._inflight_results.pop(_DEFAULT_INFLIGHT_KEY, None)
+
+    # Assert - the in-flight result is reused without another API call
+    assert result is shared
+    mock_db_client_data_tools.statement_execution.get_statement.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_statement_result_coalesces_concurrent_calls(mock_db_client_data_tools):
+    # Act - the second call starts while the first is still fetching
+    first, second = await asyncio.gather(
+        get_statement_result(statement_id="stmt-123"),
+        get_statement_result(statement_id="stmt-123"),
+    )
+
+    # Assert - one API round trip serves both callers
+    assert first is second
+    mock_db_client_data_tools.statement_execution.get_statement.assert_called_once_with(statement_id="stmt-123")
+
+@pytest.mark.asyncio
+async def test_get_statement_result_leader_cancellation_spares_followers(mock_db_client_data_tools):
+    # Arrange - the fetch is slow enough for a second caller to join it
+    get_statement = mock_db_client_data_tools.statement_execution.get_statement
+    response = get_statement.return_value
+    get_statement.side_effect = lambda **_: time.sleep(0.05) or response
+    leader = asyncio.create_task(get_statement_result(statement_id="stmt-123"))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(get_statement_result(statement_id="stmt-123"))
+    await asyncio.sleep(0)
+
+    # Act - the first caller goes away mid-fetch
+    leader.cancel()
+    result = await follower
+
+    # Assert - the follower still gets the shared fetch's result
+    assert leader.cancelled()
+    assert result["status"] == "SUCCEEDED"
+    get_statement.assert_called_once_with(statement_id="stmt-123")
+    assert _DEFAULT_INFLIGHT_KEY not in data_tools._inflight_results
+
+@pytest.mark.asyncio
+async def test_get_statement_result_cancels_fetch_when_every_caller_leaves(mock_db_client_data_tools):
     # Arrange
-    wh_id = "start-wh"
+    mock_db_client_data_tools.statement_execution.get_statement.side_effect = lambda **_: time.sleep(0.05)
+    caller = asyncio.create_task(get_statement_result(statement_id="stmt-123"))
+    await asyncio.sleep(0)
+    fetch = data_tools._inflight_results[_DEFAULT_INFLIGHT_KEY]
+
     # Act
-    result = start_sql_warehouse(warehouse_id=wh_id)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    await asyncio.sleep(0)
+
     # Assert
-    mock_db_client_data_tools.warehouses.start.assert_called_once_with(id=wh_id)
-    # Check that the waiter was awaited
-    mock_db_client_data_tools.warehouses.start.return_value.result.assert_called_once()
-    assert result == {"warehouse_id": wh_id, "status": "STARTED"}
+    assert fetch.cancelled()
+    assert data_tools._inflight_results == {}
 
-# --- Tests for stop_sql_warehouse ---
-def test_stop_sql_warehouse_success(mock_db_client_data_tools):
+@pytest.mark.asyncio
+async def test_get_statement_result_does_not_coalesce_different_arguments(mock_db_client_data_tools):
+    # Act - same statement, but only one caller asked for the chunk fallback
+    await asyncio.gather(
+        get_statement_result(statement_id="stmt-123"),
+        get_statement_result(statement_id="stmt-123", fetch_chunk_if_missing=True),
+    )
+
+    # Assert - each payload is fetched separately
+    assert mock_db_client_data_tools.statement_execution.get_statement.call_count == 2
+
+@pytest.mark.asyncio
+async def test_get_statement_result_clears_inflight_entry():
+    await get_statement_result(statement_id="stmt-123")
+    assert _DEFAULT_INFLIGHT_KEY not in data_tools._inflight_results
+
+@pytest.mark.asyncio
+async def test_get_statement_result_columnar_format():
     # Arrange
-    wh_id = "stop-wh"
+    # Fixture response already holds SUCCEEDED rows and colA/colB columns
+
+    # Act
+    result = await get_statement_result(statement_id="stmt-123", result_format="columnar")
+
+    # Assert - column names are sent once, rows stay as arrays
+    assert result["result_data"] == {"columns": ["colA", "colB"], "rows": [[1, "a"], [2, "b"]]}
+
+@pytest.mark.asyncio
+async def test_get_statement_result_rejects_unknown_format(mock_db_client_data_tools):
+    with pytest.raises(Exception, match="Unsupported result_format 'csv'"):
+        await get_statement_result(statement_id="stmt-123", result_format="csv")
+    mock_db_client_data_tools.statement_execution.get_statement.assert_not_called()
+
+# --- Tests for start_sql_warehouse / stop_sql_warehouse ---
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("tool", "sdk_method", "wh_id", "status"),
+    [
+        pytest.param(start_sql_warehouse, "start", "start-wh", "STARTED", id="start"),
+        pytest.param(stop_sql_warehouse, "stop", "stop-wh", "STOPPED", id="stop"),
+    ],
+)
+async def test_warehouse_action_success(mock_db_client_data_tools, tool, sdk_method, wh_id, status):
     # Act
-    result = stop_sql_warehouse(warehouse_id=wh_id)
+    result = await tool(warehouse_id=wh_id)
     # Assert
-    mock_db_client_data_tools.warehouses.stop.assert_called_once_with(id=wh_id)
+    method = getattr(mock_db_client_data_tools.warehouses, sdk_method)
+    method.assert_called_once_with(id=wh_id)
     # Check that the waiter was awaited
-    mock_db_client_data_tools.warehouses.stop.return_value.result.assert_called_once()
-    assert result == {"warehouse_id": wh_id, "status": "STOPPED"}
+    method.return_value.result.assert_called_once()
+    assert result == {"warehouse_id": wh_id, "status": status}
+
+@pytest.mark.asyncio
+async def test_start_sql_warehouse_no_wait(mock_db_client_data_tools):
+    # Act
+    result = await start_sql_warehouse(warehouse_id="start-wh", wait=False)
+    # Assert - request is sent but the waiter is never awaited
+    mock_db_client_data_tools.warehouses.start.assert_called_once_with(id="start-wh")
+    mock_db_client_data_tools.warehouses.start.return_value.result.assert_not_called()
+    assert result == {"warehouse_id": "start-wh", "status": "STARTING"}
+
+# --- Tests for stop_sql_warehouse ---
+@pytest.mark.asyncio
+async def test_stop_sql_warehouse_sdk_error_mapped(mock_db_client_data_tools):
+    # Arrange - waiter fails while waiting for the warehouse to stop
+    mock_db_client_data_tools.warehouses.stop.return_value.result.side_effect = NotFound("Warehouse not found")
+    # Act & Assert - async tools are mapped by the decorator too
+    with pytest.raises(Exception) as exc_info:
+        await stop_sql_warehouse(warehouse_id="gone-wh")
+    assert f"[MCP Error Code {CODE_RESOURCE_NOT_FOUND}]" in str(exc_info.value)
+    assert "Warehouse not found" in str(exc_info.value)
 
 # Add tests for SDK errors being mapped by decorator if needed
@@ -1,37 +1,37 @@
 import pytest
 import base64
-from unittest.mock import MagicMock, patch
-from databricks.sdk.service import files as dbfs_service
+from unittest.mock import call, patch
 from databricks.sdk.errors import DatabricksError # Import general error
+from databricks.sdk.service import files as dbfs_service
 # Import error code constant
 from databricks_mcp.error_mapping import CODE_SERVER_ERROR
+from databricks_mcp.error_mapping import CODE_INVALID_PARAMS
 
 from databricks_mcp.tools.files import (
     read_file,
     write_file,
     delete_file,
-    create_directory
+    create_directory,
+    batch_file_ops
 )
-from databricks_mcp.db_client import get_db_client # To mock
 
-# Mock the get_db_client function
+# File payloads, encoded once at import
+_HELLO_RAW = "Hello MCP!"
+_HELLO_B64 = base64.b64encode(_HELLO_RAW.encode('utf-8')).decode('ascii')
+_LOG_RAW = "Log entry"
+_LOG_B64 = base64.b64encode(_LOG_RAW.encode('utf-8')).decode('ascii')
+
+# Mock the get_db_client function (swapped once in conftest.py)
 @pytest.fixture(autouse=True)
-def mock_db_client_files_tools():
-    mock_client = MagicMock()
-    # Assign unused variable to _
-    with patch('databricks_mcp.tools.files.get_db_client', return_value=mock_client) as _:
-        yield mock_client
+def mock_db_client_files_tools(tool_client):
+    # tool_client arrives reset (see conftest.py); tests wire their own responses
+    return tool_client
 
 # --- Tests for read_file ---
 def test_read_file_success(mock_db_client_files_tools):
     # Arrange
     path = "/dbfs/test.txt"
-    raw_content = "Hello MCP!"
-    encoded_content = base64.b64encode(raw_content.encode('utf-8')).decode('ascii')
-    read_resp = MagicMock(spec=dbfs_service.ReadResponse)
-    read_resp.data = encoded_content
-    read_resp.bytes_read = len(raw_content)
-    mock_db_client_files_tools.dbfs.read.return_value = read_resp
+    mock_db_client_files_tools.dbfs.read.return_value = dbfs_service.ReadResponse(data=_HELLO_B64, bytes_read=len(_HELLO_RAW))
 
     # Act
     result = read_file(path=path, length=100) # Specify length
@@ -40,45 +40,97 @@ def test_read_file_success(mock_db_client_files_tools):
     # Read max 1MB if length=0, otherwise use specified length
     expected_read_length = 100
     mock_db_client_files_tools.dbfs.read.assert_called_once_with(path=path, offset=0, length=expected_read_length)
-    assert result == {"path": path, "content_base64": encoded_content, "bytes_read": len(raw_content)}
+    assert result == {"path": path, "content_base64": _HELLO_B64, "bytes_read": len(_HELLO_RAW)}
 
 def test_read_file_default_length(mock_db_client_files_tools):
      # Arrange
     path = "/dbfs/default_len.txt"
-    read_resp = MagicMock(spec=dbfs_service.ReadResponse)
-    read_resp.data = ""
-    read_resp.bytes_read = 0
-    mock_db_client_files_tools.dbfs.read.return_value = read_resp
+    mock_db_client_files_tools.dbfs.read.return_value = dbfs_service.ReadResponse(data="", bytes_read=0)
     # Act
     read_file(path=path) # No length specified
     # Assert - should use default max read size (1MB)
     mock_db_client_files_tools.dbfs.read.assert_called_once_with(path=path, offset=0, length=1024*1024)
 
 
+def test_read_file_large_length_reads_ranges(mock_db_client_files_tools):
+    # Arrange - 2.5 MiB file, caller asks for 3 MiB
+    path = "/dbfs/large.bin"
+    mib = 1024 * 1024
+    file_size = 2 * mib + mib // 2
+    mock_db_client_files_tools.dbfs.get_status.return_value = dbfs_service.FileInfo(file_size=file_size)
+
+    def fake_read(offset, length, **_):
+        chunk = bytes([offset // mib]) * length
+        return dbfs_service.ReadResponse(data=base64.b64encode(chunk).decode('ascii'), bytes_read=length)
+    mock_db_client_files_tools.dbfs.read.side_effect = fake_read
+
+    # Act
+    result = read_file(path=path, length=3 * mib)
+
+    # Assert - one read per 1 MiB range, clamped at EOF, stitched in order
+    assert sorted(c.kwargs["offset"] for c in mock_db_client_files_tools.dbfs.read.call_args_list) == [0, mib, 2 * mib]
+    content = base64.b64decode(result["content_base64"])
+    assert result["bytes_read"] == file_size
+    assert content == b"\x00" * mib + b"\x01" * mib + b"\x02" * (mib // 2)
+
+
 # --- Tests for write_file ---
 def test_write_file_success(mock_db_client_files_tools):
     # Arrange
     path = "/dbfs/new_file.log"
-    raw_content = "Log entry"
-    encoded_content = base64.b64encode(raw_content.encode('utf-8')).decode('ascii')
     mock_handle = 12345
-    mock_db_client_files_tools.dbfs.create.return_value = MagicMock(handle=mock_handle)
+    mock_db_client_files_tools.dbfs.create.return_value = dbfs_service.CreateResponse(handle=mock_handle)
 
     # Act
-    result = write_file(path=path, content_base64=encoded_content, overwrite=True)
+    result = write_file(path=path, content_base64=_LOG_B64, overwrite=True)
 
     # Assert
     mock_db_client_files_tools.dbfs.create.assert_called_once_with(path=path, overwrite=True)
-    mock_db_client_files_tools.dbfs.add_block.assert_called_once_with(handle=mock_handle, data=encoded_content)
+    mock_db_client_files_tools.dbfs.add_block.assert_called_once_with(handle=mock_handle, data=_LOG_B64)
     mock_db_client_files_tools.dbfs.close.assert_called_once_with(handle=mock_handle)
-    assert result == {"path": path, "status": "SUCCESS", "bytes_written": len(raw_content)}
+    assert result == {"path": path, "status": "SUCCESS", "bytes_written": len(_LOG_RAW)}
+
+def test_write_file_splits_large_content_into_blocks(mock_db_client_files_tools):
+    # Arrange - shrink the block size so a small payload spans several blocks
+    path = "/dbfs/big_file.bin"
+    encoded_content = "YWFhYmJiY2M=" # b"aaabbbcc"
+    mock_handle = 4242
+    mock_db_client_files_tools.dbfs.create.return_value = dbfs_service.CreateResponse(handle=mock_handle)
+
+    # Act
+    with patch('databricks_mcp.tools.files.WRITE_BLOCK_BASE64_CHARS', 4):
+        result = write_file(path=path, content_base64=encoded_content)
+
+    # Assert - blocks are appended in order, then the handle is closed
+    assert mock_db_client_files_tools.dbfs.add_block.call_args_list == [
+        call(handle=mock_handle, data="YWFh"),
+        call(handle=mock_handle, data="YmJi"),
+        call(handle=mock_handle, data="Y2M="),
+    ]
+    mock_db_client_files_tools.dbfs.close.assert_called_once_with(handle=mock_handle)
+    assert result["bytes_written"] == 8
+
+@pytest.mark.parametrize(
+    "content_base64",
+    [
+        pytest.param("YWF", id="bad-length"),
+        pytest.param("YW!h", id="bad-alphabet"),
+        pytest.param("YQ==YWFh", id="padding-mid-stream"),
+    ],
+)
+def test_write_file_rejects_invalid_base64_before_creating(mock_db_client_files_tools, content_base64):
+    # Act & Assert - invalid params, and no truncated file is left behind
+    with pytest.raises(Exception, match="content_base64 is not valid base64") as exc_info:
+        write_file(path="/dbfs/bad.bin", content_base64=content_base64)
+    assert f"[MCP Error Code {CODE_INVALID_PARAMS}]" in str(exc_info.value)
+    mock_db_client_files_tools.dbfs.create.assert_not_called()
 
 def test_write_file_sdk_error_during_write(mock_db_client_files_tools):
      # Arrange
     path = "/dbfs/fail_write.log"
     encoded_content = "YWFh" # "aaa"
     mock_handle = 6789
-    mock_db_client_files_tools.dbfs.create.return_value = MagicMock(handle=mock_handle)
+    mock_db_client_files_tools.dbfs.create.return_value = dbfs_service.CreateResponse(handle=mock_handle)
     # Simulate error during add_block
     sdk_error = DatabricksError("Disk full") # Use general error
     mock_db_client_files_tools.dbfs.add_block.side_effect = sdk_error
@@ -99,16 +151,14 @@ def test_write_file_sdk_error_during_write(mock_db_client_files_tools):
     mock_db_client_files_tools.dbfs.close.assert_not_called()
 
 # --- Tests for delete_file ---
-def test_delete_file_success(mock_db_client_files_tools):
-    path = "/dbfs/to_delete.tmp"
-    result = delete_file(path=path, recursive=False)
-    mock_db_client_files_tools.dbfs.delete.assert_called_once_with(path=path, recursive=False)
-    assert result == {"path": path, "status": "SUCCESS"}
-
-def test_delete_file_recursive(mock_db_client_files_tools):
-    path = "/dbfs/dir_to_delete"
-    result = delete_file(path=path, recursive=True)
-    mock_db_client_files_tools.dbfs.delete.assert_called_once_with(path=path, recursive=True)
+@pytest.mark.parametrize(
+    ("path", "recursive"),
+    [("/dbfs/to_delete.tmp", False), ("/dbfs/dir_to_delete", True)],
+    ids=["file", "recursive"],
+)
+def test_delete_file(mock_db_client_files_tools, path, recursive):
+    result = delete_file(path=path, recursive=recursive)
+    mock_db_client_files_tools.dbfs.delete.assert_called_once_with(path=path, recursive=recursive)
     assert result == {"path": path, "status": "SUCCESS"}
 
 # --- Tests for create_directory ---
@@ -117,3 +167,49 @@ def test_create_directory_success(mock_db_client_files_tools):
     result = create_directory(path=path)
     mock_db_client_files_tools.dbfs.mkdirs.assert_called_once_with(path=path)
     assert result == {"path": path, "status": "SUCCESS"}
+
+
+# --- Tests for batch_file_ops ---
+@pytest.mark.asyncio
+async def test_batch_file_ops_runs_each_op(mock_db_client_files_tools):
+    # Act
+    result = await batch_file_ops(ops=[
+        {"op": "mkdirs", "path": "/dbfs/batch"},
+        {"op": "delete", "path": "/dbfs/old", "recursive": True},
+    ])
+
+    # Assert - results keep input order
+    mock_db_client_files_tools.dbfs.mkdirs.assert_called_once_with(path="/dbfs/batch")
+    mock_db_client_files_tools.dbfs.delete.assert_called_once_with(path="/dbfs/old", recursive=True)
+    assert result == {
+        "results": [
+            {"path": "/dbfs/batch", "status": "SUCCESS"},
+            {"path": "/dbfs/old", "status": "SUCCESS"},
+        ],
+        "errors": [],
+    }
+
+@pytest.mark.asyncio
+async def test_batch_file_ops_collects_errors(mock_db_client_files_tools):
+    # Arrange
+    mock_db_client_files_tools.dbfs.delete.side_effect = DatabricksError("Path busy")
+
+    # Act
+    result = await batch_file_ops(ops=[
+        {"op": "delete", "path": "/dbfs/busy"},
+        {"op": "rename", "path": "/dbfs/x"},
+        {"op": "mkdirs", "path": "/dbfs/ok"},
+    ])
+
+    # Assert - failures are reported per index without aborting the batch
+    assert result["results"] == [None, None, {"path": "/dbfs/ok", "status": "SUCCESS"}]
+    assert [err["index"] for err in result["errors"]] == [0, 1]
+    assert "Path busy" in result["errors"][0]["error"]
+    assert "Unsupported file operation 'rename'" in result["errors"][1]["error"]
+
+@pytest.mark.asyncio
+async def test_batch_file_ops_rejects_oversized_batch(mock_db_client_files_tools):
+    with pytest.raises(Exception) as exc_info:
+        await batch_file_ops(ops=[{"op": "mkdirs", "path": f"/dbfs/{i}"} for i in range(257)])
+    assert "At most 256 operations" in str(exc_info.value)
+    mock_db_client_files_tools.dbfs.mkdirs.assert_not_called()
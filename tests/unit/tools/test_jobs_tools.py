@@ -1,46 +1,45 @@
 from unittest.mock import MagicMock
 from unittest.mock import patch
-from pytest_mock import MockerFixture
 
 import pytest
 from databricks.sdk.service import jobs as jobs_service
 
+from databricks_mcp import polling
+from databricks_mcp.tools.jobs import get_job_run_status
 from databricks_mcp.tools.jobs import run_job_now
-from databricks_mcp.db_client import get_db_client # To mock
-from databricks_mcp import error_mapping as mcp_errors
+from databricks_mcp.tools.jobs import submit_job_now
 
 
-# Mock the get_db_client function
+# Wire Jobs API responses onto the per-test client (see conftest.py)
 @pytest.fixture(autouse=True)
-def mock_db_client_jobs_tools():
-    mock_client = MagicMock()
+def mock_db_client_jobs_tools(tool_client):
+    mock_client = tool_client
 
-    # Mock run_now response and subsequent get_run
-    mock_run_response = MagicMock()
-    mock_run_response.run_id = 9876
-    # The waiter object returned by run_now
+    # The waiter object returned by run_now; it carries the new run_id
     mock_run_waiter = MagicMock()
+    mock_run_waiter.run_id = 9876
     mock_client.jobs.run_now.return_value = mock_run_waiter
 
-    mock_run_details = MagicMock(spec=jobs_service.Run)
-    mock_run_details.run_id = 9876
-    mock_run_details.run_page_url = "http://example.com/run/9876"
-    mock_run_details.state = MagicMock(spec=jobs_service.RunState)
-    mock_run_details.state.life_cycle_state = jobs_service.RunLifeCycleState.TERMINATED
-    mock_run_details.state.result_state = jobs_service.RunResultState.SUCCESS
+    # A real SDK Run; unset fields default to None
+    mock_run_details = jobs_service.Run(
+        run_id=9876,
+        run_page_url="http://example.com/run/9876",
+        state=jobs_service.RunState(
+            life_cycle_state=jobs_service.RunLifeCycleState.TERMINATED,
+            result_state=jobs_service.RunResultState.SUCCESS,
+        ),
+    )
     # Make run_now().result() return the details (simulating wait)
     mock_run_waiter.result.return_value = mock_run_details
     # Make get_run also return the details
     mock_client.jobs.get_run.return_value = mock_run_details
-
-    # Assign unused variable to _
-    with patch('databricks_mcp.tools.jobs.get_db_client', return_value=mock_client) as _:
-        yield mock_client
+    return mock_client
 
 # --- Tests for run_job_now ---
-def test_run_job_now_success_no_params(mock_db_client_jobs_tools):
+@pytest.mark.asyncio
+async def test_run_job_now_success_no_params(mock_db_client_jobs_tools):
     # Act
-    result = run_job_now(job_id=555)
+    result = await run_job_now(job_id=555)
 
     # Assert
     mock_db_client_jobs_tools.jobs.run_now.assert_called_once_with(
@@ -50,19 +49,20 @@ def test_run_job_now_success_no_params(mock_db_client_jobs_tools):
         jar_params=None,
         spark_submit_params=None
     )
-    mock_db_client_jobs_tools.jobs.run_now.return_value.result.assert_called_once() # Check wait
-    mock_db_client_jobs_tools.jobs.get_run.assert_called_once_with(run_id=9876)
+    mock_db_client_jobs_tools.jobs.run_now.return_value.result.assert_not_called() # No blocking SDK wait
+    mock_db_client_jobs_tools.jobs.get_run.assert_called_once_with(run_id=9876) # One poll; the run is already terminal
     assert result["run_id"] == 9876
     assert result["status"] == "TERMINATED"
     assert result["result_state"] == "SUCCESS"
 
-def test_run_job_now_success_with_params(mock_db_client_jobs_tools):
+@pytest.mark.asyncio
+async def test_run_job_now_success_with_params(mock_db_client_jobs_tools):
     # Arrange
     nb_params = {"p1": "v1"}
     py_params = ["arg1", "arg2"]
 
     # Act
-    result = run_job_now(
+    result = await run_job_now(
         job_id=556,
         notebook_params=nb_params,
         python_params=py_params
@@ -78,31 +78,93 @@ def test_run_job_now_success_with_params(mock_db_client_jobs_tools):
     )
     assert result["run_id"] == 9876 # Assuming same mock run_id for simplicity
 
-def test_run_job_now_failure(mock_db_client_jobs_tools):
+@pytest.mark.asyncio
+async def test_run_job_now_failure(mock_db_client_jobs_tools):
     # Arrange - Modify the mock get_run response for failure
-    mock_run_details_failed = MagicMock(spec=jobs_service.Run)
-    mock_run_details_failed.run_id = 9877
-    mock_run_details_failed.run_page_url = "http://example.com/run/9877"
-    mock_run_details_failed.state = MagicMock(spec=jobs_service.RunState)
-    mock_run_details_failed.state.life_cycle_state = jobs_service.RunLifeCycleState.TERMINATED
-    mock_run_details_failed.state.result_state = jobs_service.RunResultState.FAILED
-    mock_run_details_failed.state.state_message = "Job task failed"
+    mock_run_details_failed = jobs_service.Run(
+        run_id=9877,
+        run_page_url="http://example.com/run/9877",
+        state=jobs_service.RunState(
+            life_cycle_state=jobs_service.RunLifeCycleState.TERMINATED,
+            result_state=jobs_service.RunResultState.FAILED,
+            state_message="Job task failed",
+        ),
+    )
 
     # Simulate run_now returning the new run_id, then get_run returning failed state
-    mock_run_response_failed = MagicMock()
-    mock_run_response_failed.run_id = 9877
     mock_run_waiter_failed = MagicMock()
-    # Make .result() return the failed details
-    mock_run_waiter_failed.result.return_value = mock_run_details_failed
+    mock_run_waiter_failed.run_id = 9877
     mock_db_client_jobs_tools.jobs.run_now.return_value = mock_run_waiter_failed
     mock_db_client_jobs_tools.jobs.get_run.return_value = mock_run_details_failed
 
     # Act
-    result = run_job_now(job_id=557)
+    result = await run_job_now(job_id=557)
 
     # Assert
     assert result["run_id"] == 9877
     assert result["status"] == "TERMINATED"
     assert result["result_state"] == "FAILED"
 
+@pytest.mark.asyncio
+async def test_run_job_now_polls_until_terminal(mock_db_client_jobs_tools):
+    # Arrange - the run is still RUNNING on the first poll
+    running = jobs_service.Run(state=jobs_service.RunState(life_cycle_state=jobs_service.RunLifeCycleState.RUNNING))
+    finished = mock_db_client_jobs_tools.jobs.get_run.return_value
+    mock_db_client_jobs_tools.jobs.get_run.side_effect = [running, finished]
+
+    # Act
+    with patch.object(polling, "RUN_POLL_INITIAL_DELAY_SECONDS", 0):
+        result = await run_job_now(job_id=559)
+
+    # Assert
+    assert mock_db_client_jobs_tools.jobs.get_run.call_count == 2
+    assert result["status"] == "TERMINATED"
+    assert result["run_page_url"] == "http://example.com/run/9876"
+
+# --- Tests for submit_job_now ---
+def test_submit_job_now_returns_without_waiting(mock_db_client_jobs_tools):
+    # Act
+    result = submit_job_now(job_id=558, notebook_params={"p1": "v1"})
+
+    # Assert
+    mock_db_client_jobs_tools.jobs.run_now.assert_called_once_with(
+        job_id=558,
+        notebook_params={"p1": "v1"},
+        python_params=None,
+        jar_params=None,
+        spark_submit_params=None
+    )
+    mock_db_client_jobs_tools.jobs.run_now.return_value.result.assert_not_called()
+    mock_db_client_jobs_tools.jobs.get_run.assert_not_called()
+    assert result == {"run_id": 9876, "status": "PENDING"}
+
+# --- Tests for get_job_run_status ---
+def test_get_job_run_status_success(mock_db_client_jobs_tools):
+    # Act
+    result = get_job_run_status(run_id=9876)
+
+    # Assert
+    mock_db_client_jobs_tools.jobs.get_run.assert_called_once_with(run_id=9876)
+    assert result == {
+        "run_id": 9876,
+        "status": "TERMINATED",
+        "result_state": "SUCCESS",
+        "run_page_url": "http://example.com/run/9876",
+    }
+
+def test_get_job_run_status_pending_without_result_state(mock_db_client_jobs_tools):
+    # Arrange - a queued run has a life cycle state but no result state yet
+    mock_db_client_jobs_tools.jobs.get_run.return_value = jobs_service.Run(
+        run_id=9876,
+        state=jobs_service.RunState(life_cycle_state=jobs_service.RunLifeCycleState.PENDING),
+    )
+
+    # Act
+    result = get_job_run_status(run_id=9876)
+
+    # Assert
+    assert result["status"] == "PENDING"
+    assert result["result_state"] == "UNKNOWN"
+    assert result["run_page_url"] is None
+
 # Add tests for SDK error mapping if needed
@@ -1,78 +1,340 @@
 import json
+import threading
+from concurrent.futures import Future
 from unittest.mock import MagicMock
+from unittest.mock import create_autospec
 from unittest.mock import patch
 
 import pytest
+from databricks.sdk.errors import DatabricksError, InternalError, PermissionDenied, ResourceExhausted
 from databricks.sdk.service import serving
 from databricks.sdk.service import vectorsearch as vs
-from databricks.sdk.service import catalog as uc
-from databricks.sdk.service import ml as mlflow_service
 
+from databricks_mcp.tools import ml as ml_tools
 from databricks_mcp.tools.ml import add_to_vector_index
 from databricks_mcp.tools.ml import query_model_serving_endpoint
+from databricks_mcp.tools.ml import query_model_serving_endpoint_batch
 from databricks_mcp.tools.ml import query_vector_index
 
-from databricks_mcp.db_client import get_db_client # To mock
-from databricks_mcp import error_mapping as mcp_errors
 # Import error code constants
-from databricks_mcp.error_mapping import CODE_INTERNAL_ERROR, CODE_INVALID_PARAMS
+from databricks_mcp.error_mapping import CODE_INTERNAL_ERROR
+from databricks_mcp.error_mapping import CODE_INVALID_PARAMS
 
 
-# Mock the get_db_client function
+# Vector search SDK methods the ml tools call; the mocked API exposes only these, so any other call fails loudly
+_VECTOR_INDEX_METHODS = ["upsert_data_vector_index", "query_index"]
+# Autospecced once at import: serving calls are checked against the real method signatures
+_SERVING_API = create_autospec(serving.ServingEndpointsAPI, instance=True)
+
+
+# Restrict the per-test client's (see conftest.py) serving and vector search APIs
 @pytest.fixture(autouse=True)
-def mock_db_client_ml_tools():
-    mock_client = MagicMock()
-    # Add mocks for serving endpoints and vector search if they exist on the client
-    mock_client.serving_endpoints = MagicMock(spec=serving.ServingEndpointsAPI)
-    mock_client.vector_search_indexes = MagicMock(spec=vs.VectorSearchIndexesAPI)
+def mock_db_client_ml_tools(tool_client):
+    _SERVING_API.reset_mock(return_value=True, side_effect=True)
+    tool_client.serving_endpoints = _SERVING_API
+    tool_client.vector_search_indexes = MagicMock(spec=_VECTOR_INDEX_METHODS)
+    return tool_client
+
 
-    # Assign unused variable to _
-    with patch('databricks_mcp.tools.ml.get_db_client', return_value=mock_client) as _:
-        yield mock_client
+def test_mocked_methods_exist_on_sdk_apis():
+    # Keeps the narrow spec honest against SDK renames
+    assert all(hasattr(vs.VectorSearchIndexesAPI, m) for m in _VECTOR_INDEX_METHODS)
+
+@pytest.fixture(autouse=True)
+def clear_query_cache(monkeypatch):
+    # The vector query cache is opt-in (size 0 by default); tests run with it on, configured as settings describe
+    settings = ml_tools.settings
+    monkeypatch.setattr(ml_tools, "_query_cache", ml_tools.QueryCache(
+        max_size=1024,
+        ttl_seconds=settings.vector_query_cache_ttl_seconds,
+        min_similarity=settings.vector_query_cache_min_similarity,
+        max_bytes=settings.vector_query_cache_max_bytes,
+        index_similarity=settings.vector_query_cache_index_similarity,
+    ))
+    ml_tools._manifest_cache.clear()
+    yield
+    ml_tools._manifest_cache.clear()
+
+# Request payloads, built once at import; the tools only read them
+_SERVING_PAYLOAD = {"dataframe_split": {"columns": ["col1"], "data": [[1], [2]]}}
+_DOCS = [{"id": 1, "text": "doc1"}, {"id": 2, "text": "doc2"}]
+_FOUR_DOCS = [{"id": i} for i in range(4)]
 
 # --- Tests for query_model_serving_endpoint ---
-def test_query_model_serving_endpoint_success(mock_db_client_ml_tools):
+@pytest.mark.asyncio
+async def test_query_model_serving_endpoint_success(mock_db_client_ml_tools):
     # Arrange
     endpoint = "my-model-endpoint"
-    input_payload = {"dataframe_split": {"columns": ["col1"], "data": [[1], [2]]}}
-    mock_response = MagicMock(spec=serving.QueryEndpointResponse)
-    mock_response.predictions = [0.5, 0.6]
-    mock_db_client_ml_tools.serving_endpoints.query.return_value = mock_response
+    mock_db_client_ml_tools.serving_endpoints.query.return_value = serving.QueryEndpointResponse(predictions=[0.5, 0.6])
 
     # Act
-    result = query_model_serving_endpoint(endpoint_name=endpoint, input_data=input_payload)
+    result = await query_model_serving_endpoint(endpoint_name=endpoint, input_data=_SERVING_PAYLOAD)
 
     # Assert
-    mock_db_client_ml_tools.serving_endpoints.query.assert_called_once_with(name=endpoint, request=input_payload)
+    mock_db_client_ml_tools.serving_endpoints.query.assert_called_once_with(
+        name=endpoint, dataframe_split=serving.DataframeSplitInput(columns=["col1"], data=[[1], [2]])
+    )
     assert result == {"predictions": [0.5, 0.6]}
 
+@pytest.mark.parametrize(
+    ("input_data", "expected"),
+    [
+        pytest.param([{"x": 1}, {"x": 2}], {"dataframe_records": [{"x": 1}, {"x": 2}]}, id="list"),
+        pytest.param({"x": 1}, {"dataframe_records": [{"x": 1}]}, id="single-record"),
+        pytest.param({"instances": [[1, 2]]}, {"instances": [[1, 2]]}, id="instances"),
+        pytest.param(
+            {"messages": [{"role": "user", "content": "hi"}], "max_tokens": 8},
+            {"messages": [serving.ChatMessage(role=serving.ChatMessageRole.USER, content="hi")], "max_tokens": 8},
+            id="chat",
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_query_model_serving_endpoint_maps_input_data(mock_db_client_ml_tools, input_data, expected):
+    mock_db_client_ml_tools.serving_endpoints.query.return_value = serving.QueryEndpointResponse(predictions=[1])
+
+    await query_model_serving_endpoint(endpoint_name="ep", input_data=input_data)
+
+    mock_db_client_ml_tools.serving_endpoints.query.assert_called_once_with(name="ep", **expected)
+
+@pytest.mark.asyncio
+async def test_query_model_serving_endpoint_rejects_unknown_request_fields(mock_db_client_ml_tools):
+    with pytest.raises(Exception, match="Unsupported input_data fields: request"):
+        await query_model_serving_endpoint(endpoint_name="ep", input_data={"instances": [[1]], "request": {}})
+    mock_db_client_ml_tools.serving_endpoints.query.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_query_model_serving_endpoint_repeat_payload_served_from_cache(mock_db_client_ml_tools):
+    # Arrange - an enabled prediction cache
+    cache = ml_tools.QueryCache(max_size=8, ttl_seconds=60)
+    mock_db_client_ml_tools.serving_endpoints.query.return_value = serving.QueryEndpointResponse(predictions=[1])
+
+    # Act - same payload (different key order), then a new payload and another endpoint
+    with patch.object(ml_tools, "_prediction_cache", cache):
+        first = await query_model_serving_endpoint(endpoint_name="ep", input_data={"a": 1, "b": [2]})
+        second = await query_model_serving_endpoint(endpoint_name="ep", input_data={"b": [2], "a": 1})
+        await query_model_serving_endpoint(endpoint_name="ep", input_data={"a": 2, "b": [2]})
+        await query_model_serving_endpoint(endpoint_name="other-ep", input_data={"a": 1, "b": [2]})
+
+    # Assert - only the equal payload to the same endpoint is a hit
+    assert first == second == {"predictions": [1]}
+    assert mock_db_client_ml_tools.serving_endpoints.query.call_count == 3
+
+@pytest.mark.asyncio
+async def test_query_model_serving_endpoint_cache_disabled_by_default(mock_db_client_ml_tools):
+    # Arrange
+    mock_db_client_ml_tools.serving_endpoints.query.return_value = serving.QueryEndpointResponse(predictions=[1])
+
+    # Act
+    await query_model_serving_endpoint(endpoint_name="ep", input_data={"a": 1})
+    await query_model_serving_endpoint(endpoint_name="ep", input_data={"a": 1})
+
+    # Assert - SERVING_PREDICTION_CACHE_SIZE defaults to 0, so every call reaches the endpoint
+    assert not ml_tools._prediction_cache.enabled
+    assert mock_db_client_ml_tools.serving_endpoints.query.call_count == 2
+
+@pytest.mark.asyncio
+async def test_query_model_serving_endpoint_replay_miss(monkeypatch, mock_db_client_ml_tools):
+    # Arrange
+    monkeypatch.setattr(ml_tools.settings, "ml_cache_replay", True)
+
+    cache = ml_tools.QueryCache(max_size=8, ttl_seconds=60)
+    digest = ml_tools._payload_digest(_SERVING_PAYLOAD)
+
+    # Act & Assert - a miss is the caller's request not being recorded, with the cache key in the message
+    with patch.object(ml_tools, "_prediction_cache", cache), pytest.raises(Exception) as exc_info:
+        await query_model_serving_endpoint(endpoint_name="ep", input_data=_SERVING_PAYLOAD)
+    assert f"[MCP Error Code {CODE_INVALID_PARAMS}]" in str(exc_info.value)
+    assert f"Cache miss in replay mode for endpoint 'ep' (payload digest {digest})" in str(exc_info.value)
+    mock_db_client_ml_tools.serving_endpoints.query.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_query_model_serving_endpoint_replays_recorded_response(monkeypatch, mock_db_client_ml_tools):
+    # Arrange - record one live response, then switch to replay
+    mock_db_client_ml_tools.serving_endpoints.query.return_value = serving.QueryEndpointResponse(predictions=[7])
+    cache = ml_tools.QueryCache(max_size=8, ttl_seconds=60)
+    records = [{"x": 1}]
+
+    with patch.object(ml_tools, "_prediction_cache", cache):
+        recorded = await query_model_serving_endpoint(endpoint_name="ep", input_data=records)
+        monkeypatch.setattr(ml_tools.settings, "ml_cache_replay", True)
+
+        # Act - the same request, spelled as an explicit request body
+        replayed = await query_model_serving_endpoint(endpoint_name="ep", input_data={"dataframe_records": records})
+
+    # Assert
+    assert replayed == recorded == {"predictions": [7]}
+    mock_db_client_ml_tools.serving_endpoints.query.assert_called_once_with(name="ep", dataframe_records=records)
+
+@pytest.mark.asyncio
+async def test_query_model_serving_endpoint_replay_rejects_invalid_payload(monkeypatch):
+    monkeypatch.setattr(ml_tools.settings, "ml_cache_replay", True)
+    with patch.object(ml_tools, "_prediction_cache", ml_tools.QueryCache(max_size=8, ttl_seconds=60)), \
+            pytest.raises(Exception, match="Unsupported input_data fields: request"):
+        await query_model_serving_endpoint(endpoint_name="ep", input_data={"inputs": [1], "request": {}})
+
+@pytest.mark.asyncio
+async def test_query_model_serving_endpoint_without_predictions_returns_full_response(mock_db_client_ml_tools):
+    # Arrange - e.g. a chat endpoint: predictions is None, payload lives in other fields
+    response = serving.QueryEndpointResponse(id="resp-1", object=serving.QueryEndpointResponseObject.CHAT_COMPLETION)
+    mock_db_client_ml_tools.serving_endpoints.query.return_value = response
+
+    # Act
+    result = await query_model_serving_endpoint(endpoint_name="chat-ep", input_data={"messages": []})
+
+    # Assert
+    assert result == {"predictions": {"id": "resp-1", "object": "chat.completion"}}
+
+@pytest.mark.asyncio
+async def test_query_model_serving_endpoint_batch_single_request(mock_db_client_ml_tools):
+    # Arrange
+    records = [{"x": 1}, {"x": 2}, {"x": 3}]
+    mock_db_client_ml_tools.serving_endpoints.query.return_value = serving.QueryEndpointResponse(predictions=[0.1, 0.2, 0.3])
+
+    # Act
+    result = await query_model_serving_endpoint_batch(endpoint_name="ep", inputs=records)
+
+    # Assert - all inputs go out in one call
+    mock_db_client_ml_tools.serving_endpoints.query.assert_called_once_with(name="ep", dataframe_records=records)
+    assert result == {"predictions": [0.1, 0.2, 0.3], "count": 3}
+
+@pytest.mark.asyncio
+async def test_query_model_serving_endpoint_batch_rejects_unknown_format(mock_db_client_ml_tools):
+    with pytest.raises(Exception, match="Unsupported input_format 'rows'"):
+        await query_model_serving_endpoint_batch(endpoint_name="ep", inputs=[{"x": 1}], input_format="rows")
+    mock_db_client_ml_tools.serving_endpoints.query.assert_not_called()
+
 # --- Tests for add_to_vector_index ---
 def test_add_to_vector_index_success(mock_db_client_ml_tools):
     # Arrange
     index = "catalog.schema.vs_index"
     pk = "id"
-    docs = [{"id": 1, "text": "doc1"}, {"id": 2, "text": "doc2"}]
-    mock_response = MagicMock() # Response structure might vary
-    # Corrected mock response structure based on UpsertDataVectorIndexResponse
-    upsert_result = MagicMock(spec=vs.UpsertDataResult)
-    upsert_result.success_row_count = 2
-    upsert_result.failed_primary_keys = []
-    mock_response.status = vs.UpsertDataStatus.SUCCESS
-    mock_response.result = upsert_result
+    mock_response = vs.UpsertDataVectorIndexResponse(
+        status=vs.UpsertDataStatus.SUCCESS,
+        result=vs.UpsertDataResult(success_row_count=2, failed_primary_keys=[]),
+    )
     mock_db_client_ml_tools.vector_search_indexes.upsert_data_vector_index.return_value = mock_response # Correct method name
 
     # Act
-    result = add_to_vector_index(index_name=index, primary_key=pk, documents=docs)
+    result = add_to_vector_index(index_name=index, primary_key=pk, documents=_DOCS)
 
     # Assert
-    mock_db_client_ml_tools.vector_search_indexes.upsert_data_vector_index.assert_called_once_with( # Correct method name
-        index_name=index,
-        # primary_key=pk, # API takes inputs_json, not primary key here
-        inputs_json=json.dumps(docs)
-    )
+    mock_db_client_ml_tools.vector_search_indexes.upsert_data_vector_index.assert_called_once() # Correct method name
+    call_kwargs = mock_db_client_ml_tools.vector_search_indexes.upsert_data_vector_index.call_args.kwargs
+    assert call_kwargs["index_name"] == index
+    # primary_key=pk, # API takes inputs_json, not primary key here
+    assert json.loads(call_kwargs["inputs_json"]) == _DOCS
     assert result["status"] == "SUCCESS"
     assert result["num_added"] == 2
 
+def test_add_to_vector_index_large_batch_is_chunked(mock_db_client_ml_tools):
+    # Arrange
+    docs = [{"id": i} for i in range(5)]
+    upsert = mock_db_client_ml_tools.vector_search_indexes.upsert_data_vector_index
+
+    def fake_upsert(inputs_json, **_):
+        chunk = json.loads(inputs_json)
+        response = MagicMock()
+        response.status = vs.UpsertDataStatus.SUCCESS if len(chunk) == 2 else vs.UpsertDataStatus.PARTIAL_SUCCESS
+        response.result.success_row_count = len(chunk) if len(chunk) == 2 else 0
+        response.result.failed_primary_keys = [] if len(chunk) == 2 else [str(chunk[0]["id"])]
+        return response
+    upsert.side_effect = fake_upsert
+
+    # Act
+    with patch.object(ml_tools, "UPSERT_CHUNK_DOCS", 2):
+        result = add_to_vector_index(index_name="idx", primary_key="id", documents=docs)
+
+    # Assert - every document is sent exactly once across the chunks
+    assert upsert.call_count == 3
+    sent = sorted(d["id"] for c in upsert.call_args_list for d in json.loads(c.kwargs["inputs_json"]))
+    assert sent == list(range(5))
+    assert result["status"] == "PARTIAL_SUCCESS"
+    assert result["num_added"] == 4
+    assert result["response_summary"]["failed_primary_keys"] == ["4"]
+
+def test_upsert_in_chunks_consumes_iterables_lazily(mock_db_client_ml_tools):
+    # Arrange - a generator that records how far it has been consumed
+    consumed = []
+    def docs():
+        for i in range(7):
+            consumed.append(i)
+            yield {"id": i}
+    upsert = mock_db_client_ml_tools.vector_search_indexes.upsert_data_vector_index
+    upsert.return_value = MagicMock(result=None)
+
+    # Act
+    with patch.object(ml_tools, "UPSERT_CHUNK_DOCS", 3):
+        summaries = ml_tools._upsert_in_chunks(mock_db_client_ml_tools, "idx", docs())
+
+    # Assert
+    assert consumed == list(range(7))
+    assert summaries == [None, None, None]
+    assert sorted(len(json.loads(c.kwargs["inputs_json"])) for c in upsert.call_args_list) == [1, 3, 3]
+
+def _upsert_rejecting_over(max_docs):
+    # upsert_data_vector_index fake that rejects chunks over max_docs like a 413 with an HTML body
+    def fake_upsert(inputs_json, **_):
+        chunk = json.loads(inputs_json)
+        if len(chunk) > max_docs:
+            raise DatabricksError("Request Entity Too Large", error_code="REQUEST_ENTITY_TOO_LARGE")
+        return vs.UpsertDataVectorIndexResponse(
+            status=vs.UpsertDataStatus.SUCCESS, result=vs.UpsertDataResult(success_row_count=len(chunk)),
+        )
+    return fake_upsert
+
+def test_add_to_vector_index_splits_rejected_chunk(mock_db_client_ml_tools):
+    # Arrange
+    upsert = mock_db_client_ml_tools.vector_search_indexes.upsert_data_vector_index
+    upsert.side_effect = _upsert_rejecting_over(2)
+
+    # Act
+    with patch.object(ml_tools, "UPSERT_MIN_CHUNK_DOCS", 1):
+        result = add_to_vector_index(index_name="idx", primary_key="id", documents=_FOUR_DOCS)
+
+    # Assert - the 4-doc request is retried as two halves
+    assert [len(json.loads(c.kwargs["inputs_json"])) for c in upsert.call_args_list] == [4, 2, 2]
+    assert result["status"] == "SUCCESS"
+    assert result["num_added"] == 4
+
+def test_add_to_vector_index_does_not_split_on_other_errors(mock_db_client_ml_tools):
+    # Arrange
+    upsert = mock_db_client_ml_tools.vector_search_indexes.upsert_data_vector_index
+    upsert.side_effect = PermissionDenied("No access to index")
+
+    # Act & Assert
+    with patch.object(ml_tools, "UPSERT_MIN_CHUNK_DOCS", 1), pytest.raises(Exception, match="No access to index"):
+        add_to_vector_index(index_name="idx", primary_key="id", documents=_FOUR_DOCS)
+    assert upsert.call_count == 1
+
+@pytest.mark.parametrize(
+    ("error", "expected"),
+    [
+        pytest.param(DatabricksError("Request Entity Too Large"), True, id="413-empty-body"),
+        pytest.param(DatabricksError("too big", error_code="PAYLOAD_TOO_LARGE"), True, id="413-error-code"),
+        pytest.param(ResourceExhausted("Request size exceeds 10MB", error_code="RESOURCE_EXHAUSTED"), True, id="quota-size"),
+        pytest.param(ResourceExhausted("Quota of 10 indexes reached", error_code="RESOURCE_EXHAUSTED"), False, id="quota-other"),
+        pytest.param(DatabricksError("Something went wrong"), False, id="bare-error"),
+        pytest.param(InternalError("payload too large", error_code="INTERNAL_ERROR"), False, id="other-code"),
+    ],
+)
+def test_is_size_rejection(error, expected):
+    assert ml_tools._is_size_rejection(error) is expected
+
+def test_upsert_in_chunks_adapts_chunk_size(mock_db_client_ml_tools):
+    # Arrange - one chunk in flight at a time so the order of requests is fixed
+    upsert = mock_db_client_ml_tools.vector_search_indexes.upsert_data_vector_index
+    upsert.side_effect = _upsert_rejecting_over(2)
+
+    # Act
+    with patch.object(ml_tools, "UPSERT_CHUNK_DOCS", 4), patch.object(ml_tools, "UPSERT_WORKERS", 1), \
+            patch.object(ml_tools, "UPSERT_MIN_CHUNK_DOCS", 1):
+        summaries = ml_tools._upsert_in_chunks(mock_db_client_ml_tools, "idx", [{"id": i} for i in range(12)])
+
+    # Assert - split chunks halve the next chunk size, clean chunks double it back
+    assert [len(json.loads(c.kwargs["inputs_json"])) for c in upsert.call_args_list] == [4, 2, 2, 2, 4, 2, 2, 2]
+    assert sum(s["success_row_count"] for s in summaries) == 12
+
 def test_add_to_vector_index_api_not_found(mock_db_client_ml_tools):
     # Arrange - Simulate the method not existing
     # Check if vector_search_indexes attribute exists before deleting the method
@@ -93,24 +355,22 @@ def test_add_to_vector_index_api_not_found(mock_db_client_ml_tools):
     assert "Vector Search upsert functionality not available" in str(exc_info.value)
 
 # --- Tests for query_vector_index ---
-def test_query_vector_index_success_with_vector(mock_db_client_ml_tools):
+@pytest.mark.asyncio
+async def test_query_vector_index_success_with_vector(mock_db_client_ml_tools):
     # Arrange
     index = "catalog.schema.vs_index"
     query_vec = [0.1, 0.2, 0.3]
     cols = ["id", "text"]
-    mock_manifest = MagicMock(spec=vs.ResultManifest)
-    mock_manifest.as_dict.return_value = {"schema": {"columns": [{"name": "id"}, {"name": "text"}]}}
-    mock_result = MagicMock(spec=vs.ResultData)
-    mock_result.data_array = [[1, "doc1"], [5, "doc5"]]
-    mock_response = MagicMock(spec=vs.QueryVectorIndexResponse)
-    mock_response.result = mock_result
-    # Ensure manifest is set on the result object within the response
-    mock_response.result.manifest = mock_manifest
+    mock_response = vs.QueryVectorIndexResponse(
+        result=vs.ResultData(data_array=[[1, "doc1"], [5, "doc5"]]),
+        # The manifest sits next to result on the response
+        manifest=vs.ResultManifest(column_count=2, columns=[vs.ColumnInfo(name="id"), vs.ColumnInfo(name="text")]),
+    )
 
     mock_db_client_ml_tools.vector_search_indexes.query_index.return_value = mock_response
 
     # Act
-    result = query_vector_index(
+    result = await query_vector_index(
         index_name=index,
         columns=cols,
         query_vector=query_vec,
@@ -128,22 +388,64 @@ def test_query_vector_index_success_with_vector(mock_db_client_ml_tools):
         query_type="ANN"
     )
     assert result["results"] == [[1, "doc1"], [5, "doc5"]]
-    assert result["manifest"] is not None # Check manifest was returned
+    assert result["manifest"] == {"column_count": 2, "columns": [{"name": "id"}, {"name": "text"}]} # Check manifest was returned
 
-def test_query_vector_index_success_with_text(mock_db_client_ml_tools):
+@pytest.mark.asyncio
+async def test_query_vector_index_replay_miss(monkeypatch, mock_db_client_ml_tools):
+    # Arrange
+    monkeypatch.setattr(ml_tools.settings, "ml_cache_replay", True)
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        await query_vector_index(index_name="idx", columns=["id"], query_text="q")
+    assert f"[MCP Error Code {CODE_INVALID_PARAMS}]" in str(exc_info.value)
+    assert "Cache miss in replay mode for index 'idx' (scope ('idx', ('id',), None, 10, 'ANN'), query 'q')" in str(exc_info.value)
+    mock_db_client_ml_tools.vector_search_indexes.query_index.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_query_vector_index_replay_hit(monkeypatch, mock_db_client_ml_tools):
+    # Arrange - a recorded run warms the cache
+    query_index = mock_db_client_ml_tools.vector_search_indexes.query_index
+    query_index.return_value = _mock_query_response([[1]])
+    recorded = await query_vector_index(index_name="idx", columns=["id"], query_text="q")
+    monkeypatch.setattr(ml_tools.settings, "ml_cache_replay", True)
+
+    # Act
+    replayed = await query_vector_index(index_name="idx", columns=["id"], query_text="q")
+
+    # Assert - the replay is served without another SDK call
+    assert replayed == recorded
+    query_index.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_query_vector_index_reuses_manifest_dict(mock_db_client_ml_tools):
+    # Arrange - two different queries against the same index and columns
+    manifest = MagicMock()
+    manifest.as_dict.return_value = {"column_count": 1, "columns": [{"name": "id"}]}
+    mock_db_client_ml_tools.vector_search_indexes.query_index.return_value = vs.QueryVectorIndexResponse(
+        result=vs.ResultData(data_array=[[1]]), manifest=manifest,
+    )
+
+    # Act
+    first = await query_vector_index(index_name="idx", columns=["id"], query_text="one")
+    second = await query_vector_index(index_name="idx", columns=["id"], query_text="two")
+
+    # Assert - both responses carry the manifest, converted once
+    assert first["manifest"] == second["manifest"] == {"column_count": 1, "columns": [{"name": "id"}]}
+    assert mock_db_client_ml_tools.vector_search_indexes.query_index.call_count == 2
+    assert manifest.as_dict.call_count == 1
+
+@pytest.mark.asyncio
+async def test_query_vector_index_success_with_text(mock_db_client_ml_tools):
     # Arrange
     index = "catalog.schema.vs_index_with_endpoint"
     query_txt = "search for this"
     cols = ["id"]
-    mock_result = MagicMock(spec=vs.ResultData)
-    mock_result.data_array = [[10]]
-    mock_result.manifest = None # No manifest in this mock case
-    mock_response = MagicMock(spec=vs.QueryVectorIndexResponse)
-    mock_response.result = mock_result
-    mock_db_client_ml_tools.vector_search_indexes.query_index.return_value = mock_response
+    # No manifest in this mock case
+    mock_db_client_ml_tools.vector_search_indexes.query_index.return_value = _mock_query_response([[10]])
 
     # Act
-    result = query_vector_index(
+    result = await query_vector_index(
         index_name=index,
         columns=cols,
         query_text=query_txt
@@ -155,28 +457,30 @@ def test_query_vector_index_success_with_text(mock_db_client_ml_tools):
     )
     assert result["results"] == [[10]]
 
-def test_query_vector_index_missing_query():
+@pytest.mark.asyncio
+async def test_query_vector_index_missing_query():
     # Act & Assert
     # with pytest.raises(ValueError, match="Either 'query_vector' or 'query_text' must be provided."): # OLD
     with pytest.raises(Exception) as exc_info:
-        query_vector_index(index_name="idx", columns=["id"])
-    # Check wrapped exception (ValueError likely maps to Invalid Params or Internal Error)
-    # Assuming Internal Error for now as it's a programming error in the caller
-    assert f"[MCP Error Code {CODE_INTERNAL_ERROR}]" in str(exc_info.value)
+        await query_vector_index(index_name="idx", columns=["id"])
+    # Check wrapped exception (ValueError maps to Invalid Params)
+    assert f"[MCP Error Code {CODE_INVALID_PARAMS}]" in str(exc_info.value)
     assert "ValueError" in str(exc_info.value)
     assert "Either 'query_vector' or 'query_text' must be provided." in str(exc_info.value)
 
-def test_query_vector_index_both_queries():
+@pytest.mark.asyncio
+async def test_query_vector_index_both_queries():
      # Act & Assert
     # with pytest.raises(ValueError, match="Provide only one of 'query_vector' or 'query_text'."): # OLD
     with pytest.raises(Exception) as exc_info:
-        query_vector_index(index_name="idx", columns=["id"], query_vector=[0.1], query_text="text")
+        await query_vector_index(index_name="idx", columns=["id"], query_vector=[0.1], query_text="text")
     # Check wrapped exception
-    assert f"[MCP Error Code {CODE_INTERNAL_ERROR}]" in str(exc_info.value)
+    assert f"[MCP Error Code {CODE_INVALID_PARAMS}]" in str(exc_info.value)
     assert "ValueError" in str(exc_info.value)
     assert "Provide only one of 'query_vector' or 'query_text'." in str(exc_info.value)
 
-def test_query_vector_index_api_not_found(mock_db_client_ml_tools):
+@pytest.mark.asyncio
+async def test_query_vector_index_api_not_found(mock_db_client_ml_tools):
      # Arrange - Simulate the method not existing
     if hasattr(mock_db_client_ml_tools, 'vector_search_indexes'):
         del mock_db_client_ml_tools.vector_search_indexes.query_index # Correct method name
@@ -186,8 +490,174 @@ def test_query_vector_index_api_not_found(mock_db_client_ml_tools):
     # Act & Assert
     # with pytest.raises(NotImplementedError, match="Vector Search query functionality not available"): # OLD
     with pytest.raises(Exception) as exc_info:
-        query_vector_index(index_name="idx", columns=["id"], query_text="test")
+        await query_vector_index(index_name="idx", columns=["id"], query_text="test")
     # Check wrapped exception
     assert f"[MCP Error Code {CODE_INTERNAL_ERROR}]" in str(exc_info.value)
     assert "NotImplementedError" in str(exc_info.value)
     assert "Vector Search query functionality not available" in str(exc_info.value)
+
+def _mock_query_response(rows):
+    return vs.QueryVectorIndexResponse(result=vs.ResultData(data_array=rows))
+
+@pytest.mark.asyncio
+async def test_query_vector_index_repeat_query_served_from_cache(mock_db_client_ml_tools):
+    # Arrange
+    mock_db_client_ml_tools.vector_search_indexes.query_index.return_value = _mock_query_response([[1]])
+
+    # Act
+    first = await query_vector_index(index_name="idx", columns=["id"], query_text="hello")
+    second = await query_vector_index(index_name="idx", columns=["id"], query_text="hello")
+    other = await query_vector_index(index_name="idx", columns=["id"], query_text="hello", num_results=3)
+
+    # Assert - only the identical query is a hit
+    assert first == second == other == {"results": [[1]], "manifest": None}
+    assert mock_db_client_ml_tools.vector_search_indexes.query_index.call_count == 2
+
+@pytest.mark.asyncio
+async def test_query_vector_index_vector_lookup_runs_off_event_loop(mock_db_client_ml_tools):
+    # Arrange - record the thread each lookup runs on
+    mock_db_client_ml_tools.vector_search_indexes.query_index.return_value = _mock_query_response([[1]])
+    lookup = ml_tools._query_cache.lookup
+    threads = []
+    def recording_lookup(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return lookup(*args, **kwargs)
+
+    # Act
+    with patch.object(ml_tools._query_cache, "lookup", recording_lookup):
+        await query_vector_index(index_name="idx", columns=["id"], query_vector=[0.1, 0.2])
+        await query_vector_index(index_name="idx", columns=["id"], query_text="hello")
+
+    # Assert - only the vector lookup (which may scan every cached vector) leaves the loop's thread
+    assert [thread is threading.main_thread() for thread in threads] == [False, True]
+
+@pytest.mark.asyncio
+async def test_add_to_vector_index_invalidates_cached_queries(mock_db_client_ml_tools):
+    # Arrange
+    mock_db_client_ml_tools.vector_search_indexes.query_index.return_value = _mock_query_response([[1]])
+    await query_vector_index(index_name="idx", columns=["id"], query_vector=[0.1, 0.2])
+
+    # Act
+    add_to_vector_index(index_name="idx", primary_key="id", documents=[{"id": 2}])
+    await query_vector_index(index_name="idx", columns=["id"], query_vector=[0.1, 0.2])
+
+    # Assert
+    assert mock_db_client_ml_tools.vector_search_indexes.query_index.call_count == 2
+
+@pytest.mark.asyncio
+async def test_add_to_vector_index_invalidates_cached_queries_on_failure(mock_db_client_ml_tools):
+    # Arrange - the upsert fails after the query was cached
+    index_api = mock_db_client_ml_tools.vector_search_indexes
+    index_api.query_index.return_value = _mock_query_response([[1]])
+    index_api.upsert_data_vector_index.side_effect = DatabricksError("boom")
+    await query_vector_index(index_name="idx", columns=["id"], query_vector=[0.1, 0.2])
+
+    # Act - some chunks may have been written before the failure
+    with pytest.raises(Exception, match="boom"):
+        add_to_vector_index(index_name="idx", primary_key="id", documents=[{"id": 2}])
+    await query_vector_index(index_name="idx", columns=["id"], query_vector=[0.1, 0.2])
+
+    # Assert
+    assert index_api.query_index.call_count == 2
+
+def test_add_to_vector_index_chunked_sends_last_document_per_primary_key(mock_db_client_ml_tools):
+    # Arrange - id 1 appears twice and would otherwise land in different concurrent chunks
+    docs = [{"id": 1, "v": "old"}, {"id": 2}, {"v": "no key"}, {"id": 1, "v": "new"}]
+    upsert = mock_db_client_ml_tools.vector_search_indexes.upsert_data_vector_index
+    upsert.return_value = MagicMock(result=None)
+
+    # Act
+    with patch.object(ml_tools, "UPSERT_CHUNK_DOCS", 2):
+        add_to_vector_index(index_name="idx", primary_key="id", documents=docs)
+
+    # Assert
+    sent = [d for c in upsert.call_args_list for d in json.loads(c.kwargs["inputs_json"])]
+    assert sorted(sent, key=str) == sorted([{"id": 1, "v": "new"}, {"id": 2}, {"v": "no key"}], key=str)
+
+@pytest.mark.asyncio
+async def test_query_vector_index_verifies_approximate_hit(mock_db_client_ml_tools):
+    # Arrange - a similar vector is cached, and the fresh query disagrees with it
+    cache = ml_tools.QueryCache(max_size=8, ttl_seconds=60, min_similarity=0.9)
+    mock_db_client_ml_tools.vector_search_indexes.query_index.side_effect = [
+        _mock_query_response([[1], [2]]),
+        _mock_query_response([[3], [4]]),
+    ]
+    with patch.object(ml_tools, "_query_cache", cache), \
+            patch.object(ml_tools.settings, "vector_query_cache_verify_rate", 1.0):
+        await query_vector_index(index_name="idx", columns=["id"], query_vector=[1.0, 0.0])
+
+        # Act
+        result = await query_vector_index(index_name="idx", columns=["id"], query_vector=[0.99, 0.05])
+
+    # Assert - the fresh result is returned and the index's threshold tightened
+    assert result["results"] == [[3], [4]]
+    assert mock_db_client_ml_tools.vector_search_indexes.query_index.call_count == 2
+    assert cache.threshold("idx") == pytest.approx(0.91)
+
+@pytest.mark.asyncio
+async def test_query_vector_index_equivalent_filters_share_cache(mock_db_client_ml_tools):
+    # Arrange
+    mock_db_client_ml_tools.vector_search_indexes.query_index.return_value = _mock_query_response([[1]])
+
+    # Act - same filter, different key order and whitespace
+    await query_vector_index(index_name="idx", columns=["id"], query_text="q", filters_json='{"b": 2, "a": [1]}')
+    await query_vector_index(index_name="idx", columns=["id"], query_text="q", filters_json='{"a":[1],"b":2}')
+
+    # Assert - one request, sent with the canonical filter string
+    mock_db_client_ml_tools.vector_search_indexes.query_index.assert_called_once()
+    call_kwargs = mock_db_client_ml_tools.vector_search_indexes.query_index.call_args.kwargs
+    assert call_kwargs["filters_json"] == '{"a":[1],"b":2}'
+
+@pytest.mark.asyncio
+async def test_query_vector_index_invalid_filters_json(mock_db_client_ml_tools):
+    with pytest.raises(Exception, match="'filters_json' is not valid JSON"):
+        await query_vector_index(index_name="idx", columns=["id"], query_text="q", filters_json="{tenant_id: 1")
+    mock_db_client_ml_tools.vector_search_indexes.query_index.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_query_vector_index_joins_inflight_query(mock_db_client_ml_tools):
+    # Arrange - an identical query is already running
+    shared = {"results": [[7]], "manifest": None}
+    inflight = Future()
+    inflight.set_result(shared)
+    key = (("idx", ("id",), None, 10, "ANN"), "hello", None)
+    ml_tools._inflight_queries[key] = inflight
+    try:
+        # Act
+        result = await query_vector_index(index_name="idx", columns=["id"], query_text="hello")
+    finally:
+        ml_tools._inflight_queries.pop(key, None)
+
+    # Assert - the in-flight result is reused without another API call
+    assert result is shared
+    mock_db_client_ml_tools.vector_search_indexes.query_index.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_query_vector_index_reads_sdk_response_fields(mock_db_client_ml_tools):
+    # Arrange - a real response object as built by the SDK from the REST payload
+    response = vs.QueryVectorIndexResponse.from_dict({
+        "manifest": {"column_count": 1, "columns": [{"name": "id"}]},
+        "result": {"data_array": [["1"], ["2"]], "row_count": 2},
+    })
+    mock_db_client_ml_tools.vector_search_indexes.query_index.return_value = response
+
+    # Act
+    result = await query_vector_index(index_name="idx", columns=["id"], query_text="q")
+
+    # Assert
+    assert result == {"results": [["1"], ["2"]], "manifest": {"column_count": 1, "columns": [{"name": "id"}]}}
+
+@pytest.mark.asyncio
+async def test_query_vector_index_accepts_array_like_vector(mock_db_client_ml_tools):
+    # Arrange - stand-in for a 1-D numpy array
+    array = MagicMock()
+    array.ndim = 1
+    array.tolist.return_value = [0.5, 0.25]
+    mock_db_client_ml_tools.vector_search_indexes.query_index.return_value = _mock_query_response([[1]])
+
+    # Act
+    await query_vector_index(index_name="idx", columns=["id"], query_vector=array)
+
+    # Assert - converted once, the SDK receives a plain list
+    array.tolist.assert_called_once_with()
+    assert mock_db_client_ml_tools.vector_search_indexes.query_index.call_args.kwargs["query_vector"] == [0.5, 0.25]
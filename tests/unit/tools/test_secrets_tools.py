@@ -1,95 +1,140 @@
 import base64
 from unittest.mock import MagicMock
-from unittest.mock import patch
 
 import pytest
-from databricks.sdk.service import iam as secrets_service
-# from databricks.sdk.service import secrets as secrets_service # Incorrect
-from databricks_mcp import error_mapping as mcp_errors # Add this import
-# Import specific code needed for assertion
-from databricks_mcp.error_mapping import CODE_PERMISSION_DENIED
-from databricks_mcp.error_mapping import CODE_INTERNAL_ERROR # Add this import
+from databricks.sdk.errors import PermissionDenied
+from databricks.sdk.service import workspace as workspace_service
+from structlog.testing import capture_logs
+from databricks_mcp.error_mapping import CODE_INTERNAL_ERROR
 
 from databricks_mcp.tools.secrets import delete_secret
+from databricks_mcp.tools.secrets import delete_secrets_bulk
 from databricks_mcp.tools.secrets import get_secret
 from databricks_mcp.tools.secrets import put_secret
-from databricks_mcp.db_client import get_db_client # To mock
+from databricks_mcp.tools.secrets import put_secrets_bulk
 
 
 # Mock settings for conditional check
 @pytest.fixture
-def mock_settings():
+def mock_settings(monkeypatch):
     mock = MagicMock()
     # Default to enabled for most tests, override when needed
     mock.enable_get_secret = True
-    with patch('databricks_mcp.tools.secrets.settings', mock):
-        yield mock
-
-# Mock the get_db_client function
-@pytest.fixture(autouse=True)
-def mock_db_client_secrets_tools():
-    mock_client = MagicMock()
-    # Assign unused variable to _
-    with patch('databricks_mcp.tools.secrets.get_db_client', return_value=mock_client) as _:
-        yield mock_client
-
+    monkeypatch.setattr('databricks_mcp.tools.secrets.settings', mock)
+    return mock
 
 # --- Tests for get_secret ---
-def test_get_secret_success_string(mock_settings, mock_db_client_secrets_tools):
+@pytest.mark.asyncio
+async def test_get_secret_success_string(mock_settings, tool_client):
     # Arrange
     scope = "scope1"
     key = "key1"
     value_bytes = b"my_secret_value"
-    mock_db_client_secrets_tools.secrets.get_secret.return_value = MagicMock(value=value_bytes)
+    tool_client.secrets.get_secret.return_value = workspace_service.GetSecretResponse(value=value_bytes)
     mock_settings.enable_get_secret = True # Ensure enabled
 
     # Act
-    result = get_secret(scope_name=scope, key=key)
+    result = await get_secret(scope_name=scope, key=key)
 
     # Assert
-    mock_db_client_secrets_tools.secrets.get_secret.assert_called_once_with(scope=scope, key=key)
+    tool_client.secrets.get_secret.assert_called_once_with(scope=scope, key=key)
     assert result["scope"] == scope
     assert result["key"] == key
     assert result["value_string"] == "my_secret_value"
     assert "value_base64" not in result
     assert result["value_bytes"] is None
 
-def test_get_secret_success_bytes(mock_settings, mock_db_client_secrets_tools):
+@pytest.mark.asyncio
+async def test_get_secret_success_bytes(mock_settings, tool_client):
     # Arrange
     scope = "scope_bin"
     key = "key_bin"
     value_bytes = b'\x01\x02\xff\xfe' # Non-utf8 bytes
     encoded_value = base64.b64encode(value_bytes).decode('ascii')
-    mock_db_client_secrets_tools.secrets.get_secret.return_value = MagicMock(value=value_bytes)
+    tool_client.secrets.get_secret.return_value = workspace_service.GetSecretResponse(value=value_bytes)
     mock_settings.enable_get_secret = True
 
     # Act
-    result = get_secret(scope_name=scope, key=key)
+    result = await get_secret(scope_name=scope, key=key)
 
     # Assert
-    mock_db_client_secrets_tools.secrets.get_secret.assert_called_once_with(scope=scope, key=key)
+    tool_client.secrets.get_secret.assert_called_once_with(scope=scope, key=key)
     assert result["scope"] == scope
     assert result["key"] == key
     assert result["value_string"] is None
     assert result["value_base64"] == encoded_value
 
 
-def test_get_secret_disabled(mock_settings, mock_db_client_secrets_tools):
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("mock_settings")
+async def test_get_secret_success_non_ascii_utf8(tool_client):
+    # Arrange - misses the ASCII fast path but is still valid UTF-8 text
+    tool_client.secrets.get_secret.return_value = workspace_service.GetSecretResponse(value="café".encode())
+
+    # Act
+    result = await get_secret(scope_name="s", key="accented")
+
+    # Assert
+    assert result["value_string"] == "café"
+    assert "value_base64" not in result
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("mock_settings")
+async def test_get_secret_api_base64_value(tool_client):
+    # Arrange - the Secrets API returns values base64-encoded
+    text_b64 = base64.b64encode(b"plain text").decode('ascii')
+    binary_b64 = base64.b64encode(b'\x01\x02\xff\xfe').decode('ascii')
+    tool_client.secrets.get_secret.side_effect = [
+        workspace_service.GetSecretResponse(value=text_b64),
+        workspace_service.GetSecretResponse(value=binary_b64),
+    ]
+
+    # Act
+    text_result = await get_secret(scope_name="s", key="text")
+    binary_result = await get_secret(scope_name="s", key="binary")
+
+    # Assert - text is decoded; binary keeps the API's base64 string
+    assert text_result["value_string"] == "plain text"
+    assert binary_result["value_string"] is None
+    assert binary_result["value_base64"] == binary_b64
+
+
+@pytest.mark.asyncio
+async def test_get_secret_disabled(mock_settings, tool_client):
     # Arrange
     mock_settings.enable_get_secret = False # Disable the tool via config mock
 
     # Act & Assert
     with pytest.raises(Exception) as exc_info:
-        get_secret(scope_name="scope", key="key")
+        await get_secret(scope_name="scope", key="key")
 
     # The decorator maps unhandled non-SDK errors to CODE_INTERNAL_ERROR
     assert f"[MCP Error Code {CODE_INTERNAL_ERROR}]" in str(exc_info.value)
     assert "PermissionError" in str(exc_info.value) # Original error type
     assert "disabled by server configuration" in str(exc_info.value) # Original message
-    mock_db_client_secrets_tools.secrets.get_secret.assert_not_called()
+    tool_client.secrets.get_secret.assert_not_called()
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("mock_settings")
+async def test_get_secret_logs_attempt_before_failed_fetch(tool_client):
+    # Arrange - the workspace denies the read
+    tool_client.secrets.get_secret.side_effect = PermissionDenied("no READ permission")
+
+    # Act
+    with capture_logs() as logs, pytest.raises(Exception, match="no READ permission"):
+        await get_secret(scope_name="scope", key="key")
+
+    # Assert - the attempt is audited with scope and key only, ahead of the error mapper's record
+    assert logs[0] == {
+        "event": "Retrieving secret value (SECURITY SENSITIVE)",
+        "log_level": "warning",
+        "scope": "scope",
+        "key": "key",
+    }
 
 # --- Tests for put_secret ---
-def test_put_secret_success(mock_db_client_secrets_tools):
+def test_put_secret_success(tool_client):
     # Arrange
     scope = "scope_put"
     key = "new_key"
@@ -99,11 +144,11 @@ def test_put_secret_success(mock_db_client_secrets_tools):
     result = put_secret(scope_name=scope, key=key, secret_value=value)
 
     # Assert
-    mock_db_client_secrets_tools.secrets.put_secret.assert_called_once_with(scope=scope, key=key, string_value=value)
+    tool_client.secrets.put_secret.assert_called_once_with(scope=scope, key=key, string_value=value)
     assert result == {"scope": scope, "key": key, "status": "SUCCESS"}
 
 # --- Tests for delete_secret ---
-def test_delete_secret_success(mock_db_client_secrets_tools):
+def test_delete_secret_success(tool_client):
      # Arrange
     scope = "scope_del"
     key = "del_key"
@@ -112,7 +157,38 @@ def test_delete_secret_success(mock_db_client_secrets_tools):
     result = delete_secret(scope_name=scope, key=key)
 
     # Assert
-    mock_db_client_secrets_tools.secrets.delete_secret.assert_called_once_with(scope=scope, key=key)
+    tool_client.secrets.delete_secret.assert_called_once_with(scope=scope, key=key)
     assert result == {"scope": scope, "key": key, "status": "SUCCESS"}
 
 # Add tests for SDK error mapping if needed
+
+# --- Tests for bulk secret tools ---
+@pytest.mark.asyncio
+async def test_put_secrets_bulk_reports_per_key_status(tool_client):
+    # Arrange - the second key fails
+    def fake_put(key, **_):
+        if key == "bad":
+            raise RuntimeError("quota exceeded")
+    tool_client.secrets.put_secret.side_effect = fake_put
+
+    # Act
+    result = await put_secrets_bulk(scope_name="s", secrets={"good": "v1", "bad": "v2"})
+
+    # Assert
+    assert tool_client.secrets.put_secret.call_count == 2
+    tool_client.secrets.put_secret.assert_any_call(scope="s", key="good", string_value="v1")
+    assert result == {
+        "scope": "s",
+        "statuses": {"good": "SUCCESS", "bad": "FAILED"},
+        "errors": {"bad": "quota exceeded"},
+    }
+
+@pytest.mark.asyncio
+async def test_delete_secrets_bulk(tool_client):
+    # Act - "a" is listed twice
+    result = await delete_secrets_bulk(scope_name="s", keys=["a", "b", "a"])
+
+    # Assert - each key is deleted once, so the duplicate can't fail as already deleted
+    assert sorted(c.kwargs["key"] for c in tool_client.secrets.delete_secret.call_args_list) == ["a", "b"]
+    assert result["statuses"] == {"a": "SUCCESS", "b": "SUCCESS"}
+    assert result["errors"] == {}
@@ -1,181 +1,452 @@
+import asyncio
+from types import SimpleNamespace
 from unittest.mock import MagicMock
+from unittest.mock import create_autospec
 from unittest.mock import patch
 
 import pytest
+import structlog
 from databricks.sdk.service import jobs as jobs_service
 # Import compute service for command execution types
 from databricks.sdk.service import compute
-# Remove commands import
-# from databricks.sdk.service.commands import Command, CommandStatus, CommandResults, ResultType
 
+from databricks_mcp import polling
+from databricks_mcp.tools import workspace as workspace_tools
 from databricks_mcp.tools.workspace import execute_code
+from databricks_mcp.tools.workspace import get_notebook_run
 from databricks_mcp.tools.workspace import run_notebook
+from databricks_mcp.tools.workspace import run_notebooks
+from databricks_mcp.tools.workspace import start_notebook_run
 
 
-# Mock the get_db_client function
-@pytest.fixture(autouse=True)
-def mock_db_client_ws_tools(): # Changed fixture name
-    mock_client = MagicMock()
-
-    # Mock Jobs API run_now response and subsequent get_run
-    mock_run_response = MagicMock()
-    mock_run_response.run_id = 12345
-    mock_run_waiter = MagicMock() # The waiter object
-    mock_client.jobs.run_now.return_value = mock_run_waiter
-
-    mock_run_details = MagicMock()
-    mock_run_details.run_id = 12345
-    mock_run_details.run_page_url = "http://example.com/run/12345"
-    mock_run_details.state = MagicMock()
-    mock_run_details.state.life_cycle_state = jobs_service.RunLifeCycleState.TERMINATED
-    mock_run_details.state.result_state = jobs_service.RunResultState.SUCCESS
-    # Make run_now().result() return the details (simulating wait)
-    mock_run_waiter.result.return_value = mock_run_details
-    # Make get_run return the details as well (needed by the implementation)
-    mock_client.jobs.get_run.return_value = mock_run_details
-
-    # Mock Command Execution API (now via Clusters API)
-    mock_cmd_response = MagicMock()
-    mock_cmd_response.id = "cmd-abc"
-    # Use compute.CommandStatus
-    mock_cmd_response.status = compute.CommandStatus.FINISHED
-    mock_cmd_response.results = MagicMock()
-    # Use compute.ResultType
-    mock_cmd_response.results.result_type = compute.ResultType.TEXT
-    mock_cmd_response.results.data = "Command output"
-    mock_execute_waiter = MagicMock()
-    mock_execute_waiter.result.return_value = mock_cmd_response
-    # Mock the execute method on the clusters API
-    mock_client.clusters.execute.return_value = mock_execute_waiter
-    # Remove old mock attribute
-    # mock_client.command_execution = MagicMock()
-    # mock_client.command_execution.execute.return_value = mock_execute_waiter
-
-    # Assign unused variable to _
-    with patch('databricks_mcp.tools.workspace.get_db_client', return_value=mock_client) as _:
-        yield mock_client
+# Happy-path SDK responses, built once at import; the fixture re-attaches them after each reset.
+# Runs and command responses are plain data the tools only read; waiters stay MagicMocks for call tracking
+_RUN_DETAILS = SimpleNamespace(
+    run_id=12345,
+    run_page_url="http://example.com/run/12345",
+    state=SimpleNamespace(
+        life_cycle_state=jobs_service.RunLifeCycleState.TERMINATED,
+        result_state=jobs_service.RunResultState.SUCCESS,
+    ),
+)
+_RUN_WAITER = MagicMock(run_id=12345) # The waiter object returned by jobs.submit
+# Make submit().result() return the details (simulating wait)
+_RUN_WAITER.result.return_value = _RUN_DETAILS
+_CMD_RESPONSE = SimpleNamespace(
+    id="cmd-abc",
+    status=compute.CommandStatus.FINISHED,
+    results=SimpleNamespace(result_type=compute.ResultType.TEXT, data="Command output", cause=None),
+)
+_CONTEXT = SimpleNamespace(id="ctx-1") # Execution context returned by command_execution.create_and_wait
+_EXECUTE_WAITER = MagicMock(command_id="cmd-abc") # Returned by command_execution.execute
+_COMMAND_IDS = {"cluster_id": "c1", "context_id": "ctx-1", "command_id": "cmd-abc"}
+
+# Non-happy-path responses shared by the tests that need them
+_RUNNING_RUN = SimpleNamespace(
+    run_id=12345,
+    run_page_url="http://example.com/run/12345",
+    state=SimpleNamespace(life_cycle_state=jobs_service.RunLifeCycleState.RUNNING, result_state=None),
+)
+_FAILED_RUN_DETAILS = SimpleNamespace(
+    run_id=67890,
+    run_page_url="http://example.com/run/67890",
+    state=SimpleNamespace(
+        life_cycle_state=jobs_service.RunLifeCycleState.TERMINATED,
+        result_state=jobs_service.RunResultState.FAILED,
+        state_message="Notebook failed",
+    ),
+)
+_RUNNING_COMMAND = SimpleNamespace(id="cmd-abc", status=compute.CommandStatus.RUNNING, results=None)
+_ERROR_CMD_RESPONSE = SimpleNamespace(
+    id="cmd-err",
+    status=compute.CommandStatus.ERROR,
+    results=SimpleNamespace(
+        result_type=compute.ResultType.ERROR,
+        cause="Traceback...\\nNameError: name 'x' is not defined",
+        data=None,
+    ),
+)
+
+@pytest.fixture
+def mock_db_client_ws_tools(tool_client):
+    # tool_client arrives reset (see conftest.py); re-wire the happy path. Requested by name:
+    # every test that calls a tool takes it, pure helper tests skip it
+    _RUN_WAITER.reset_mock()
+    _EXECUTE_WAITER.reset_mock()
+
+    tool_client.jobs.submit.return_value = _RUN_WAITER
+    # get_run returns the details as well (completion is polled through it)
+    tool_client.jobs.get_run.return_value = _RUN_DETAILS
+    tool_client.command_execution.create_and_wait.return_value = _CONTEXT
+    tool_client.command_execution.execute.return_value = _EXECUTE_WAITER
+    tool_client.command_execution.command_status.return_value = _CMD_RESPONSE
+    return tool_client
 
 # --- Tests for run_notebook ---
 
-def test_run_notebook_success_existing_cluster(mock_db_client_ws_tools):
-    # Arrange
-    notebook = "/Users/test/my_nb"
-    cluster = "cluster-1"
-    params = {"param1": "value1"}
+@pytest.mark.parametrize(
+    ("notebook", "cluster_id", "parameters", "run_details", "expected"),
+    [
+        pytest.param(
+            "/Users/test/my_nb", "cluster-1", {"param1": "value1"}, _RUN_DETAILS,
+            {"run_id": 12345, "status": "TERMINATED", "result_state": "SUCCESS", "run_page_url": "http://example.com/run/12345"},
+            id="existing_cluster",
+        ),
+        pytest.param(
+            "/Users/test/other_nb", None, None, _RUN_DETAILS,
+            {"run_id": 12345, "status": "TERMINATED", "result_state": "SUCCESS"},
+            id="no_cluster",
+        ),
+        pytest.param(
+            "/fail", "c1", None, _FAILED_RUN_DETAILS,
+            {"run_id": 67890, "status": "TERMINATED", "result_state": "FAILED"},
+            id="failed",
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_run_notebook(mock_db_client_ws_tools, notebook, cluster_id, parameters, run_details, expected):
+    # Arrange - submit returns the new run_id, then get_run returns the finished run
+    mock_db_client_ws_tools.jobs.submit.return_value = MagicMock(run_id=run_details.run_id)
+    mock_db_client_ws_tools.jobs.get_run.return_value = run_details
 
     # Act
-    result = run_notebook(notebook_path=notebook, cluster_id=cluster, parameters=params)
+    result = await run_notebook(notebook_path=notebook, cluster_id=cluster_id, parameters=parameters)
 
-    # Assert
-    mock_db_client_ws_tools.jobs.run_now.assert_called_once_with(
+    # Assert - no cluster spec is passed without a cluster_id
+    mock_db_client_ws_tools.jobs.submit.assert_called_once_with(
         run_name=f"MCP Run: {notebook}",
-        tasks=[{"notebook_task": {"notebook_path": notebook, "base_parameters": params}}],
-        existing_cluster_id=cluster
+        tasks=[jobs_service.SubmitTask(
+            task_key="notebook",
+            notebook_task=jobs_service.NotebookTask(notebook_path=notebook, base_parameters=parameters),
+            existing_cluster_id=cluster_id,
+        )],
     )
-    mock_db_client_ws_tools.jobs.run_now.return_value.result.assert_called_once() # Check wait
-    mock_db_client_ws_tools.jobs.get_run.assert_called_once_with(run_id=12345)
-    assert result["run_id"] == 12345
-    assert result["status"] == "TERMINATED"
-    assert result["result_state"] == "SUCCESS"
-    assert result["run_page_url"] == "http://example.com/run/12345"
+    if cluster_id is None:
+        task_body = mock_db_client_ws_tools.jobs.submit.call_args.kwargs["tasks"][0].as_dict()
+        assert task_body == {"task_key": "notebook", "notebook_task": {"notebook_path": notebook}}
+    # Completion is polled via get_run rather than the blocking waiter
+    mock_db_client_ws_tools.jobs.submit.return_value.result.assert_not_called()
+    mock_db_client_ws_tools.jobs.get_run.assert_called_once_with(run_id=expected["run_id"])
+    assert {key: result[key] for key in expected} == expected
+
+@pytest.mark.asyncio
+async def test_run_notebook_binds_log_context_for_the_call(mock_db_client_ws_tools):
+    seen = {}
+    def submit(**_):
+        seen.update(structlog.contextvars.get_contextvars())
+        return MagicMock(run_id=12345)
+    mock_db_client_ws_tools.jobs.submit.side_effect = submit
+
+    await run_notebook(notebook_path="/Users/test/my_nb", cluster_id="cluster-1")
+
+    assert seen == {"notebook_path": "/Users/test/my_nb", "cluster_id": "cluster-1"}
+    assert structlog.contextvars.get_contextvars() == {}
+
+@pytest.mark.asyncio
+async def test_run_notebook_concurrent_waits_share_polls(mock_db_client_ws_tools):
+    # Arrange - the run is RUNNING for one poll, then TERMINATED
+    finished = mock_db_client_ws_tools.jobs.get_run.return_value
+    mock_db_client_ws_tools.jobs.get_run.side_effect = [_RUNNING_RUN, finished]
+
+    # Act
+    with patch.object(polling, "RUN_POLL_INITIAL_DELAY_SECONDS", 0):
+        results = await asyncio.gather(
+            run_notebook(notebook_path="/nb"),
+            run_notebook(notebook_path="/nb"),
+        )
+
+    # Assert - both callers got the result from the same two polls
+    assert [r["status"] for r in results] == ["TERMINATED", "TERMINATED"]
+    assert mock_db_client_ws_tools.jobs.get_run.call_count == 2
+    assert polling._run_pollers == {}
+
+@pytest.mark.asyncio
+async def test_run_notebook_times_out(mock_db_client_ws_tools):
+    # Arrange - the run never finishes
+    mock_db_client_ws_tools.jobs.get_run.return_value = _RUNNING_RUN
+
+    # Act & Assert
+    with patch.object(polling, "WAIT_TIMEOUT_SECONDS", 0.05), \
+            patch.object(polling, "RUN_POLL_INITIAL_DELAY_SECONDS", 0.01), \
+            pytest.raises(Exception, match="did not finish within"):
+        await run_notebook(notebook_path="/slow")
+    assert polling._run_pollers == {}
+    mock_db_client_ws_tools.jobs.cancel_run.assert_called_once_with(run_id=12345)
+
 
-def test_run_notebook_success_no_cluster(mock_db_client_ws_tools):
+# --- Tests for execute_code ---
+
+@pytest.mark.parametrize(
+    ("code", "cluster_id", "cmd_response", "expected"),
+    [
+        pytest.param(
+            "print('hello')", "cluster-exec", _CMD_RESPONSE,
+            {
+                "command_id": "cmd-abc",
+                "status": compute.CommandStatus.FINISHED.value,
+                "result_type": compute.ResultType.TEXT.value,
+                "result_data": "Command output",
+            },
+            id="success",
+        ),
+        pytest.param(
+            "print(x)", "c-err", _ERROR_CMD_RESPONSE,
+            {
+                "command_id": "cmd-err",
+                "status": compute.CommandStatus.ERROR.value,
+                "result_type": compute.ResultType.ERROR.value,
+                # Error results carry the cause instead of data
+                "result_data": _ERROR_CMD_RESPONSE.results.cause,
+            },
+            id="error_result",
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_execute_code(mock_db_client_ws_tools, code, cluster_id, cmd_response, expected):
     # Arrange
-    notebook = "/Users/test/other_nb"
-    # Act - No cluster_id provided
-    result = run_notebook(notebook_path=notebook, parameters=None)
+    mock_db_client_ws_tools.command_execution.command_status.return_value = cmd_response
 
-    # Assert - Should call run_now without existing_cluster_id
-    mock_db_client_ws_tools.jobs.run_now.assert_called_once_with(
-        run_name=f"MCP Run: {notebook}",
-        tasks=[{"notebook_task": {"notebook_path": notebook, "base_parameters": {}}}],
-        # No cluster spec passed if cluster_id is None and no default new_cluster defined
+    # Act
+    result = await execute_code(code=code, language="python", cluster_id=cluster_id)
+
+    # Assert - the command runs in a fresh context, its status is polled once, then the context is destroyed
+    command_execution = mock_db_client_ws_tools.command_execution
+    command_execution.execute.assert_called_once_with(
+        cluster_id=cluster_id,
+        context_id="ctx-1",
+        language=compute.Language.PYTHON,
+        command=code,
     )
-    assert result["run_id"] == 12345 # Still returns run details
-
-def test_run_notebook_failed_run(mock_db_client_ws_tools):
-    # Arrange - Modify the mock get_run response for failure
-    mock_run_details_failed = MagicMock()
-    mock_run_details_failed.run_id = 67890
-    mock_run_details_failed.run_page_url = "http://example.com/run/67890"
-    mock_run_details_failed.state = MagicMock()
-    mock_run_details_failed.state.life_cycle_state = jobs_service.RunLifeCycleState.TERMINATED
-    mock_run_details_failed.state.result_state = jobs_service.RunResultState.FAILED
-    mock_run_details_failed.state.state_message = "Notebook failed"
-
-    # Simulate run_now returning the new run_id, then get_run returning failed state
-    mock_run_response_failed = MagicMock()
-    mock_run_response_failed.run_id = 67890
-    mock_run_waiter_failed = MagicMock() # Waiter for the failed run
-    # Make .result() return the failed details
-    mock_run_waiter_failed.result.return_value = mock_run_details_failed
-    mock_db_client_ws_tools.jobs.run_now.return_value = mock_run_waiter_failed
-    mock_db_client_ws_tools.jobs.get_run.return_value = mock_run_details_failed
+    command_execution.command_status.assert_called_once_with(
+        cluster_id=cluster_id, context_id="ctx-1", command_id="cmd-abc",
+    )
+    command_execution.execute.return_value.result.assert_not_called()
+    command_execution.destroy.assert_called_once_with(cluster_id=cluster_id, context_id="ctx-1")
+    # Statuses and result types are returned as their enum value strings
+    assert {key: result[key] for key in expected} == expected
+
+
+# Add tests for SDK errors being mapped by decorator if needed, similar to compute tests
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("language", ["java", "r"]) # compute.Language has no R member
+async def test_execute_code_rejects_unknown_language(mock_db_client_ws_tools, language):
+    with pytest.raises(Exception, match=f"Unsupported language '{language}'"):
+        await execute_code(code="x", language=language, cluster_id="c1")
+    mock_db_client_ws_tools.command_execution.create_and_wait.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_execute_code_polls_until_terminal_status(mock_db_client_ws_tools):
+    # Arrange - the command is RUNNING for one poll, then FINISHED
+    finished = mock_db_client_ws_tools.command_execution.command_status.return_value
+    mock_db_client_ws_tools.command_execution.command_status.side_effect = [_RUNNING_COMMAND, finished]
 
     # Act
-    result = run_notebook(notebook_path="/fail", cluster_id="c1")
+    with patch.object(polling, "RUN_POLL_INITIAL_DELAY_SECONDS", 0):
+        result = await execute_code(code="1", language="python", cluster_id="c1")
 
     # Assert
-    assert result["run_id"] == 67890
-    assert result["status"] == "TERMINATED"
-    assert result["result_state"] == "FAILED"
+    assert result["status"] == compute.CommandStatus.FINISHED.value
+    assert mock_db_client_ws_tools.command_execution.command_status.call_count == 2
 
+@pytest.mark.asyncio
+async def test_execute_code_times_out(mock_db_client_ws_tools):
+    # Arrange - the command never finishes
+    mock_db_client_ws_tools.command_execution.command_status.return_value = _RUNNING_COMMAND
 
-# --- Tests for execute_code ---
+    # Act & Assert
+    with patch.object(polling, "WAIT_TIMEOUT_SECONDS", 0.05), \
+            patch.object(polling, "RUN_POLL_INITIAL_DELAY_SECONDS", 0.01), \
+            pytest.raises(Exception, match="did not finish within"):
+        await execute_code(code="1", language="python", cluster_id="c1")
+    mock_db_client_ws_tools.command_execution.cancel.assert_called_once_with(**_COMMAND_IDS)
+    mock_db_client_ws_tools.command_execution.destroy.assert_called_once_with(cluster_id="c1", context_id="ctx-1")
 
-def test_execute_code_success(mock_db_client_ws_tools):
-    # Arrange
-    code = "print('hello')"
-    lang = "python"
-    cluster = "cluster-exec"
+@pytest.mark.asyncio
+async def test_execute_code_uses_command_execution_api_signatures(monkeypatch):
+    # Arrange - autospecced SDK APIs reject methods and arguments the real SDK does not have
+    client = MagicMock()
+    client.clusters = create_autospec(compute.ClustersAPI, instance=True)
+    client.command_execution = create_autospec(compute.CommandExecutionAPI, instance=True)
+    client.command_execution.create_and_wait.return_value = _CONTEXT
+    client.command_execution.execute.return_value = _EXECUTE_WAITER
+    client.command_execution.command_status.return_value = _CMD_RESPONSE
+    monkeypatch.setattr(workspace_tools, "get_db_client", lambda: client)
 
     # Act
-    result = execute_code(code=code, language=lang, cluster_id=cluster)
+    result = await execute_code(code="1", language="sql", cluster_id="c1")
 
     # Assert
-    # Check that clusters.execute was called
-    mock_db_client_ws_tools.clusters.execute.assert_called_once_with(
-        language=lang,
-        cluster_id=cluster,
-        command=code
-    )
-    mock_db_client_ws_tools.clusters.execute.return_value.result.assert_called_once()
     assert result["command_id"] == "cmd-abc"
-    # Assert against the enum value string
-    assert result["status"] == compute.CommandStatus.FINISHED.value
-    assert result["result_type"] == compute.ResultType.TEXT.value
-    assert result["result_data"] == "Command output"
-
-
-def test_execute_code_error_result(mock_db_client_ws_tools):
-    # Arrange - Modify mock execute response for error
-    mock_cmd_response_err = MagicMock()
-    mock_cmd_response_err.id = "cmd-err"
-    # Use compute.CommandStatus
-    mock_cmd_response_err.status = compute.CommandStatus.ERROR
-    mock_cmd_response_err.results = MagicMock()
-    # Use compute.ResultType
-    mock_cmd_response_err.results.result_type = compute.ResultType.ERROR
-    mock_cmd_response_err.results.cause = "Traceback...\\nNameError: name 'x' is not defined"
-    mock_cmd_response_err.results.data = None
-
-    mock_execute_waiter_err = MagicMock()
-    mock_execute_waiter_err.result.return_value = mock_cmd_response_err
-    # Mock the clusters.execute method to return the error waiter
-    mock_db_client_ws_tools.clusters.execute.return_value = mock_execute_waiter_err
-    # Remove old mock attribute setting
-    # mock_db_client_ws_tools.command_execution = MagicMock()
-    # mock_db_client_ws_tools.command_execution.execute.return_value = mock_execute_waiter_err
+    client.command_execution.create_and_wait.assert_called_once()
+    assert client.command_execution.create_and_wait.call_args.kwargs["language"] is compute.Language.SQL
+    client.command_execution.command_status.assert_called_once_with(**_COMMAND_IDS)
+
+@pytest.mark.asyncio
+async def test_run_notebook_timeout_seconds_overrides_default(mock_db_client_ws_tools):
+    # Arrange - the run never finishes, and cancelling it fails
+    mock_db_client_ws_tools.jobs.get_run.return_value = _RUNNING_RUN
+    mock_db_client_ws_tools.jobs.cancel_run.side_effect = RuntimeError("cancel failed")
+
+    # Act & Assert - the timeout is still what the caller sees
+    with patch.object(workspace_tools, "wait_timeout", return_value=0.05), \
+            patch.object(polling, "RUN_POLL_INITIAL_DELAY_SECONDS", 0.01), \
+            pytest.raises(Exception, match=r"TimeoutError.*was cancelled"):
+        await run_notebook(notebook_path="/slow", timeout_seconds=1)
+    mock_db_client_ws_tools.jobs.cancel_run.assert_called_once_with(run_id=12345)
+
+@pytest.mark.asyncio
+async def test_execute_code_rejects_timeout_below_one_second(mock_db_client_ws_tools):
+    with pytest.raises(Exception, match="'timeout_seconds' must be at least 1"):
+        await execute_code(code="1", language="python", cluster_id="c1", timeout_seconds=0)
+    mock_db_client_ws_tools.command_execution.create_and_wait.assert_not_called()
+
+# --- Tests for run_notebooks ---
+
+@pytest.mark.asyncio
+async def test_run_notebooks_runs_all_and_reports_failures_per_notebook(mock_db_client_ws_tools):
+    # Arrange - the second submission fails, the others start runs 1 and 3
+    mock_db_client_ws_tools.jobs.submit.side_effect = [
+        MagicMock(run_id=1),
+        RuntimeError("quota exceeded"),
+        MagicMock(run_id=3),
+    ]
 
     # Act
-    result = execute_code(code="print(x)", language="python", cluster_id="c-err")
+    result = await run_notebooks(notebook_paths=["/nb1", "/nb2", "/nb3"], cluster_id="c1")
 
     # Assert
-    assert result["command_id"] == "cmd-err"
-    # Assert against the enum value string
-    assert result["status"] == compute.CommandStatus.ERROR.value
-    assert result["result_type"] == compute.ResultType.ERROR.value
-    assert "NameError" in result["result_data"]
+    assert [r and r["run_id"] for r in result["results"]] == [1, None, 3]
+    assert result["errors"] == [{"index": 1, "notebook_path": "/nb2", "error": "quota exceeded"}]
+    assert {c.kwargs["run_id"] for c in mock_db_client_ws_tools.jobs.get_run.call_args_list} == {1, 3}
+    assert polling._run_pollers == {}
 
+@pytest.mark.asyncio
+async def test_run_notebooks_uses_jobs_api_signatures(monkeypatch):
+    # Arrange - an autospecced JobsAPI fails every submission made with arguments the real SDK lacks
+    client = MagicMock()
+    client.jobs = create_autospec(jobs_service.JobsAPI, instance=True)
+    # Submissions run on worker threads, so derive each run_id from its notebook path rather than call order
+    client.jobs.submit.side_effect = lambda tasks, **_: MagicMock(run_id=int(tasks[0].notebook_task.notebook_path[-1]))
+    client.jobs.get_run.return_value = _RUN_DETAILS
+    monkeypatch.setattr(workspace_tools, "get_db_client", lambda: client)
 
-# Add tests for SDK errors being mapped by decorator if needed, similar to compute tests
+    # Act
+    result = await run_notebooks(notebook_paths=["/nb1", "/nb2"], cluster_id="c1")
+
+    # Assert
+    assert result["errors"] == []
+    assert [r["run_id"] for r in result["results"]] == [1, 2]
+    submitted = {c.kwargs["tasks"][0].notebook_task.notebook_path for c in client.jobs.submit.call_args_list}
+    assert submitted == {"/nb1", "/nb2"}
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("mock_db_client_ws_tools")
+async def test_run_notebooks_caps_concurrent_submissions():
+    in_flight = peak = 0
+    async def start(*_):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return 12345
+
+    with patch.object(workspace_tools, "RUN_NOTEBOOKS_MAX_CONCURRENCY", 2), \
+         patch.object(workspace_tools, "_start_notebook_run", start):
+        result = await run_notebooks(notebook_paths=[f"/nb{i}" for i in range(5)])
+
+    assert peak == 2
+    assert result["errors"] == []
+    assert len(result["results"]) == 5
+
+@pytest.mark.asyncio
+async def test_run_notebooks_rejects_too_many_paths(mock_db_client_ws_tools):
+    paths = ["/nb"] * (workspace_tools.MAX_BATCH_NOTEBOOKS + 1)
+    with pytest.raises(Exception, match="At most 100 notebooks"):
+        await run_notebooks(notebook_paths=paths)
+    mock_db_client_ws_tools.jobs.submit.assert_not_called()
+
+# --- Tests for start_notebook_run / get_notebook_run ---
+
+@pytest.mark.asyncio
+async def test_start_notebook_run_name_strips_control_chars_and_keeps_path_tail(mock_db_client_ws_tools):
+    notebook = "/Users/test/" + "d" * 300 + "/my\x00nb\n"
+    await start_notebook_run(notebook_path=notebook)
+
+    run_name = mock_db_client_ws_tools.jobs.submit.call_args.kwargs["run_name"]
+    assert run_name.startswith("MCP Run: ")
+    assert run_name.endswith("d/mynb")
+    assert len(run_name) == len("MCP Run: ") + workspace_tools.RUN_NAME_MAX_PATH_CHARS
+
+@pytest.mark.asyncio
+async def test_start_notebook_run_returns_without_polling(mock_db_client_ws_tools):
+    result = await start_notebook_run(notebook_path="/nb", cluster_id="c1")
+
+    assert result == {"run_id": 12345, "status": "PENDING"}
+    assert mock_db_client_ws_tools.jobs.submit.call_args.kwargs["tasks"][0].existing_cluster_id == "c1"
+    mock_db_client_ws_tools.jobs.get_run.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_start_notebook_run_uses_jobs_api_signatures(monkeypatch):
+    # Arrange - an autospecced JobsAPI rejects methods and arguments the real SDK does not have
+    client = MagicMock()
+    client.jobs = create_autospec(jobs_service.JobsAPI, instance=True)
+    client.jobs.submit.return_value = _RUN_WAITER
+    monkeypatch.setattr(workspace_tools, "get_db_client", lambda: client)
+
+    # Act
+    result = await start_notebook_run(notebook_path="/nb", cluster_id="c1", parameters={"p": "1"})
+
+    # Assert
+    assert result["run_id"] == 12345
+    (task,) = client.jobs.submit.call_args.kwargs["tasks"]
+    assert task.as_dict() == {
+        "task_key": "notebook",
+        "notebook_task": {"notebook_path": "/nb", "base_parameters": {"p": "1"}},
+        "existing_cluster_id": "c1",
+    }
+
+@pytest.mark.asyncio
+async def test_get_notebook_run_without_wait_polls_once(mock_db_client_ws_tools):
+    mock_db_client_ws_tools.jobs.get_run.return_value = _RUNNING_RUN
+
+    result = await get_notebook_run(run_id=12345)
+
+    assert result == {
+        "run_id": 12345,
+        "status": "RUNNING",
+        "result_state": "UNKNOWN",
+        "run_page_url": "http://example.com/run/12345",
+    }
+    mock_db_client_ws_tools.jobs.get_run.assert_called_once_with(run_id=12345)
+
+@pytest.mark.asyncio
+async def test_get_notebook_run_long_polls_until_finished(mock_db_client_ws_tools):
+    finished = mock_db_client_ws_tools.jobs.get_run.return_value
+    mock_db_client_ws_tools.jobs.get_run.side_effect = [_RUNNING_RUN, finished]
+
+    with patch.object(polling, "RUN_POLL_INITIAL_DELAY_SECONDS", 0):
+        result = await get_notebook_run(run_id=12345, wait_time_ms=5000)
+
+    assert (result["status"], result["result_state"]) == ("TERMINATED", "SUCCESS")
+    assert mock_db_client_ws_tools.jobs.get_run.call_count == 2
+
+@pytest.mark.asyncio
+async def test_get_notebook_run_wait_elapsed_returns_current_state(mock_db_client_ws_tools):
+    mock_db_client_ws_tools.jobs.get_run.return_value = _RUNNING_RUN
+
+    with patch.object(polling, "RUN_POLL_INITIAL_DELAY_SECONDS", 0.01):
+        result = await get_notebook_run(run_id=12345, wait_time_ms=50)
+
+    assert result["status"] == "RUNNING"
+    mock_db_client_ws_tools.jobs.cancel_run.assert_not_called()
+    assert polling._run_pollers == {}
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("mock_db_client_ws_tools")
+async def test_get_notebook_run_rejects_out_of_range_wait():
+    with pytest.raises(Exception, match="'wait_time_ms' must be between 0 and 60000"):
+        await get_notebook_run(run_id=1, wait_time_ms=60_001)